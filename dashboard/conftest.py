@@ -0,0 +1,3 @@
+# conftest.py
+# Folder dashboard/ dimasukkan ke sys.path oleh pytest (rootdir conftest), sehingga paket
+# ecommerce_analytics bisa diimpor dari tests/ tanpa instalasi: `cd dashboard && python -m pytest`
@@ -0,0 +1,92 @@
+"""
+ecommerce_analytics: logika analisis dashboard E-commerce tanpa ketergantungan ke Streamlit.
+
+Contoh pemakaian:
+
+    from ecommerce_analytics import load_delivery_durations, delivery_stats
+    stats = delivery_stats(load_delivery_durations(), years=[2017, 2018])
+
+Laporan batch untuk beberapa tahun sekaligus:
+
+    python -m ecommerce_analytics reports --years 2017 2018
+
+Backend out-of-core untuk data yang lebih besar dari RAM (ECOMMERCE_BACKEND=streaming):
+
+    from ecommerce_analytics import load_streaming_aggregates, problem_orders_from_aggregates
+    report = problem_orders_from_aggregates(load_streaming_aggregates(), years=[2018])
+
+Persentil & keterlambatan untuk kombinasi filter apa pun, dari gabungan sketsa kuantil:
+
+    from ecommerce_analytics import load_delivery_sketches, delivery_stats_from_sketches
+    stats = delivery_stats_from_sketches(load_delivery_sketches(), years=[2018], customer_states=['SP'])
+
+Pengaruh jarak penjual-pelanggan (centroid kode pos) terhadap durasi & keterlambatan:
+
+    from ecommerce_analytics import load_delivery_geo, distance_band_summary
+    bands = distance_band_summary(load_delivery_geo(), years=[2017, 2018])
+
+Segmentasi pelanggan RFM untuk tanggal snapshot apa pun:
+
+    import datetime
+    from ecommerce_analytics import build_rfm_index, load_customer_days, rfm_scores, segment_summary
+    rfm = rfm_scores(build_rfm_index(load_customer_days()), as_of=datetime.date(2018, 6, 30))
+    segments = segment_summary(rfm)
+
+Batch pesanan baru/terkoreksi (agregat tersimpan diperbarui secara inkremental):
+
+    python -m ecommerce_analytics append datasets-baru/2018-10-18
+"""
+
+from .analyses import category_revenue, delivery_stats, problem_orders
+from .appends import append_batch
+from .cleaning import clean_and_prepare_data, clean_orders_data, prepare_products_data
+from .facts import (
+    PROBLEM_ORDER_STATUSES,
+    REVENUE_GRANULARITIES,
+    build_delivery_durations,
+    build_order_lines,
+    build_revenue_cube,
+    load_delivery_durations,
+    load_order_lines,
+)
+from .geo import distance_band_summary, load_delivery_geo, state_pair_summary
+from .reports import generate_reports, read_report
+from .rfm import build_rfm_index, load_customer_days, rfm_scores, segment_summary
+from .sketches import delivery_percentile_trend, delivery_stats_from_sketches, late_delivery_by_state, load_delivery_sketches
+from .storage import TABLE_REGISTRY, read_table
+from .streaming import delivery_stats_from_counts, load_streaming_aggregates, problem_orders_from_aggregates
+
+__all__ = [
+    'PROBLEM_ORDER_STATUSES',
+    'REVENUE_GRANULARITIES',
+    'TABLE_REGISTRY',
+    'append_batch',
+    'build_delivery_durations',
+    'build_order_lines',
+    'build_revenue_cube',
+    'build_rfm_index',
+    'category_revenue',
+    'clean_and_prepare_data',
+    'clean_orders_data',
+    'delivery_percentile_trend',
+    'delivery_stats',
+    'delivery_stats_from_counts',
+    'delivery_stats_from_sketches',
+    'distance_band_summary',
+    'generate_reports',
+    'late_delivery_by_state',
+    'load_delivery_durations',
+    'load_delivery_geo',
+    'load_customer_days',
+    'load_delivery_sketches',
+    'load_order_lines',
+    'load_streaming_aggregates',
+    'prepare_products_data',
+    'problem_orders',
+    'problem_orders_from_aggregates',
+    'read_report',
+    'read_table',
+    'rfm_scores',
+    'segment_summary',
+    'state_pair_summary',
+]
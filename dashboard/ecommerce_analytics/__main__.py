@@ -0,0 +1,143 @@
+# __main__.py
+# CLI: jalankan dari folder dashboard, mis. `python -m ecommerce_analytics reports --years 2017 2018`
+# atau `python -m ecommerce_analytics bench --scales 1 10`, `python -m ecommerce_analytics ingest`,
+# `python -m ecommerce_analytics append datasets-baru/2018-10-18`
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import config
+from .appends import append_batch, verify_aggregates
+from .bench import DEFAULT_SCALES, compare_bench, load_bench, run_bench
+from .facts import REVENUE_GRANULARITIES
+from .parity import check_parity
+from .reports import generate_reports
+from .storage import TABLE_REGISTRY, load_tables
+from .synthetic import generate_dataset
+from .telemetry import stage, stage_summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m ecommerce_analytics',
+        description='Analisis data penjualan E-commerce tanpa Streamlit.'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reports_parser = commands.add_parser(
+        'reports', help='Hitung laporan yang dibaca dashboard untuk daftar tahun secara paralel dan simpan ke Parquet/JSON.'
+    )
+    reports_parser.add_argument('--years', type=int, nargs='+', required=True, help='Tahun pemesanan, mis. 2017 2018.')
+    reports_parser.add_argument('--out', type=Path, default=config.REPORTS_DIR, help='Folder output laporan.')
+    reports_parser.add_argument('--dataset-dir', type=Path, default=config.DATASET_DIR, help='Folder CSV sumber.')
+    reports_parser.add_argument('--workers', type=int, default=None, help='Jumlah proses (default: jumlah CPU).')
+    reports_parser.add_argument('--granularity', choices=list(REVENUE_GRANULARITIES), default='Kuartalan')
+    reports_parser.add_argument('--top-n', type=int, default=5)
+    reports_parser.add_argument('--backend', choices=config.BACKENDS, default=config.BACKEND)
+
+    generate_parser = commands.add_parser(
+        'generate', help='Buat dataset sintetis berbentuk Olist (sembilan CSV) dengan faktor skala.'
+    )
+    generate_parser.add_argument('--out', type=Path, required=True, help='Folder output CSV.')
+    generate_parser.add_argument('--scale', type=float, default=1.0, help='Faktor skala terhadap dataset asli.')
+    generate_parser.add_argument('--seed', type=int, default=42)
+
+    bench_parser = commands.add_parser(
+        'bench', help='Ukur waktu & memori puncak setiap tahap pipeline pada dataset sintetis.'
+    )
+    bench_parser.add_argument('--scales', type=float, nargs='+', default=list(DEFAULT_SCALES), help='mis. 1 10 100')
+    bench_parser.add_argument('--seed', type=int, default=42)
+    bench_parser.add_argument('--data-dir', type=Path, default=config.BENCH_DIR, help='Folder dataset sintetis.')
+    bench_parser.add_argument('--out', type=Path, default=None, help='File JSON hasil (default: di --data-dir).')
+    bench_parser.add_argument('--compare', type=Path, default=None, help='JSON hasil sebelumnya sebagai pembanding.')
+
+    parity_parser = commands.add_parser(
+        'parity', help='Bandingkan hasil backend pandas dan streaming untuk ketiga analisis.'
+    )
+    parity_parser.add_argument('--dataset-dir', type=Path, default=config.DATASET_DIR, help='Folder CSV sumber.')
+    parity_parser.add_argument('--partitions', type=int, default=None, help='Paksa jumlah partisi streaming.')
+    parity_parser.add_argument('--chunk-rows', type=int, default=None, help='Paksa jumlah baris per potongan CSV.')
+
+    ingest_parser = commands.add_parser(
+        'ingest', help='Parse semua CSV secara paralel menjadi snapshot Arrow dan tampilkan waktu per file.'
+    )
+    ingest_parser.add_argument('--dataset-dir', type=Path, default=config.DATASET_DIR, help='Folder CSV sumber.')
+    ingest_parser.add_argument('--workers', type=int, default=None, help='Jumlah thread (default: jumlah core).')
+
+    append_parser = commands.add_parser(
+        'append', help='Tambahkan satu batch orders/order_items/order_payments dan perbarui agregat secara inkremental.'
+    )
+    append_parser.add_argument('batch_dir', type=Path, help='Folder batch berisi CSV dengan nama file yang sama seperti dataset.')
+    append_parser.add_argument('--dataset-dir', type=Path, default=config.DATASET_DIR, help='Folder CSV sumber.')
+    append_parser.add_argument('--name', default=None, help='Nama batch (default: nama folder batch).')
+    append_parser.add_argument('--verify', action='store_true', help='Bandingkan hasil dengan hitung ulang penuh.')
+
+    args = parser.parse_args(argv)
+    if args.command == 'reports':
+        manifest = generate_reports(
+            args.years, args.out, args.dataset_dir, args.workers, args.granularity, args.top_n, args.backend
+        )
+        for item in manifest['reports']:
+            print(f"{item['years']:>12}  {item['kind']:<18} {item['seconds']:.2f} dtk")
+        print(f"{len(manifest['reports'])} laporan ditulis ke {args.out}")
+    elif args.command == 'generate':
+        row_counts = generate_dataset(args.out, args.scale, args.seed)
+        for table_name, rows in row_counts.items():
+            print(f"{table_name:<36} {rows:>12,}")
+    elif args.command == 'bench':
+        result = run_bench(args.scales, args.data_dir, args.seed)
+        out = args.out or args.data_dir / f"bench-{(result['git_commit'] or 'nogit')[:10]}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, indent=2))
+        for item in result['results']:
+            print(f"{item['scale']:>6g}x  {item['stage']:<48} {item['seconds']:>8.3f} dtk  {item['peak_mb']:>9.1f} MB")
+        print(f"Hasil ditulis ke {out}")
+        if args.compare:
+            print(f"\nDibanding {args.compare} (rasio > 1 = lebih lambat/boros):")
+            for row in compare_bench(load_bench(args.compare), result):
+                print(f"{row['scale']:>6g}x  {row['stage']:<48} waktu x{row['seconds_ratio']}  memori x{row['peak_mb_ratio']}")
+
+    elif args.command == 'ingest':
+        with stage('ingest.total'):
+            tables = load_tables({table_name: None for table_name in TABLE_REGISTRY}, args.dataset_dir, max_workers=args.workers)
+        seconds = stage_summary().set_index('Tahap')['Terakhir (dtk)']
+        for table_name, df in tables.items():
+            parse_seconds = seconds.get(f"parse.{table_name}")
+            parse_text = f"  (parse CSV {parse_seconds:.3f} dtk)" if parse_seconds is not None else ''
+            print(f"{table_name:<36} {len(df):>12,} baris  {seconds[f'load.{table_name}']:>8.3f} dtk{parse_text}")
+        print(f"Total {seconds['ingest.total']:.3f} dtk dengan {args.workers or config.INGEST_WORKERS} thread")
+
+    elif args.command == 'append':
+        try:
+            summary = append_batch(args.batch_dir, args.dataset_dir, args.name)
+        except ValueError as error:
+            sys.exit(f"Batch ditolak: {error}")
+        rows = ', '.join(f"{table_name} {count:,} baris" for table_name, count in summary['rows'].items())
+        print(f"Batch {summary['batch']}: {rows}; {summary['orders']:,} pesanan tersentuh")
+        print(f"Agregat diperbarui ({summary['mode']}) dalam {summary['seconds']:.2f} dtk")
+        if args.verify:
+            differences = verify_aggregates(args.dataset_dir)
+            for difference in differences:
+                print(difference)
+            print(f"Verifikasi hitung ulang penuh: {len(differences)} perbedaan")
+            if differences:
+                sys.exit(1)
+
+    elif args.command == 'parity':
+        # Partisi & potongan kecil berguna untuk menguji jalur multi-partisi pada dataset kecil
+        if args.partitions:
+            config.STREAMING_PARTITIONS = args.partitions
+        if args.chunk_rows:
+            config.STREAMING_CHUNK_ROWS = args.chunk_rows
+        n_cases, differences = check_parity(args.dataset_dir)
+        for difference in differences:
+            print(difference)
+        print(f"{n_cases} kasus diperiksa, {len(differences)} perbedaan")
+        if differences:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# analyses.py
+# Tiga analisis utama dashboard dalam bentuk fungsi murni:
+# hasilnya dict berisi angka dan DataFrame biasa, tanpa ketergantungan ke Streamlit
+
+import numpy as np
+import pandas as pd
+
+from .facts import (
+    PROBLEM_ORDER_STATUSES,
+    consistent_top_n_categories,
+    format_period_labels,
+    rollup_revenue,
+)
+from .telemetry import profiled
+
+HISTOGRAM_BINS = 50
+
+
+@profiled('analysis.delivery_stats')
+def delivery_stats(durations, years):
+    """
+    Statistik durasi pengiriman pesanan 'delivered' untuk tahun pemesanan tertentu,
+    termasuk histogram yang sudah di-bin. Mengembalikan None jika tidak ada data.
+    """
+    days = durations.loc[durations['year'].isin(years), 'delivery_duration_days']
+    if days.empty:
+        return None
+
+    counts, edges = np.histogram(days.to_numpy(), bins=HISTOGRAM_BINS)
+    return {
+        'years': sorted(int(year) for year in years),
+        'count': int(len(days)),
+        'mean': float(days.mean()),
+        'min': int(days.min()),
+        'max': int(days.max()),
+        'histogram_counts': counts.tolist(),
+        'histogram_edges': edges.tolist(),
+    }
+
+
+@profiled('analysis.problem_orders')
+def problem_orders(orders_df, order_lines, years, statuses=PROBLEM_ORDER_STATUSES):
+    """
+    Jumlah pesanan bermasalah (default: canceled/unavailable) pada tahun tertentu,
+    serta jumlah baris pesanan bermasalah per kategori produk dan per penjual.
+    """
+    total_orders = int((
+        orders_df['order_purchase_timestamp'].dt.year.isin(years) &
+        orders_df['order_status'].isin(statuses)
+    ).sum())
+
+    problem_lines = order_lines[order_lines['year'].isin(years) & order_lines['order_status'].isin(statuses)]
+    by_category = problem_lines['product_category_name_display'].value_counts()
+    by_category = by_category[by_category > 0]
+    by_seller = problem_lines['seller_id'].value_counts()
+    by_seller = by_seller[by_seller > 0]
+    # ID penjual berupa kode kamus: decode ke hex hanya untuk hasil yang ditampilkan
+    by_seller.index = by_seller.index.astype(str)
+    return {
+        'years': sorted(int(year) for year in years),
+        'statuses': list(statuses),
+        'total_orders': total_orders,
+        'by_category': by_category.rename_axis('product_category_name_display').reset_index(name='problem_order_lines'),
+        'by_seller': by_seller.rename_axis('seller_id').reset_index(name='problem_order_lines'),
+    }
+
+
+@profiled('analysis.category_revenue')
+def category_revenue(revenue_cube, start_date, end_date, granularity='Kuartalan', top_n=5, seller_states=None):
+    """
+    Pendapatan per kategori produk per periode, kategori yang konsisten masuk top-N
+    di setiap periode, dan top-N kategori secara keseluruhan pada rentang tanggal.
+    """
+    revenue = rollup_revenue(revenue_cube, granularity, start_date, end_date, seller_states)
+    revenue['period_label'] = format_period_labels(revenue['period'], granularity)
+    top_overall = revenue.groupby(
+        'product_category_name_display', observed=True
+    )['payment_value'].sum().nlargest(top_n)
+    return {
+        'start_date': pd.Timestamp(start_date).date().isoformat(),
+        'end_date': pd.Timestamp(end_date).date().isoformat(),
+        'granularity': granularity,
+        'top_n': int(top_n),
+        'seller_states': list(seller_states or []),
+        'consistent_categories': [str(cat) for cat in consistent_top_n_categories(revenue, top_n)],
+        'revenue': revenue,
+        'top_overall': top_overall.reset_index(),
+    }
@@ -0,0 +1,129 @@
+# appends.py
+# Ingest inkremental: batch baris baru/terkoreksi untuk orders, order_items, dan order_payments
+# (mis. satu folder per tanggal) ditambahkan tanpa mengganti CSV utama. Agregat tersimpan
+# (lihat streaming.py) diperbarui hanya untuk pesanan yang tersentuh batch: kontribusi lama
+# pesanan tersebut dikurangkan, kontribusi barunya ditambahkan.
+
+import csv
+import shutil
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from . import config
+from .parity import compare_values
+from .storage import APPEND_TABLES, APPENDS_DIRNAME, TABLE_REGISTRY, append_batches, read_csv_arrow
+from .streaming import (
+    aggregates_for_orders,
+    combine_aggregates,
+    compute_streaming_aggregates,
+    load_dimensions,
+    read_saved_aggregates,
+    save_aggregates,
+)
+from .telemetry import stage
+
+
+def csv_header(path):
+    with open(path, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def validate_batch(batch_dir, dataset_dir):
+    """
+    Memeriksa folder batch: minimal satu CSV tabel transaksi dengan kolom yang sama persis
+    seperti CSV utamanya. Mengembalikan {nama tabel: tabel Arrow batch}.
+    """
+    tables = {}
+    for table_name in APPEND_TABLES:
+        spec = TABLE_REGISTRY[table_name]
+        path = batch_dir / spec['file']
+        if not path.exists():
+            continue
+        expected = csv_header(dataset_dir / spec['file'])
+        if csv_header(path) != expected:
+            raise ValueError(f"{path}: kolom harus sama dengan {spec['file']} ({', '.join(expected)})")
+        try:
+            tables[table_name] = read_csv_arrow(path, spec)
+        except pa.ArrowInvalid as error:
+            raise ValueError(f"{path}: {error}") from error
+        if tables[table_name].column('order_id').null_count:
+            raise ValueError(f"{path}: order_id tidak boleh kosong")
+    if not tables:
+        files = ', '.join(TABLE_REGISTRY[table_name]['file'] for table_name in APPEND_TABLES)
+        raise ValueError(f"{batch_dir}: tidak ada file batch ({files})")
+    return tables
+
+
+def register_batch(batch_dir, dataset_dir, name=None):
+    """
+    Menyalin file batch ke <dataset>/appends/<nomor>_<nama>/ (nomor urut menentukan batch
+    mana yang terbaru). Disalin ke folder sementara dulu lalu di-rename, jadi pembaca tidak
+    pernah melihat batch setengah jadi.
+    """
+    appends_dir = dataset_dir / APPENDS_DIRNAME
+    appends_dir.mkdir(parents=True, exist_ok=True)
+    existing = append_batches(dataset_dir)
+    number = int(existing[-1].name.split('_', 1)[0]) + 1 if existing else 1
+    target = appends_dir / f"{number:04d}_{name or batch_dir.name}"
+    tmp_dir = appends_dir / f".{target.name}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+    for table_name in APPEND_TABLES:
+        path = batch_dir / TABLE_REGISTRY[table_name]['file']
+        if path.exists():
+            shutil.copyfile(path, tmp_dir / path.name)
+    tmp_dir.rename(target)
+    return target
+
+
+def append_batch(batch_dir, dataset_dir=None, name=None):
+    """
+    Menambahkan satu batch dan memperbarui agregat tersimpan. Jika agregat tersimpan masih
+    sesuai dengan data sebelum batch, pembaruan bersifat inkremental (biaya sebanding dengan
+    jumlah pesanan di batch); jika tidak, atau jika min/maks agregat tidak bisa diturunkan dari
+    selisihnya, agregat dihitung ulang penuh sekali.
+    Mengembalikan ringkasan {batch, rows, orders, mode, seconds}.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    started = time.perf_counter()
+    tables = validate_batch(batch_dir, dataset_dir)
+    order_ids = pc.unique(pa.concat_arrays([
+        table.column('order_id').combine_chunks().cast(pa.string()) for table in tables.values()
+    ]))
+
+    base = read_saved_aggregates(dataset_dir)
+    combined = None
+    if base is not None:
+        with stage('append.incremental'):
+            dimensions = load_dimensions(dataset_dir)
+            removed = aggregates_for_orders(order_ids, dataset_dir, dimensions)
+            target = register_batch(batch_dir, dataset_dir, name)
+            added = aggregates_for_orders(order_ids, dataset_dir, dimensions)
+            combined = combine_aggregates(base, added, removed)
+    if combined is not None:
+        save_aggregates(combined, dataset_dir)
+        mode = 'inkremental'
+    else:
+        # Tidak ada agregat tersimpan, atau koreksi batch membuat min/maks tidak bisa diturunkan
+        if base is None:
+            target = register_batch(batch_dir, dataset_dir, name)
+        with stage('append.full_rebuild'):
+            save_aggregates(compute_streaming_aggregates(dataset_dir), dataset_dir)
+        mode = 'penuh'
+    return {
+        'batch': target.name,
+        'rows': {table_name: table.num_rows for table_name, table in tables.items()},
+        'orders': len(order_ids),
+        'mode': mode,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def verify_aggregates(dataset_dir=None):
+    """Membandingkan agregat tersimpan dengan hasil hitung ulang penuh; mengembalikan daftar perbedaan."""
+    saved = read_saved_aggregates(dataset_dir)
+    if saved is None:
+        return ['agregat tersimpan tidak ada atau sudah basi']
+    return compare_values(compute_streaming_aggregates(dataset_dir), saved, 'aggregates')
@@ -0,0 +1,206 @@
+# bench.py
+# Benchmark pipeline per tahap (waktu & memori puncak) pada dataset sintetis berbagai skala.
+# Hasil ditulis sebagai JSON agar bisa dibandingkan antar commit.
+
+import datetime
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .analyses import category_revenue, delivery_stats, problem_orders
+from .cleaning import clean_and_prepare_data, clean_orders_data
+from .facts import (
+    ORDER_LINE_SOURCE_TABLES,
+    PROBLEM_ORDER_SOURCE_TABLES,
+    build_revenue_cube,
+    load_delivery_durations,
+    load_order_lines,
+)
+from .geo import distance_band_summary, load_delivery_geo, load_zip_centroids, state_pair_summary
+from .rates import build_rate_index, daily_entity_counts, problem_rates
+from .rfm import build_rfm_index, load_customer_days, rfm_scores, segment_summary
+from .sketches import delivery_percentile_trend, delivery_stats_from_sketches, load_delivery_sketches
+from .storage import TABLE_REGISTRY, load_tables, parse_csv_typed, read_table, refresh_snapshot, snapshot_dir_for
+from .streaming import compute_streaming_aggregates
+from .synthetic import dataset_info, generate_dataset
+from .telemetry import max_rss_bytes
+
+BENCH_FORMAT_VERSION = 1
+DEFAULT_SCALES = (1, 10)
+# Tahun & parameter analisis yang diukur (sama dengan tampilan default dashboard)
+BENCH_YEARS = (2017, 2018)
+
+
+def git_commit():
+    """Hash commit saat ini (None jika bukan repositori git)."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=config.ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def max_rss_mb():
+    """RSS puncak proses sejauh ini (MB), atau None jika tidak tersedia (Windows)."""
+    max_rss = max_rss_bytes()
+    return None if max_rss is None else round(max_rss / 2**20, 1)
+
+
+def measure(results, scale, stage, func, *args):
+    """
+    Menjalankan satu tahap dan mencatat waktu, memori puncak yang dialokasikan tahap itu
+    (tracemalloc, termasuk buffer NumPy/pandas), dan jumlah baris hasilnya.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    output = func(*args)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = len(output) if isinstance(output, pd.DataFrame) else None
+    results.append({
+        'scale': scale,
+        'stage': stage,
+        'seconds': round(seconds, 4),
+        'peak_mb': round(peak / 2**20, 2),
+        'rows': rows,
+        'max_rss_mb': max_rss_mb(),
+    })
+    return output
+
+
+def ensure_dataset(data_dir, scale, seed):
+    """Membuat dataset sintetis untuk skala ini, kecuali yang sama sudah ada di `data_dir`."""
+    target = data_dir / f"scale-{scale:g}"
+    info = dataset_info(target)
+    if info is None or info['scale'] != scale or info['seed'] != seed:
+        generate_dataset(target, scale, seed)
+    return target
+
+
+def clear_snapshots(dataset_dir):
+    """Hapus snapshot agar tahap ingest mengukur pembangunan snapshot dari CSV."""
+    for path in snapshot_dir_for(dataset_dir).glob('*'):
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+
+
+def bench_scale(results, dataset_dir, scale):
+    """Semua tahap pipeline untuk satu dataset."""
+    clear_snapshots(dataset_dir)
+    for table_name, spec in TABLE_REGISTRY.items():
+        measure(results, scale, f"parse_csv.{table_name}", parse_csv_typed, dataset_dir / spec['file'], spec)
+    if config.USE_SNAPSHOTS:
+        for table_name in TABLE_REGISTRY:
+            measure(results, scale, f"build_snapshot.{table_name}", refresh_snapshot, table_name, dataset_dir)
+        # Semua snapshot dibangun ulang sekaligus dengan thread pool (startup dingin)
+        clear_snapshots(dataset_dir)
+        measure(results, scale, 'ingest.parallel', load_tables, {table_name: None for table_name in TABLE_REGISTRY}, dataset_dir)
+        for table_name in TABLE_REGISTRY:
+            measure(results, scale, f"read_table.{table_name}", read_table, table_name, None, dataset_dir)
+        # Tabel transaksi dengan kolom ID di-encode ke kamus bersama (termasuk membangun kamusnya)
+        for table_name in ('order_items', 'orders'):
+            measure(results, scale, f"read_table_ids.{table_name}", read_table, table_name, None, dataset_dir, True)
+
+    tables = load_tables(ORDER_LINE_SOURCE_TABLES, dataset_dir)
+    measure(
+        results, scale, 'clean_and_prepare_data', clean_and_prepare_data,
+        tables['orders'], tables['products'], tables['product_category_name_translation']
+    )
+    durations = measure(results, scale, 'load_delivery_durations', load_delivery_durations, dataset_dir)
+    order_lines = measure(results, scale, 'load_order_lines', load_order_lines, dataset_dir)
+    revenue_cube = measure(results, scale, 'build_revenue_cube', build_revenue_cube, order_lines)
+    sketches = measure(results, scale, 'load_delivery_sketches', load_delivery_sketches, dataset_dir)
+    measure(results, scale, 'load_zip_centroids', load_zip_centroids, dataset_dir)
+    delivery_geo = measure(results, scale, 'load_delivery_geo', load_delivery_geo, dataset_dir)
+    customer_days = measure(results, scale, 'load_customer_days', load_customer_days, dataset_dir)
+    rfm_index = measure(results, scale, 'build_rfm_index', build_rfm_index, customer_days)
+    orders = clean_orders_data(read_table('orders', PROBLEM_ORDER_SOURCE_TABLES['orders'], dataset_dir))
+
+    measure(results, scale, 'analysis.delivery_stats', delivery_stats, durations, BENCH_YEARS)
+    measure(results, scale, 'analysis.delivery_sketch_stats', delivery_stats_from_sketches, sketches, BENCH_YEARS)
+    measure(results, scale, 'analysis.delivery_percentile_trend', delivery_percentile_trend, sketches, BENCH_YEARS)
+    measure(results, scale, 'analysis.distance_bands', distance_band_summary, delivery_geo, BENCH_YEARS)
+    measure(results, scale, 'analysis.state_pairs', state_pair_summary, delivery_geo, BENCH_YEARS, 30)
+    rfm = measure(results, scale, 'analysis.rfm', rfm_scores, rfm_index, datetime.date(max(BENCH_YEARS), 12, 31))
+    measure(results, scale, 'analysis.rfm_segments', segment_summary, rfm)
+    seller_daily = measure(results, scale, 'daily_entity_counts.seller_id', daily_entity_counts, order_lines, 'seller_id')
+    seller_index = measure(results, scale, 'build_rate_index.seller_id', build_rate_index, seller_daily, 'seller_id')
+    measure(
+        results, scale, 'analysis.problem_rates', problem_rates, seller_index,
+        datetime.date(min(BENCH_YEARS), 1, 1), datetime.date(max(BENCH_YEARS), 12, 31), 20, 'rate', 10
+    )
+    measure(results, scale, 'analysis.problem_orders', problem_orders, orders, order_lines, BENCH_YEARS)
+    measure(
+        results, scale, 'analysis.category_revenue', category_revenue, revenue_cube,
+        datetime.date(min(BENCH_YEARS), 1, 1), datetime.date(max(BENCH_YEARS), 12, 31)
+    )
+    # Backend out-of-core: seluruh agregat dari CSV per potongan (bandingkan memori puncaknya)
+    measure(results, scale, 'streaming.compute_aggregates', compute_streaming_aggregates, dataset_dir)
+
+
+def run_bench(scales=DEFAULT_SCALES, data_dir=None, seed=42):
+    """Menjalankan benchmark untuk setiap skala dan mengembalikan hasil dalam bentuk dict siap-JSON."""
+    data_dir = data_dir or config.BENCH_DIR
+    results = []
+    generated = {}
+    for scale in scales:
+        started = time.perf_counter()
+        dataset_dir = ensure_dataset(data_dir, scale, seed)
+        generated[f"{scale:g}"] = {
+            'rows': dataset_info(dataset_dir)['rows'],
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+        bench_scale(results, dataset_dir, scale)
+    return {
+        'format_version': BENCH_FORMAT_VERSION,
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'seed': seed,
+        'snapshots': config.USE_SNAPSHOTS,
+        # peak_mb: alokasi Python/NumPy/pandas (tracemalloc); buffer Arrow tidak ikut terhitung
+        'memory_metric': 'tracemalloc_peak',
+        'environment': {
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'datasets': generated,
+        'results': results,
+    }
+
+
+def compare_bench(baseline, current):
+    """
+    Membandingkan dua hasil benchmark per (skala, tahap).
+    Rasio > 1 berarti lebih lambat/lebih boros dibanding baseline.
+    """
+    baseline_rows = {(item['scale'], item['stage']): item for item in baseline['results']}
+    rows = []
+    for item in current['results']:
+        before = baseline_rows.get((item['scale'], item['stage']))
+        if before is None:
+            continue
+        rows.append({
+            'scale': item['scale'],
+            'stage': item['stage'],
+            'seconds_ratio': round(item['seconds'] / before['seconds'], 2) if before['seconds'] else None,
+            'peak_mb_ratio': round(item['peak_mb'] / before['peak_mb'], 2) if before['peak_mb'] else None,
+        })
+    return rows
+
+
+def load_bench(path):
+    return json.loads(path.read_text())
@@ -0,0 +1,154 @@
+# cache.py
+# Cache per proses yang dikunci dengan sidik jari sumber (path + ukuran + mtime + versi pipeline),
+# bukan dengan hash isi DataFrame. Hasil disimpan sekali per proses sebagai data read-only dan
+# dibagikan ke semua sesi sebagai salinan dangkal copy-on-write (bawaan pandas 3), sehingga memori
+# tidak bertambah per sesi dan pemanggil tidak bisa merusak cache (lihat loadtest.py untuk
+# mengukurnya). Tanpa copy-on-write (pandas 2.x dengan opsi bawaan) pemanggil mendapat salinan penuh.
+
+import collections
+import functools
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .storage import source_fingerprint
+from .telemetry import record_cache
+
+# Copy-on-write selalu aktif sejak pandas 3; di pandas 2.x hanya jika opsi mode.copy_on_write diaktifkan
+_PANDAS_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+# Naikkan versi ini jika logika pembersihan/transformasi berubah, agar cache, agregat
+# streaming, dan laporan batch yang dihitung dengan logika lama tidak dipakai lagi
+PIPELINE_VERSION = 2
+
+# nama fungsi -> _FingerprintCache; disimpan di level modul karena main.py dieksekusi ulang
+# setiap rerun Streamlit (dekorator dipanggil ulang, cache harus tetap sama)
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def freeze(value):
+    """
+    Menandai array NumPy di dalam nilai cache (termasuk di dalam dict/list, mis. indeks
+    jumlah kumulatif atau centroid kode pos) sebagai read-only, sekali saat disimpan.
+    DataFrame/Series tidak perlu: share memberikan salinan dangkal copy-on-write atau salinan
+    penuh, jadi penulisan oleh pemanggil tidak menyentuh data bersama.
+    """
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze(item)
+    return value
+
+
+def copy_on_write_enabled():
+    """Apakah copy-on-write pandas aktif (pandas 3, atau pandas 2.x dengan mode.copy_on_write=True)."""
+    return _PANDAS_COPY_ON_WRITE or pd.get_option('mode.copy_on_write') is True
+
+
+def share(value):
+    """
+    Salinan untuk pemanggil: DataFrame/Series disalin dangkal jika copy-on-write aktif (data
+    tidak disalin) dan disalin penuh jika tidak, dict/list disalin per elemen. Objek lain
+    (termasuk array NumPy yang sudah dibekukan dengan freeze) dikembalikan apa adanya.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not copy_on_write_enabled())
+    if isinstance(value, dict):
+        return {key: share(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(share(item) for item in value)
+    return value
+
+
+class _FingerprintCache:
+    """LRU dengan TTL; satu entri per kombinasi argumen, divalidasi dengan sidik jari sumber."""
+
+    def __init__(self, name, max_entries, ttl):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = collections.OrderedDict() # argumen -> (sidik jari, nilai, waktu dibuat)
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def get(self, key, fingerprint):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            entry_fingerprint, value, created = entry
+            expired = self.ttl and time.monotonic() - created > self.ttl
+            if entry_fingerprint != fingerprint or expired:
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, value
+
+    def put(self, key, fingerprint, value):
+        with self.lock:
+            self.entries[key] = (fingerprint, value, time.monotonic())
+            self.entries.move_to_end(key)
+            while self.max_entries and len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def fingerprint_cache(source_tables=(), extra_paths=(), ttl=None, max_entries=None):
+    """
+    Dekorator cache per proses. Kunci cache = argumen fungsi (harus hashable); entri
+    dianggap basi jika sidik jari `source_tables`/`extra_paths` berubah atau umurnya melewati
+    `ttl` detik. Pemanggilan bersamaan dengan argumen yang sama menunggu satu kali muat saja.
+    Default TTL & jumlah entri dari config (ECOMMERCE_CACHE_TTL, ECOMMERCE_CACHE_MAX_ENTRIES).
+    """
+    def decorator(func):
+        name = func.__name__
+        cache_id = f"{func.__module__}.{func.__qualname__}"
+        with _registry_lock:
+            cache = _registry.get(cache_id)
+            if cache is None:
+                cache = _registry[cache_id] = _FingerprintCache(
+                    name,
+                    config.CACHE_MAX_ENTRIES if max_entries is None else max_entries,
+                    config.CACHE_TTL_SECONDS if ttl is None else ttl,
+                )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            fingerprint = (PIPELINE_VERSION, source_fingerprint(source_tables, extra_paths=extra_paths))
+            hit, value = cache.get(key, fingerprint)
+            if not hit:
+                with cache.key_lock(key):
+                    # Sesi lain mungkin sudah selesai memuat selama kita menunggu lock
+                    hit, value = cache.get(key, fingerprint)
+                    if not hit:
+                        value = freeze(func(*args, **kwargs))
+                        cache.put(key, fingerprint, value)
+            record_cache(name, hit)
+            return share(value)
+
+        wrapper.clear = cache.clear
+        return wrapper
+    return decorator
+
+
+def clear_caches():
+    """Mengosongkan semua cache sidik jari di proses ini."""
+    with _registry_lock:
+        for cache in _registry.values():
+            cache.clear()
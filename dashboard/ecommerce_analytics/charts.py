@@ -0,0 +1,217 @@
+# charts.py
+# Grafik Plotly dengan payload terbatas untuk durasi pengiriman
+# (termasuk tren persentil dan keterlambatan per negara bagian dari sketsa kuantil, serta
+# pengaruh jarak & rute penjual -> pelanggan, dan treemap segmen pelanggan RFM)
+
+import numpy as np
+import plotly.graph_objects as go
+
+from . import config
+from .telemetry import profiled
+
+# Ukuran grid heatmap densitas: (bin tanggal pemesanan, bin durasi pengiriman)
+DENSITY_GRID = (200, 100)
+
+
+@profiled('figure.delivery_histogram')
+def delivery_histogram_figure(stats):
+    """Histogram durasi dari hasil delivery_stats (sudah di-bin, hanya jumlah per bin yang dikirim)."""
+    edges = np.asarray(stats['histogram_edges'])
+    fig_hist = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=stats['histogram_counts'],
+        marker=dict(color='skyblue', line=dict(color='black', width=1)), # Warna biru muda & garis tepi hitam
+        hovertemplate='Durasi: %{x:.1f} hari<br>Jumlah Pesanan: %{y}<extra></extra>'
+    ))
+    fig_hist.update_layout(
+        title='Distribusi Durasi Pengiriman Pesanan',
+        xaxis_title='Durasi Pengiriman (hari)',
+        yaxis_title='Jumlah Pesanan',
+        bargap=0.1
+    )
+    fig_hist.add_vline(x=stats['mean'], line_dash="dash", line_color="red", annotation_text=f"Rata-rata: {stats['mean']:.2f} hari")
+    return fig_hist
+
+
+@profiled('figure.delivery_scatter')
+def delivery_scatter_figure(durations):
+    """
+    Scatter durasi vs tanggal pemesanan. Di bawah config.SCATTER_POINT_BUDGET digambar dengan
+    WebGL (Scattergl); di atasnya diganti heatmap densitas 2D agar payload tetap terbatas.
+    """
+    title = 'Durasi Pengiriman terhadap Waktu Pemesanan'
+    labels = dict(xaxis_title='Tanggal Pemesanan', yaxis_title='Durasi Pengiriman (hari)')
+    if len(durations) <= config.SCATTER_POINT_BUDGET:
+        fig_scatter = go.Figure(go.Scattergl(
+            x=durations['order_purchase_timestamp'],
+            y=durations['delivery_duration_days'],
+            mode='markers',
+            opacity=0.3, # Sesuaikan alpha
+            marker=dict(color='teal', size=5, line=dict(width=1, color='White')) # Warna teal, ukuran dan garis tepi
+        ))
+        fig_scatter.update_layout(title=title, **labels)
+        return fig_scatter, 'points'
+
+    purchase_ns = durations['order_purchase_timestamp'].to_numpy().astype('datetime64[ns]').astype('int64')
+    return delivery_density_figure(purchase_ns, durations['delivery_duration_days'].to_numpy()), 'density'
+
+
+def delivery_density_figure(purchase_ns, duration_days, weights=None):
+    """
+    Heatmap densitas 2D (tanggal pemesanan x durasi). `weights` diisi jika setiap titik
+    mewakili beberapa pesanan (mis. hitungan teragregasi dari backend streaming).
+    """
+    title = 'Durasi Pengiriman terhadap Waktu Pemesanan'
+    labels = dict(xaxis_title='Tanggal Pemesanan', yaxis_title='Durasi Pengiriman (hari)')
+    # Bin durasi per hari bila rentangnya kecil, selain itu bagi rata ke DENSITY_GRID[1] bin
+    duration_bins = min(int(duration_days.max()) + 1, DENSITY_GRID[1])
+    counts, x_edges, y_edges = np.histogram2d(
+        purchase_ns, duration_days,
+        bins=(DENSITY_GRID[0], duration_bins),
+        range=((purchase_ns.min(), purchase_ns.max() + 1), (0, duration_days.max() + 1)),
+        weights=weights
+    )
+    x_centers = ((x_edges[:-1] + x_edges[1:]) / 2).astype('int64').astype('datetime64[ns]')
+    fig_scatter = go.Figure(go.Heatmap(
+        x=x_centers,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts.T > 0, counts.T, np.nan), # Sel kosong dibuat transparan
+        colorscale='Teal',
+        colorbar=dict(title='Jumlah Pesanan'),
+        hovertemplate='Tanggal: %{x|%Y-%m-%d}<br>Durasi: %{y:.0f} hari<br>Jumlah Pesanan: %{z}<extra></extra>'
+    ))
+    fig_scatter.update_layout(title=f'{title} (Densitas)', **labels)
+    return fig_scatter
+
+
+@profiled('figure.delivery_percentile_trend')
+def delivery_percentile_trend_figure(trend, quantile_columns):
+    """Garis persentil durasi per bulan pemesanan (hasil sketches.delivery_percentile_trend)."""
+    fig_trend = go.Figure([
+        go.Scatter(
+            x=trend['month'], y=trend[column], mode='lines+markers', name=column.upper(),
+            customdata=trend['orders'],
+            hovertemplate=f'{column.upper()}: %{{y:.0f}} hari<br>Jumlah Pesanan: %{{customdata:,}}<extra></extra>'
+        )
+        for column in quantile_columns
+    ])
+    fig_trend.update_layout(
+        title='Persentil Durasi Pengiriman per Bulan Pemesanan',
+        xaxis_title='Bulan Pemesanan',
+        yaxis_title='Durasi Pengiriman (hari)',
+        hovermode='x unified'
+    )
+    return fig_trend
+
+
+@profiled('figure.late_delivery_by_state')
+def late_delivery_by_state_figure(by_state, state_column, state_label):
+    """Batang tingkat keterlambatan per negara bagian (hasil sketches.late_delivery_by_state)."""
+    fig_late = go.Figure(go.Bar(
+        x=by_state['late_rate'] * 100,
+        y=by_state[state_column],
+        orientation='h',
+        marker=dict(color=by_state['late_rate'] * 100, colorscale='Reds'),
+        customdata=np.column_stack([by_state['orders'], by_state['late_orders'], by_state['p90']]),
+        hovertemplate=(
+            '%{y}: %{x:.1f}% terlambat<br>Pesanan: %{customdata[0]:,}<br>Terlambat: %{customdata[1]:,}'
+            '<br>P90 Durasi: %{customdata[2]:.0f} hari<extra></extra>'
+        )
+    ))
+    fig_late.update_layout(
+        title=f'Tingkat Keterlambatan Pengiriman per {state_label}',
+        xaxis_title='Pesanan Terlambat (%)',
+        yaxis_title=state_label,
+        height=max(400, 22 * len(by_state))
+    )
+    fig_late.update_yaxes(categoryorder='total ascending')
+    return fig_late
+
+
+@profiled('figure.distance_bands')
+def distance_band_figure(bands):
+    """Batang rata-rata durasi per pita jarak + garis tingkat keterlambatan (hasil geo.distance_band_summary)."""
+    fig_bands = go.Figure([
+        go.Bar(
+            x=bands['distance_label'],
+            y=bands['mean_days'],
+            name='Rata-rata Durasi (hari)',
+            marker=dict(color='skyblue', line=dict(color='black', width=1)),
+            customdata=np.column_stack([bands['shipments'], bands['mean_distance_km']]),
+            hovertemplate=(
+                '%{x}: %{y:.1f} hari<br>Pengiriman: %{customdata[0]:,}'
+                '<br>Rata-rata Jarak: %{customdata[1]:.0f} km<extra></extra>'
+            )
+        ),
+        go.Scatter(
+            x=bands['distance_label'],
+            y=bands['late_rate'] * 100,
+            name='Terlambat (%)',
+            yaxis='y2',
+            mode='lines+markers',
+            line=dict(color='crimson'),
+            hovertemplate='%{x}: %{y:.1f}% terlambat<extra></extra>'
+        ),
+    ])
+    fig_bands.update_layout(
+        title='Durasi & Keterlambatan Pengiriman per Jarak Penjual-Pelanggan',
+        xaxis_title='Jarak Penjual-Pelanggan',
+        yaxis=dict(title='Rata-rata Durasi (hari)'),
+        yaxis2=dict(title='Pengiriman Terlambat (%)', overlaying='y', side='right', rangemode='tozero'),
+        legend=dict(orientation='h', y=1.1)
+    )
+    return fig_bands
+
+
+@profiled('figure.state_pairs')
+def state_pair_heatmap_figure(pairs, value_column, value_label):
+    """Heatmap negara bagian penjual x pelanggan untuk satu metrik rute (hasil geo.state_pair_summary)."""
+    grid = pairs.pivot(index='seller_state', columns='customer_state', values=value_column).sort_index().sort_index(axis=1)
+    shipments = pairs.pivot(index='seller_state', columns='customer_state', values='shipments').reindex_like(grid)
+    scale = 100 if value_column == 'late_rate' else 1
+    fig_pairs = go.Figure(go.Heatmap(
+        z=grid.to_numpy() * scale,
+        x=grid.columns,
+        y=grid.index,
+        customdata=shipments.to_numpy(),
+        colorscale='Reds',
+        colorbar=dict(title=value_label),
+        hovertemplate=(
+            'Penjual %{y} -> Pelanggan %{x}<br>' + value_label + ': %{z:.1f}'
+            '<br>Pengiriman: %{customdata:,}<extra></extra>'
+        )
+    ))
+    fig_pairs.update_layout(
+        title=f'{value_label} per Rute Negara Bagian',
+        xaxis_title='Negara Bagian Pelanggan',
+        yaxis_title='Negara Bagian Penjual',
+        height=max(400, 22 * len(grid))
+    )
+    return fig_pairs
+
+
+@profiled('figure.rfm_treemap')
+def rfm_treemap_figure(segments, states):
+    """
+    Treemap segmen RFM (luas = jumlah pelanggan, warna = rata-rata pembayaran). Klik sebuah
+    segmen untuk drill-down ke negara bagian pelanggannya (hasil rfm.segment_summary & segment_states).
+    """
+    fig_rfm = go.Figure(go.Treemap(
+        ids=list(segments['segment']) + list(states['segment'] + '/' + states['customer_state']),
+        labels=list(segments['segment']) + list(states['customer_state']),
+        parents=[''] * len(segments) + list(states['segment']),
+        values=np.concatenate([segments['customers'], states['customers']]),
+        branchvalues='total',
+        marker=dict(
+            colors=np.concatenate([segments['monetary_mean'], states['monetary_mean']]),
+            colorscale='Blues',
+            colorbar=dict(title='Rata-rata<br>Pembayaran (R$)')
+        ),
+        hovertemplate=(
+            '<b>%{label}</b><br>Pelanggan: %{value:,}<br>Porsi: %{percentRoot:.1%}'
+            '<br>Rata-rata Pembayaran: R$ %{color:,.2f}<extra></extra>'
+        ),
+        texttemplate='<b>%{label}</b><br>%{value:,} pelanggan<br>%{percentRoot:.1%}'
+    ))
+    fig_rfm.update_layout(title='Segmen Pelanggan RFM', height=600, margin=dict(t=50, l=10, r=10, b=10))
+    return fig_rfm
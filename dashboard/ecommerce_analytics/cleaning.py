@@ -0,0 +1,67 @@
+# cleaning.py
+# Pembersihan dan pra-pemrosesan data
+
+import pandas as pd
+
+from .telemetry import profiled
+
+
+@profiled('clean.orders')
+def clean_orders_data(orders_df):
+    """
+    Memastikan kolom tanggal pada orders_df bertipe datetime. Mengembalikan DataFrame baru;
+    input tidak diubah (bisa berupa objek yang dibagikan cache). Tabel dari read_table
+    sudah berisi datetime (diparse saat membaca CSV), jadi hanya kolom teks yang dikonversi.
+    """
+    date_columns_orders = [
+        'order_purchase_timestamp',
+        'order_approved_at',
+        'order_delivered_carrier_date',
+        'order_delivered_customer_date',
+        'order_estimated_delivery_date'
+    ]
+    return orders_df.assign(**{
+        col: pd.to_datetime(orders_df[col], errors='coerce')
+        for col in date_columns_orders
+        if col in orders_df.columns and not pd.api.types.is_datetime64_any_dtype(orders_df[col])
+    })
+
+
+@profiled('clean.products')
+def prepare_products_data(products_df, product_category_name_translation_df):
+    """
+    Mengisi nilai hilang pada produk dan menambahkan nama kategori untuk tampilan.
+    Input tidak diubah; hasilnya DataFrame baru.
+    """
+    # products_df: Mengisi nilai hilang pada kolom numerik & kategori
+    fill_values = {'product_category_name': 'unknown_category'}
+    numerical_product_cols_to_fill = [
+        'product_name_lenght', 'product_description_lenght', 'product_photos_qty',
+        'product_weight_g', 'product_length_cm', 'product_height_cm', 'product_width_cm'
+    ]
+    for col in numerical_product_cols_to_fill:
+        if col in products_df.columns and products_df[col].isnull().any():
+            fill_values[col] = products_df[col].median()
+    # fillna(inplace=True) pada kolom hasil products_df[col] tidak berlaku di pandas copy-on-write
+    products_df = products_df.fillna(fill_values)
+
+    # Gabungkan produk dengan terjemahan kategori
+    products_df_translated = pd.merge(
+        products_df,
+        product_category_name_translation_df,
+        on='product_category_name',
+        how='left'
+    )
+    # Gunakan nama kategori bahasa Inggris untuk tampilan, jika tidak ada, pakai yang asli
+    products_df_translated['product_category_name_display'] = products_df_translated['product_category_name_english'].fillna(
+        products_df_translated['product_category_name']
+    )
+    return products_df_translated
+
+
+def clean_and_prepare_data(orders_df, products_df, product_category_name_translation_df):
+    """
+    Melakukan pembersihan data dan penggabungan kategori produk
+    untuk analisis.
+    """
+    return clean_orders_data(orders_df), prepare_products_data(products_df, product_category_name_translation_df)
@@ -0,0 +1,68 @@
+# config.py
+# Lokasi data dan opsi paket ecommerce_analytics (bisa di-override lewat environment)
+
+import os
+from pathlib import Path
+
+# Root repositori (dashboard/ecommerce_analytics/config.py -> dua level ke atas)
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+# Folder datasets CSV sumber
+DATASET_DIR = Path(os.environ.get('ECOMMERCE_DATASET_DIR', ROOT_DIR / 'datasets'))
+
+# Folder snapshot hasil konversi CSV -> Arrow (dibuat otomatis, tidak ikut di-commit)
+SNAPSHOT_DIR = Path(os.environ.get('ECOMMERCE_SNAPSHOT_DIR', ROOT_DIR / '.snapshots'))
+
+# Set ECOMMERCE_SNAPSHOTS=0 untuk membaca langsung dari CSV (dengan usecols)
+USE_SNAPSHOTS = os.environ.get('ECOMMERCE_SNAPSHOTS', '1') != '0'
+
+# Jumlah thread untuk memuat/parse beberapa tabel sekaligus (pyarrow melepas GIL saat parse CSV);
+# default: jumlah core, maksimal 9 (jumlah tabel)
+INGEST_WORKERS = int(os.environ.get('ECOMMERCE_INGEST_WORKERS', '0')) or min(9, os.cpu_count() or 1)
+
+# Folder hasil laporan batch (python -m ecommerce_analytics reports)
+REPORTS_DIR = Path(os.environ.get('ECOMMERCE_REPORTS_DIR', ROOT_DIR / 'reports'))
+
+# Folder dataset sintetis & hasil benchmark (python -m ecommerce_analytics bench)
+BENCH_DIR = Path(os.environ.get('ECOMMERCE_BENCH_DIR', ROOT_DIR / '.bench'))
+
+# Telemetri: ECOMMERCE_TRACE_MEMORY=1 mengukur memori puncak per tahap (tracemalloc, ada overhead),
+# ECOMMERCE_TELEMETRY_LOG=1 menulis setiap event sebagai satu baris JSON ke stderr,
+# ECOMMERCE_METRICS_PORT=9108 membuka endpoint teks gaya Prometheus di http://<host>:<port>/metrics,
+# ECOMMERCE_DIAGNOSTICS=1 menampilkan panel diagnostik di sidebar dashboard
+TELEMETRY_TRACE_MEMORY = os.environ.get('ECOMMERCE_TRACE_MEMORY', '0') == '1'
+TELEMETRY_LOG_JSON = os.environ.get('ECOMMERCE_TELEMETRY_LOG', '0') == '1'
+METRICS_PORT = int(os.environ.get('ECOMMERCE_METRICS_PORT', '0') or 0)
+METRICS_HOST = os.environ.get('ECOMMERCE_METRICS_HOST', '127.0.0.1')
+SHOW_DIAGNOSTICS = os.environ.get('ECOMMERCE_DIAGNOSTICS', '0') == '1'
+
+# Backend eksekusi: 'pandas' (semua tabel dimuat ke memori) atau 'streaming' (CSV dibaca per potongan,
+# join dilakukan per partisi hash order_id di disk, hanya agregat yang disimpan di memori)
+BACKENDS = ('pandas', 'streaming')
+BACKEND = os.environ.get('ECOMMERCE_BACKEND', 'pandas')
+if BACKEND not in BACKENDS:
+    raise ValueError(f"ECOMMERCE_BACKEND harus salah satu dari {BACKENDS}, bukan {BACKEND!r}")
+# Jumlah baris per potongan CSV pada backend streaming
+STREAMING_CHUNK_ROWS = int(os.environ.get('ECOMMERCE_STREAMING_CHUNK_ROWS', '250000'))
+# Jumlah partisi hash untuk join; 0 = otomatis (kira-kira satu partisi per 128 MB CSV transaksi)
+STREAMING_PARTITIONS = int(os.environ.get('ECOMMERCE_STREAMING_PARTITIONS', '0'))
+STREAMING_PARTITION_BYTES = 128 * 2**20
+
+# Akurasi relatif sketsa kuantil durasi pengiriman (ecommerce_analytics.sketches): durasi di bawah
+# 1/akurasi hari disimpan persis per hari, di atasnya dalam bucket logaritmik dengan galat relatif <= akurasi
+SKETCH_ACCURACY = float(os.environ.get('ECOMMERCE_SKETCH_ACCURACY', '0.01'))
+if not 0 < SKETCH_ACCURACY < 1:
+    raise ValueError(f"ECOMMERCE_SKETCH_ACCURACY harus di antara 0 dan 1, bukan {SKETCH_ACCURACY!r}")
+
+# Batas jumlah titik scatter durasi pengiriman yang dikirim ke browser (ecommerce_analytics.charts);
+# di atas batas ini scatter diganti heatmap densitas
+SCATTER_POINT_BUDGET = int(os.environ.get('ECOMMERCE_SCATTER_POINT_BUDGET', '20000'))
+
+# Jumlah pasangan penjual-pelanggan per potongan saat menghitung jarak haversine (ecommerce_analytics.geo);
+# membatasi memori sementara sehingga jutaan baris pesanan tetap diproses dengan memori tetap
+GEO_CHUNK_ROWS = int(os.environ.get('ECOMMERCE_GEO_CHUNK_ROWS', '1000000'))
+
+# Cache sidik jari per proses (ecommerce_analytics.cache): umur maksimum entri dalam detik
+# (0 = tanpa batas, entri tetap dibuang jika file sumber berubah) dan jumlah entri maksimum per fungsi
+CACHE_TTL_SECONDS = float(os.environ.get('ECOMMERCE_CACHE_TTL', '0'))
+CACHE_MAX_ENTRIES = int(os.environ.get('ECOMMERCE_CACHE_MAX_ENTRIES', '32'))
@@ -0,0 +1,278 @@
+# facts.py
+# Tabel turunan yang dibangun sekali dan dipakai bersama semua analisis:
+# durasi pengiriman, tabel fakta baris pesanan, dan kubus pendapatan
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_and_prepare_data, clean_orders_data
+from .storage import load_tables, read_table
+from .telemetry import profiled
+
+# Tabel sumber untuk tabel fakta baris pesanan (dipakai bersama analisis pesanan bermasalah & pendapatan)
+ORDER_LINE_SOURCE_TABLES = {
+    'orders': ['order_id', 'order_status', 'order_purchase_timestamp'],
+    'order_items': ['order_id', 'order_item_id', 'product_id', 'seller_id', 'price', 'freight_value'],
+    'order_payments': ['order_id', 'payment_value'],
+    'products': ['product_id', 'product_category_name'],
+    'product_category_name_translation': ['product_category_name', 'product_category_name_english'],
+    'sellers': ['seller_id', 'seller_state'],
+}
+PROBLEM_ORDER_STATUSES = ['canceled', 'unavailable']
+
+# Tabel sumber untuk durasi pengiriman
+DELIVERY_SOURCE_TABLES = {
+    'orders': ['order_status', 'order_purchase_timestamp', 'order_delivered_customer_date'],
+}
+
+# Tabel sumber untuk jumlah pesanan bermasalah (termasuk pesanan tanpa item)
+PROBLEM_ORDER_SOURCE_TABLES = {
+    'orders': ['order_status', 'order_purchase_timestamp'],
+}
+
+
+@profiled('build.delivery_durations')
+def build_delivery_durations(orders_df, extra_columns=()):
+    """
+    Durasi pengiriman (hari) untuk setiap pesanan 'delivered' yang tanggalnya valid.
+    `extra_columns` dari orders_df ikut dibawa (mis. order_id untuk join ke tabel lain).
+    """
+    delivered = orders_df[
+        (orders_df['order_status'] == 'delivered') &
+        (orders_df['order_delivered_customer_date'].notna()) &
+        (orders_df['order_purchase_timestamp'].notna())
+    ]
+    durations = pd.DataFrame({
+        **{col: delivered[col] for col in extra_columns},
+        'order_purchase_timestamp': delivered['order_purchase_timestamp'],
+        'delivery_duration_days': (
+            delivered['order_delivered_customer_date'] - delivered['order_purchase_timestamp']
+        ).dt.days
+    })
+    # Hapus nilai negatif (jika ada, menunjukkan data salah)
+    durations = durations[durations['delivery_duration_days'] >= 0].reset_index(drop=True)
+    durations['year'] = durations['order_purchase_timestamp'].dt.year.astype('int16')
+    return durations
+
+
+def late_deliveries(durations):
+    """
+    Penanda pesanan terlambat: tiba pada hari setelah tanggal estimasi (estimasi berupa
+    tanggal tanpa jam). `durations` adalah hasil build_delivery_durations dengan kedua kolom tanggalnya.
+    """
+    return (
+        durations['order_delivered_customer_date'].dt.normalize() >
+        durations['order_estimated_delivery_date'].dt.normalize()
+    ).to_numpy()
+
+
+def load_delivery_durations(dataset_dir=None):
+    """Memuat orders lalu menghitung durasi pengiriman seluruh pesanan."""
+    orders_df = read_table('orders', DELIVERY_SOURCE_TABLES['orders'], dataset_dir)
+    return build_delivery_durations(clean_orders_data(orders_df))
+
+
+def shared_key_codes(left, right):
+    """
+    Kode integer bersama (0..n-1, -1 = tidak ada di `left`) untuk dua kolom kunci.
+    Kolom ID berkamus bersama langsung memakai kode kategorinya; kolom hex biasa
+    (backend streaming) di-factorize terlebih dahulu.
+    """
+    if isinstance(left.dtype, pd.CategoricalDtype) and left.dtype == right.dtype:
+        return left.cat.codes.to_numpy(), right.cat.codes.to_numpy(), len(left.dtype.categories)
+    left_codes, uniques = pd.factorize(left)
+    return left_codes, pd.Index(uniques).get_indexer(right), len(uniques)
+
+
+@profiled('merge.order_lines')
+def build_order_lines(orders_df, order_items_df, order_payments_df, products_df_cleaned, sellers_df):
+    """
+    Membangun tabel fakta: satu baris per item pesanan, lengkap dengan tahun/kuartal,
+    status, penjual (dan negara bagiannya), kategori tampilan, dan nilai pembayaran
+    yang dialokasikan.
+
+    Total pembayaran per pesanan dibagi ke item secara proporsional terhadap
+    (price + freight_value), sehingga jumlah payment_value per pesanan tidak
+    terhitung ganda seperti pada merge orders x payments x items.
+    """
+    order_lines = pd.merge(
+        order_items_df,
+        orders_df[['order_id', 'order_status', 'order_purchase_timestamp']],
+        on='order_id',
+        how='inner'
+    )
+    order_lines = pd.merge(
+        order_lines,
+        products_df_cleaned[['product_id', 'product_category_name_display']],
+        on='product_id',
+        how='left'
+    )
+    order_lines = pd.merge(order_lines, sellers_df[['seller_id', 'seller_state']], on='seller_id', how='left')
+
+    # Alokasi pembayaran: bobot item = nilai item / total nilai item dalam pesanan.
+    # Total per pesanan dihitung dengan np.bincount atas kode integer order_id
+    line_codes, payment_codes, n_orders = shared_key_codes(order_lines['order_id'], order_payments_df['order_id'])
+    line_value = (order_lines['price'] + order_lines['freight_value']).to_numpy()
+    order_value = np.bincount(line_codes, weights=line_value, minlength=n_orders)[line_codes]
+    lines_per_order = np.bincount(line_codes, minlength=n_orders)[line_codes]
+    share = np.where(order_value > 0, line_value / np.where(order_value > 0, order_value, 1), 1 / lines_per_order)
+    has_order = payment_codes >= 0
+    payment_per_order = np.bincount(
+        payment_codes[has_order], weights=order_payments_df['payment_value'].to_numpy()[has_order], minlength=n_orders
+    )
+    order_lines['payment_value'] = payment_per_order[line_codes] * share
+
+    order_lines['year'] = order_lines['order_purchase_timestamp'].dt.year.astype('Int16')
+    order_lines['quarter'] = order_lines['order_purchase_timestamp'].dt.quarter.astype('Int8')
+    order_lines['product_category_name_display'] = order_lines['product_category_name_display'].astype('category')
+    return order_lines
+
+
+def load_order_lines(dataset_dir=None):
+    """
+    Memuat tabel sumber (paralel) lalu membangun tabel fakta baris pesanan. Kolom ID dimuat
+    sebagai kategori berkamus bersama, jadi semua join & groupby memakai kode integer.
+    """
+    tables = load_tables(ORDER_LINE_SOURCE_TABLES, dataset_dir, encode_ids=True)
+    orders_df_cleaned, products_df_cleaned = clean_and_prepare_data(
+        tables['orders'], tables['products'], tables['product_category_name_translation']
+    )
+    return build_order_lines(
+        orders_df_cleaned, tables['order_items'], tables['order_payments'], products_df_cleaned, tables['sellers']
+    )
+
+
+# Granularitas waktu yang didukung kubus pendapatan: label tampilan -> kolom kode periode
+REVENUE_GRANULARITIES = {
+    'Harian': 'day',
+    'Mingguan': 'week',
+    'Bulanan': 'month',
+    'Kuartalan': 'quarter',
+    'Tahunan': 'year',
+}
+
+
+@profiled('aggregate.revenue_cube')
+def build_revenue_cube(order_lines):
+    """
+    Kubus pendapatan pra-agregasi pada granularitas harian:
+    (tanggal, kategori produk, negara bagian penjual) -> total pendapatan & jumlah baris.
+
+    Periode disimpan sebagai kode integer (hari/minggu/bulan/kuartal/tahun sejak 1970)
+    dan kubus diurutkan per hari, sehingga filter tanggal cukup dengan searchsorted
+    dan roll-up cukup dengan np.bincount.
+    """
+    order_lines = order_lines[order_lines['order_purchase_timestamp'].notna()]
+    order_day = order_lines['order_purchase_timestamp'].to_numpy().astype('datetime64[D]').astype('int32')
+    cube = order_lines.groupby(
+        [pd.Series(order_day, index=order_lines.index, name='day'), 'product_category_name_display', 'seller_state'],
+        observed=True
+    ).agg(payment_value=('payment_value', 'sum'), order_lines=('order_id', 'size')).reset_index()
+    return add_period_codes(cube)
+
+
+def add_period_codes(cube):
+    """Menambahkan kode minggu/bulan/kuartal/tahun dari kode hari pada kubus."""
+    days = cube['day'].to_numpy()
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype('int32')
+    # 1970-01-01 adalah hari Kamis; minggu dimulai hari Senin (hari ke -3)
+    cube['week'] = ((days + 3) // 7).astype('int32')
+    cube['month'] = months
+    cube['quarter'] = (months // 3).astype('int32')
+    cube['year'] = days.astype('datetime64[D]').astype('datetime64[Y]').astype('int32')
+    return cube
+
+
+@profiled('aggregate.merge_revenue_cubes')
+def merge_revenue_cubes(cubes):
+    """
+    Menggabungkan kubus parsial (mis. dari beberapa partisi data) menjadi satu kubus
+    yang sama dengan hasil build_revenue_cube pada seluruh data sekaligus.
+    """
+    cubes = [cube for cube in cubes if not cube.empty] or cubes[:1]
+    combined = pd.concat(
+        [cube[['day', 'product_category_name_display', 'seller_state', 'payment_value', 'order_lines']] for cube in cubes],
+        ignore_index=True
+    )
+    # Kategori tiap partisi bisa berbeda; samakan dulu sebelum group-by
+    combined['product_category_name_display'] = combined['product_category_name_display'].astype(str).astype('category')
+    cube = combined.groupby(
+        ['day', 'product_category_name_display', 'seller_state'], observed=True
+    ).agg(payment_value=('payment_value', 'sum'), order_lines=('order_lines', 'sum')).reset_index()
+    return add_period_codes(cube)
+
+
+def period_start(codes, granularity):
+    """Mengubah kode periode integer menjadi tanggal awal periode."""
+    unit = REVENUE_GRANULARITIES[granularity]
+    if unit == 'day':
+        starts = codes.astype('datetime64[D]')
+    elif unit == 'week':
+        starts = (codes * 7 - 3).astype('datetime64[D]')
+    elif unit == 'month':
+        starts = codes.astype('datetime64[M]')
+    elif unit == 'quarter':
+        starts = (codes * 3).astype('datetime64[M]')
+    else:
+        starts = codes.astype('datetime64[Y]')
+    return pd.Series(starts.astype('datetime64[ns]'))
+
+
+def cube_date_bounds(cube):
+    """Tanggal pemesanan pertama dan terakhir yang tercakup kubus."""
+    return (
+        pd.Timestamp(np.datetime64(int(cube['day'].iloc[0]), 'D')).date(),
+        pd.Timestamp(np.datetime64(int(cube['day'].iloc[-1]), 'D')).date()
+    )
+
+
+@profiled('aggregate.revenue_rollup')
+def rollup_revenue(cube, granularity, start_date, end_date, seller_states=None):
+    """Menjumlahkan kubus ke granularitas & rentang tanggal tertentu per kategori produk."""
+    days = cube['day'].to_numpy()
+    lo = days.searchsorted(np.datetime64(start_date, 'D').astype('int64'), side='left')
+    hi = days.searchsorted(np.datetime64(end_date, 'D').astype('int64'), side='right')
+    cube = cube.iloc[lo:hi]
+    if seller_states:
+        cube = cube[cube['seller_state'].isin(seller_states)]
+
+    categories = cube['product_category_name_display'].cat.categories
+    if cube.empty:
+        return pd.DataFrame({
+            'period': pd.Series(dtype='datetime64[ns]'),
+            'product_category_name_display': pd.Categorical([], categories=categories),
+            'payment_value': pd.Series(dtype='float64'),
+        })
+    periods = cube[REVENUE_GRANULARITIES[granularity]].to_numpy().astype('int64')
+    first_period = periods.min()
+    n_categories = len(categories)
+    key = (periods - first_period) * n_categories + cube['product_category_name_display'].cat.codes.to_numpy()
+    size = int(key.max()) + 1
+    revenue = np.bincount(key, weights=cube['payment_value'].to_numpy(), minlength=size)
+    present = np.flatnonzero(np.bincount(key, minlength=size))
+    return pd.DataFrame({
+        'period': period_start(first_period + present // n_categories, granularity),
+        'product_category_name_display': pd.Categorical.from_codes(present % n_categories, categories=categories),
+        'payment_value': revenue[present],
+    })
+
+
+def top_n_per_period(revenue, n):
+    """Baris top-N kategori per periode, memakai rank tervektorisasi (tanpa groupby.apply)."""
+    rank = revenue.groupby('period')['payment_value'].rank(method='first', ascending=False)
+    return revenue[rank <= n]
+
+
+def consistent_top_n_categories(revenue, n):
+    """Kategori yang masuk top-N di setiap periode dalam data `revenue`."""
+    top = top_n_per_period(revenue, n)
+    appearances = top.groupby('product_category_name_display', observed=True)['period'].nunique()
+    return appearances[appearances == revenue['period'].nunique()].index.tolist()
+
+
+def format_period_labels(periods, granularity):
+    """Label periode untuk sumbu grafik, mis. '2017-Q1' untuk granularitas kuartalan."""
+    if granularity == 'Kuartalan':
+        return periods.dt.year.astype(str) + '-Q' + periods.dt.quarter.astype(str)
+    formats = {'Harian': '%Y-%m-%d', 'Mingguan': '%Y-%m-%d', 'Bulanan': '%Y-%m', 'Tahunan': '%Y'}
+    return periods.dt.strftime(formats[granularity])
@@ -0,0 +1,212 @@
+# geo.py
+# Analisis geospasial pengiriman. geolocation_dataset.csv (banyak baris duplikat per prefiks kode pos)
+# diringkas sekali menjadi indeks centroid per prefiks berupa array NumPy terurut; jarak haversine
+# penjual -> pelanggan dihitung tervektorisasi per potongan, lalu diringkas menjadi agregat aditif
+# per (tahun, negara bagian penjual, negara bagian pelanggan, pita jarak).
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .cleaning import clean_orders_data
+from .facts import build_delivery_durations, late_deliveries
+from .sketches import state_labels
+from .storage import load_tables, read_table
+from .telemetry import profiled
+
+# Tabel sumber untuk analisis jarak & rute pengiriman
+GEO_SOURCE_TABLES = {
+    'orders': [
+        'order_id', 'customer_id', 'order_status', 'order_purchase_timestamp',
+        'order_delivered_customer_date', 'order_estimated_delivery_date'
+    ],
+    'order_items': ['order_id', 'seller_id'],
+    'customers': ['customer_id', 'customer_zip_code_prefix', 'customer_state'],
+    'sellers': ['seller_id', 'seller_zip_code_prefix', 'seller_state'],
+    'geolocation': ['geolocation_zip_code_prefix', 'geolocation_lat', 'geolocation_lng'],
+}
+GEO_KEYS = ['year', 'seller_state', 'customer_state', 'distance_band']
+GEO_VALUES = ['shipments', 'late_shipments', 'located_shipments', 'duration_days_sum', 'distance_km_sum']
+
+EARTH_RADIUS_KM = 6371.0088
+# Batas bawah setiap pita jarak (km); pita terakhir terbuka ke atas
+DISTANCE_BANDS_KM = (0, 50, 100, 250, 500, 1000, 2000)
+# Pita untuk pengiriman yang prefiks kode pos penjual/pelanggannya tidak ada di geolocation
+UNKNOWN_BAND = -1
+# Kotak pembatas Brasil (lat, lng); koordinat di luar kotak ini dianggap salah input dan dibuang
+BRAZIL_BOUNDS = ((-34.0, 5.5), (-74.0, -34.5))
+
+
+def distance_band_labels():
+    """Label setiap pita jarak, mis. '100-250 km' dan '2000+ km'."""
+    edges = DISTANCE_BANDS_KM
+    return [f"{lo}-{hi} km" for lo, hi in zip(edges[:-1], edges[1:])] + [f"{edges[-1]}+ km"]
+
+
+@profiled('build.zip_centroids')
+def build_zip_centroids(geolocation_df):
+    """
+    Indeks centroid per prefiks kode pos: {'zip': int32 unik & terurut, 'lat', 'lng': float32},
+    rata-rata semua koordinat valid per prefiks (dihitung dengan np.bincount).
+    """
+    lat = geolocation_df['geolocation_lat'].to_numpy()
+    lng = geolocation_df['geolocation_lng'].to_numpy()
+    (lat_min, lat_max), (lng_min, lng_max) = BRAZIL_BOUNDS
+    valid = (lat >= lat_min) & (lat <= lat_max) & (lng >= lng_min) & (lng <= lng_max)
+    zips, codes = np.unique(geolocation_df['geolocation_zip_code_prefix'].to_numpy()[valid], return_inverse=True)
+    counts = np.bincount(codes, minlength=len(zips))
+    return {
+        'zip': zips.astype('int32'),
+        'lat': (np.bincount(codes, weights=lat[valid], minlength=len(zips)) / counts).astype('float32'),
+        'lng': (np.bincount(codes, weights=lng[valid], minlength=len(zips)) / counts).astype('float32'),
+    }
+
+
+def load_zip_centroids(dataset_dir=None):
+    """Memuat geolocation (hanya tiga kolom) lalu membangun indeks centroid."""
+    return build_zip_centroids(read_table('geolocation', GEO_SOURCE_TABLES['geolocation'], dataset_dir))
+
+
+def zip_coordinates(centroids, zip_prefixes):
+    """(lat, lng) centroid untuk setiap prefiks (searchsorted); NaN jika prefiks tidak dikenal."""
+    prefixes = np.asarray(zip_prefixes, dtype='float64')
+    prefixes = np.where(np.isnan(prefixes), -1, prefixes).astype('int64')
+    zips = centroids['zip']
+    if not len(zips):
+        missing = np.full(len(prefixes), np.nan)
+        return missing, missing
+    position = np.minimum(zips.searchsorted(prefixes), len(zips) - 1)
+    found = zips[position] == prefixes
+    return (
+        np.where(found, centroids['lat'][position], np.nan),
+        np.where(found, centroids['lng'][position], np.nan),
+    )
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Jarak lingkaran besar (km) antara dua array koordinat berderajat."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(value, dtype='float64')) for value in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+@profiled('geo.pair_distances')
+def pair_distances_km(centroids, from_zips, to_zips, chunk_rows=None):
+    """
+    Jarak (km, float32) antara pasangan prefiks kode pos, mis. penjual & pelanggan setiap baris
+    pesanan. Diproses per potongan `chunk_rows` (default config.GEO_CHUNK_ROWS) sehingga memori
+    sementara tetap konstan berapa pun jumlah barisnya. NaN jika salah satu prefiks tidak dikenal.
+    """
+    chunk_rows = chunk_rows or config.GEO_CHUNK_ROWS
+    from_zips, to_zips = np.asarray(from_zips), np.asarray(to_zips)
+    distances = np.empty(len(from_zips), dtype='float32')
+    for start in range(0, len(from_zips), chunk_rows):
+        stop = start + chunk_rows
+        distances[start:stop] = haversine_km(
+            *zip_coordinates(centroids, from_zips[start:stop]), *zip_coordinates(centroids, to_zips[start:stop])
+        )
+    return distances
+
+
+def distance_bands(distances):
+    """Nomor pita jarak untuk setiap jarak (UNKNOWN_BAND untuk NaN)."""
+    bands = np.searchsorted(np.asarray(DISTANCE_BANDS_KM, dtype='float64'), distances, side='right') - 1
+    return np.where(np.isnan(distances), UNKNOWN_BAND, bands).astype('int8')
+
+
+@profiled('build.delivery_geo')
+def build_delivery_geo(orders_df, items_df, customers_df, sellers_df, centroids):
+    """
+    Agregat pengiriman 'delivered' per (tahun, negara bagian penjual, negara bagian pelanggan,
+    pita jarak): jumlah pengiriman, yang terlambat, yang lokasinya diketahui, total durasi
+    (hari), dan total jarak (km). Satu pengiriman = satu pasangan (pesanan, penjual), jadi
+    pesanan berisi beberapa item dari penjual yang sama hanya dihitung sekali.
+    Input harus memuat semua item dari pesanan yang sama (seluruh data, atau satu partisi hash).
+    """
+    durations = build_delivery_durations(orders_df, extra_columns=(
+        'order_id', 'customer_id', 'order_delivered_customer_date', 'order_estimated_delivery_date'
+    ))
+    shipments = pd.merge(items_df[['order_id', 'seller_id']].drop_duplicates(), durations, on='order_id', how='inner')
+    shipments = pd.merge(
+        shipments, customers_df[['customer_id', 'customer_zip_code_prefix', 'customer_state']], on='customer_id', how='left'
+    )
+    shipments = pd.merge(
+        shipments, sellers_df[['seller_id', 'seller_zip_code_prefix', 'seller_state']], on='seller_id', how='left'
+    )
+
+    distances = pair_distances_km(
+        centroids, shipments['seller_zip_code_prefix'].to_numpy(), shipments['customer_zip_code_prefix'].to_numpy()
+    )
+    located = ~np.isnan(distances)
+    geo_rows = pd.DataFrame({
+        'year': shipments['year'].to_numpy(),
+        'seller_state': state_labels(shipments['seller_state']),
+        'customer_state': state_labels(shipments['customer_state']),
+        'distance_band': distance_bands(distances),
+        'shipments': np.ones(len(shipments), dtype='int64'),
+        'late_shipments': late_deliveries(shipments).astype('int64'),
+        'located_shipments': located.astype('int64'),
+        'duration_days_sum': shipments['delivery_duration_days'].to_numpy().astype('int64'),
+        'distance_km_sum': np.where(located, distances, 0).astype('float64'),
+    })
+    return geo_rows.groupby(GEO_KEYS, observed=True)[GEO_VALUES].sum().reset_index()
+
+
+def load_delivery_geo(dataset_dir=None):
+    """Memuat tabel sumber (paralel, ID berkamus bersama) lalu membangun agregat jarak & rute."""
+    tables = load_tables(GEO_SOURCE_TABLES, dataset_dir, encode_ids=True)
+    return build_delivery_geo(
+        clean_orders_data(tables['orders']), tables['order_items'], tables['customers'], tables['sellers'],
+        build_zip_centroids(tables['geolocation'])
+    )
+
+
+def geo_metrics(totals):
+    """Menambahkan rata-rata durasi, tingkat keterlambatan, dan rata-rata jarak pada agregat yang sudah dijumlahkan."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return totals.assign(
+            mean_days=totals['duration_days_sum'] / totals['shipments'],
+            late_rate=totals['late_shipments'] / totals['shipments'],
+            mean_distance_km=totals['distance_km_sum'] / totals['located_shipments'],
+        ).drop(columns=['duration_days_sum', 'distance_km_sum'])
+
+
+@profiled('analysis.delivery_geo_totals')
+def delivery_geo_totals(geo, years):
+    """Ringkasan seluruh pengiriman pada tahun tertentu (None jika tidak ada)."""
+    selected = geo[geo['year'].isin(years)]
+    if selected.empty:
+        return None
+    totals = geo_metrics(selected[GEO_VALUES].sum().to_frame().T).iloc[0]
+    return {
+        'years': sorted(int(year) for year in years),
+        'shipments': int(totals['shipments']),
+        'located_rate': float(totals['located_shipments'] / totals['shipments']),
+        'mean_days': float(totals['mean_days']),
+        'late_rate': float(totals['late_rate']),
+        'mean_distance_km': float(totals['mean_distance_km']),
+    }
+
+
+@profiled('analysis.distance_bands')
+def distance_band_summary(geo, years):
+    """Durasi, keterlambatan, dan jarak rata-rata per pita jarak (hanya pengiriman yang lokasinya diketahui)."""
+    selected = geo[geo['year'].isin(years) & (geo['distance_band'] != UNKNOWN_BAND)]
+    totals = selected.groupby('distance_band')[GEO_VALUES].sum().reset_index()
+    labels = np.asarray(distance_band_labels(), dtype=object)
+    return geo_metrics(totals).assign(distance_label=labels[totals['distance_band'].to_numpy().astype('int64')])
+
+
+@profiled('analysis.state_pairs')
+def state_pair_summary(geo, years, min_shipments=1):
+    """
+    Durasi, keterlambatan, dan jarak rata-rata per rute (negara bagian penjual -> pelanggan)
+    dengan minimal `min_shipments` pengiriman, diurutkan dari yang paling sering terlambat.
+    """
+    selected = geo[geo['year'].isin(years)]
+    totals = selected.groupby(['seller_state', 'customer_state'], observed=True)[GEO_VALUES].sum().reset_index()
+    totals = totals[totals['shipments'] >= min_shipments]
+    pairs = geo_metrics(totals).astype({'seller_state': str, 'customer_state': str})
+    return pairs.sort_values(
+        ['late_rate', 'shipments', 'seller_state', 'customer_state'], ascending=[False, False, True, True], ignore_index=True
+    )
@@ -0,0 +1,201 @@
+# parity.py
+# Pemeriksa kesetaraan hasil backend pandas (semua tabel di memori) dan backend streaming (out-of-core)
+# untuk ketiga analisis: `python -m ecommerce_analytics parity --dataset-dir ...`
+
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .analyses import category_revenue, delivery_stats, problem_orders
+from .cleaning import clean_orders_data
+from .facts import PROBLEM_ORDER_SOURCE_TABLES, REVENUE_GRANULARITIES, build_revenue_cube, load_delivery_durations, load_order_lines
+from .geo import delivery_geo_totals, distance_band_summary, load_delivery_geo, state_pair_summary
+from .rates import RATE_ENTITIES, build_rate_index, daily_entity_counts, daily_order_counts, problem_rates, range_totals
+from .rfm import build_rfm_index, load_customer_days, rfm_scores, segment_summary, segment_states
+from .sketches import delivery_percentile_trend, delivery_stats_from_sketches, late_delivery_by_state, load_delivery_sketches
+from .storage import read_table
+from .streaming import (
+    DAILY_ENTITY_AGGREGATES,
+    compute_streaming_aggregates,
+    delivery_stats_from_counts,
+    problem_orders_from_aggregates,
+)
+
+# Kombinasi yang diperiksa secara default
+PARITY_YEAR_SELECTIONS = [(2016,), (2017,), (2018,), (2017, 2018), (2016, 2017, 2018)]
+PARITY_SELLER_STATES = [None, ['SP'], ['RJ', 'MG']]
+PARITY_TOP_N = (1, 5)
+# Ambang volume & urutan untuk tingkat pesanan bermasalah
+PARITY_MIN_ORDERS = (1, 20)
+PARITY_RATE_SORTS = ('rate', 'count')
+# Filter negara bagian (pelanggan, penjual) untuk sketsa durasi pengiriman
+PARITY_SKETCH_STATES = [(None, None), (['SP'], None), (None, ['SP']), (['RJ', 'MG'], ['SP', 'PR'])]
+# Akurasi sketsa kasar (batas linear 10 hari) agar durasi nyata jatuh di bucket logaritmik
+PARITY_COARSE_SKETCH_ACCURACY = 0.1
+# Toleransi relatif untuk jumlah float (urutan penjumlahan per partisi berbeda)
+PARITY_RTOL = 1e-9
+
+
+def parity_cases(year_selections=PARITY_YEAR_SELECTIONS):
+    """Daftar kasus (jenis analisis, parameter) yang dibandingkan."""
+    cases = []
+    for years in year_selections:
+        cases.append(('delivery_stats', {'years': years}))
+        cases.append(('problem_orders', {'years': years}))
+        for min_orders in PARITY_MIN_ORDERS:
+            for sort_by in PARITY_RATE_SORTS:
+                cases.append(('problem_rates', {'years': years, 'min_orders': min_orders, 'sort_by': sort_by}))
+        cases.append(('rfm', {'years': years}))
+        for min_shipments in PARITY_MIN_ORDERS:
+            cases.append(('delivery_geo', {'years': years, 'min_shipments': min_shipments}))
+        for accuracy in (None, PARITY_COARSE_SKETCH_ACCURACY):
+            cases.append(('delivery_extremes', {'years': years, 'accuracy': accuracy}))
+        for customer_states, seller_states in PARITY_SKETCH_STATES:
+            cases.append(('delivery_sketches', {
+                'years': years, 'customer_states': customer_states, 'seller_states': seller_states,
+            }))
+        for granularity in REVENUE_GRANULARITIES:
+            for top_n in PARITY_TOP_N:
+                for seller_states in PARITY_SELLER_STATES:
+                    cases.append(('category_revenue', {
+                        'years': years, 'granularity': granularity, 'top_n': top_n, 'seller_states': seller_states,
+                    }))
+    return cases
+
+
+def run_case(kind, params, sources, backend):
+    """Menjalankan satu kasus pada salah satu backend (`sources` berisi tabel/agregat yang sudah dimuat)."""
+    years = params['years']
+    if kind == 'delivery_stats':
+        if backend == 'streaming':
+            return delivery_stats_from_counts(sources['delivery_day_counts'], years)
+        return delivery_stats(sources['delivery_durations'], years)
+    if kind == 'delivery_sketches':
+        # Sketsa berbentuk sama di kedua backend; hanya sumbernya (memori vs partisi) yang berbeda
+        filters = {'customer_states': params['customer_states'], 'seller_states': params['seller_states']}
+        return {
+            'stats': delivery_stats_from_sketches(sources['delivery_sketches'], years, **filters),
+            'trend': delivery_percentile_trend(sources['delivery_sketches'], years, **filters),
+            'late_by_customer_state': late_delivery_by_state(sources['delivery_sketches'], years, **filters),
+        }
+    if kind == 'delivery_extremes':
+        # Jumlah, rata-rata, min & maks dari sketsa (backend pandas) harus persis sama dengan
+        # hitungan per durasi (backend streaming), juga di atas batas linear sketsa
+        if backend == 'streaming':
+            stats = delivery_stats_from_counts(sources['delivery_day_counts'], years)
+        else:
+            sketches = sources['coarse_delivery_sketches' if params['accuracy'] else 'delivery_sketches']
+            stats = delivery_stats_from_sketches(sketches, years, accuracy=params['accuracy'])
+        return stats and {key: stats[key] for key in ('count', 'mean', 'min', 'max')}
+    if kind == 'rfm':
+        # Snapshot per akhir tahun terakhir yang dipilih
+        rfm = rfm_scores(build_rfm_index(sources['customer_days']), datetime.date(max(years), 12, 31))
+        return {'customers': rfm, 'segments': segment_summary(rfm), 'states': segment_states(rfm)}
+    if kind == 'delivery_geo':
+        return {
+            'totals': delivery_geo_totals(sources['delivery_geo'], years),
+            'distance_bands': distance_band_summary(sources['delivery_geo'], years),
+            'state_pairs': state_pair_summary(sources['delivery_geo'], years, params['min_shipments']),
+        }
+    if kind == 'problem_rates':
+        start_date, end_date = datetime.date(min(years), 1, 1), datetime.date(max(years), 12, 31)
+        result = {'total': {
+            value: int(total[0]) for value, total in range_totals(build_rate_index(sources['daily_orders']), start_date, end_date).items()
+        }}
+        for entity in RATE_ENTITIES:
+            index = build_rate_index(sources[DAILY_ENTITY_AGGREGATES[entity]], entity)
+            result[entity] = problem_rates(index, start_date, end_date, params['min_orders'], params['sort_by'])
+        return result
+    if kind == 'problem_orders':
+        if backend == 'streaming':
+            return problem_orders_from_aggregates(sources, years)
+        return problem_orders(sources['orders'], sources['order_lines'], years)
+    return category_revenue(
+        sources['revenue_cube'],
+        datetime.date(min(years), 1, 1), datetime.date(max(years), 12, 31),
+        params['granularity'], params['top_n'], params['seller_states']
+    )
+
+
+def normalize_frame(df):
+    """Urutan baris & tipe kolom yang netral terhadap backend (kategori -> string, baris diurutkan per kunci)."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype(str)
+    # Kolom non-float (kunci & hitungan) unik per baris; float tidak dipakai karena selisih pembulatan
+    return df.sort_values([col for col in df.columns if not pd.api.types.is_float_dtype(df[col])], ignore_index=True)
+
+
+def compare_values(expected, actual, path, rtol=PARITY_RTOL):
+    """Membandingkan dua hasil secara rekursif; mengembalikan daftar perbedaan (kosong = sama)."""
+    if expected is None or actual is None:
+        return [] if expected is None and actual is None else [f"{path}: {expected!r} != {actual!r}"]
+    if isinstance(expected, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                differences.append(f"{path}.{key}: hanya ada di salah satu backend")
+            else:
+                differences.extend(compare_values(expected[key], actual[key], f"{path}.{key}", rtol))
+        return differences
+    if isinstance(expected, pd.DataFrame):
+        expected, actual = normalize_frame(expected), normalize_frame(actual)
+        if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+            return [f"{path}: bentuk berbeda {expected.shape} vs {actual.shape}"]
+        differences = []
+        for col in expected.columns:
+            left, right = expected[col].to_numpy(), actual[col].to_numpy()
+            if pd.api.types.is_float_dtype(expected[col]):
+                equal = np.allclose(left, right, rtol=rtol, atol=0, equal_nan=True)
+            else:
+                equal = np.array_equal(left.astype(str), right.astype(str))
+            if not equal:
+                differences.append(f"{path}[{col}]: nilai berbeda")
+        return differences
+    if isinstance(expected, list):
+        if path.endswith('consistent_categories'):
+            expected, actual = sorted(expected), sorted(actual)
+        if len(expected) != len(actual):
+            return [f"{path}: panjang {len(expected)} != {len(actual)}"]
+        return [diff for i, (a, b) in enumerate(zip(expected, actual)) for diff in compare_values(a, b, f"{path}[{i}]", rtol)]
+    if isinstance(expected, float) or isinstance(actual, float):
+        return [] if math.isclose(expected, actual, rel_tol=rtol) else [f"{path}: {expected!r} != {actual!r}"]
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def check_parity(dataset_dir=None, year_selections=PARITY_YEAR_SELECTIONS):
+    """
+    Menjalankan semua kasus pada kedua backend dan mengembalikan (jumlah kasus, daftar perbedaan).
+    Agregat streaming selalu dihitung ulang (tidak memakai agregat tersimpan).
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    order_lines = load_order_lines(dataset_dir)
+    pandas_sources = {
+        'delivery_durations': load_delivery_durations(dataset_dir),
+        'delivery_sketches': load_delivery_sketches(dataset_dir),
+        'coarse_delivery_sketches': load_delivery_sketches(dataset_dir, PARITY_COARSE_SKETCH_ACCURACY),
+        'delivery_geo': load_delivery_geo(dataset_dir),
+        'customer_days': load_customer_days(dataset_dir),
+        'orders': clean_orders_data(read_table('orders', PROBLEM_ORDER_SOURCE_TABLES['orders'], dataset_dir)),
+        'order_lines': order_lines,
+        'revenue_cube': build_revenue_cube(order_lines),
+    }
+    pandas_sources['daily_orders'] = daily_order_counts(pandas_sources['orders'])
+    for entity, name in DAILY_ENTITY_AGGREGATES.items():
+        pandas_sources[name] = daily_entity_counts(order_lines, entity)
+    streaming_sources = compute_streaming_aggregates(dataset_dir)
+
+    cases = parity_cases(year_selections)
+    differences = []
+    for kind, params in cases:
+        label = f"{kind}{params}"
+        differences.extend(compare_values(
+            run_case(kind, params, pandas_sources, 'pandas'),
+            run_case(kind, params, streaming_sources, 'streaming'),
+            label
+        ))
+    return len(cases), differences
@@ -0,0 +1,123 @@
+# rates.py
+# Tingkat pesanan bermasalah (canceled/unavailable) per penjual & per kategori produk untuk rentang
+# tanggal apa pun. Hitungan harian (pesanan & pesanan bermasalah) per entitas disimpan sebagai
+# jumlah kumulatif yang terurut per (entitas, hari), sehingga total sebuah rentang cukup
+# kumulatif[akhir] - kumulatif[awal] untuk semua entitas sekaligus, tanpa memindai ulang orders.
+
+import numpy as np
+import pandas as pd
+
+from .facts import PROBLEM_ORDER_STATUSES
+from .telemetry import profiled
+
+# Entitas yang dianalisis: kolom pada tabel fakta baris pesanan -> label tampilan
+RATE_ENTITIES = {
+    'product_category_name_display': 'Kategori Produk',
+    'seller_id': 'Penjual',
+}
+RATE_VALUES = ['orders', 'problem_orders']
+
+
+def purchase_days(timestamps):
+    """Kode hari (sejak 1970-01-01) dari tanggal pemesanan."""
+    return timestamps.to_numpy().astype('datetime64[D]').astype('int32')
+
+
+@profiled('aggregate.daily_orders')
+def daily_order_counts(orders_df, statuses=PROBLEM_ORDER_STATUSES):
+    """Jumlah pesanan dan pesanan bermasalah per hari pemesanan (termasuk pesanan tanpa item)."""
+    orders_df = orders_df[orders_df['order_purchase_timestamp'].notna()]
+    daily = pd.DataFrame({
+        'day': purchase_days(orders_df['order_purchase_timestamp']),
+        'orders': np.ones(len(orders_df), dtype='int64'),
+        'problem_orders': orders_df['order_status'].isin(statuses).to_numpy().astype('int64'),
+    })
+    return daily.groupby('day')[RATE_VALUES].sum().reset_index()
+
+
+@profiled('aggregate.daily_orders_by_entity')
+def daily_entity_counts(order_lines, entity, statuses=PROBLEM_ORDER_STATUSES):
+    """
+    Jumlah pesanan (bukan baris item) dan pesanan bermasalah per (entitas, hari pemesanan).
+    Pesanan dengan beberapa item dari penjual/kategori yang sama dihitung sekali untuk entitas itu.
+    """
+    lines = order_lines[order_lines['order_purchase_timestamp'].notna() & order_lines[entity].notna()]
+    lines = lines[['order_id', entity, 'order_status', 'order_purchase_timestamp']].drop_duplicates(['order_id', entity])
+    daily = pd.DataFrame({
+        entity: lines[entity].to_numpy(),
+        'day': purchase_days(lines['order_purchase_timestamp']),
+        'orders': np.ones(len(lines), dtype='int64'),
+        'problem_orders': lines['order_status'].isin(statuses).to_numpy().astype('int64'),
+    })
+    return daily.groupby([entity, 'day'], observed=True)[RATE_VALUES].sum().reset_index()
+
+
+@profiled('aggregate.rate_index')
+def build_rate_index(daily_counts, entity=None):
+    """
+    Indeks jumlah kumulatif dari hitungan harian. Baris diurutkan per kunci gabungan
+    kode_entitas * rentang_hari + hari, jadi baris milik satu entitas bersebelahan dan
+    berurutan waktu; batas sebuah rentang tanggal dicari dengan searchsorted untuk semua
+    entitas sekaligus. `entity=None` berarti satu entitas (total seluruh pesanan).
+    """
+    days = daily_counts['day'].to_numpy().astype('int64')
+    if entity is None:
+        codes, labels = np.zeros(len(daily_counts), dtype='int64'), pd.Index(['Semua'])
+    else:
+        codes, labels = pd.factorize(daily_counts[entity].astype(str), sort=True)
+        labels = pd.Index(labels)
+    first_day = int(days.min()) if len(days) else 0
+    span = int(days.max()) - first_day + 1 if len(days) else 1
+    keys = codes.astype('int64') * span + (days - first_day)
+    order = np.argsort(keys, kind='stable')
+    index = {'entity': entity, 'labels': labels, 'first_day': first_day, 'span': span, 'keys': keys[order]}
+    for value in RATE_VALUES:
+        # Diawali 0 agar total rentang selalu kumulatif[hi] - kumulatif[lo]
+        index[value] = np.concatenate([[0], np.cumsum(daily_counts[value].to_numpy()[order])]).astype('int64')
+    return index
+
+
+def index_date_bounds(index):
+    """Tanggal pemesanan pertama dan terakhir yang tercakup indeks."""
+    first = np.datetime64(index['first_day'], 'D')
+    return pd.Timestamp(first).date(), pd.Timestamp(first + index['span'] - 1).date()
+
+
+def range_totals(index, start_date, end_date):
+    """Total pesanan & pesanan bermasalah setiap entitas pada [start_date, end_date] (inklusif)."""
+    start = np.datetime64(start_date, 'D').astype('int64') - index['first_day']
+    end = np.datetime64(end_date, 'D').astype('int64') - index['first_day']
+    start, end = max(int(start), 0), min(int(end), index['span'] - 1)
+    offsets = np.arange(len(index['labels']), dtype='int64') * index['span']
+    if start > end:
+        lo = hi = np.zeros(len(offsets), dtype='int64')
+    else:
+        lo = index['keys'].searchsorted(offsets + start, side='left')
+        hi = index['keys'].searchsorted(offsets + end, side='right')
+    return {value: index[value][hi] - index[value][lo] for value in RATE_VALUES}
+
+
+@profiled('analysis.problem_rates')
+def problem_rates(index, start_date, end_date, min_orders=1, sort_by='rate', top_n=None):
+    """
+    Pesanan, pesanan bermasalah, dan tingkat masalah per entitas pada rentang tanggal,
+    hanya untuk entitas dengan minimal `min_orders` pesanan dan setidaknya satu pesanan
+    bermasalah. Diurutkan menurun per tingkat (`sort_by='rate'`) atau per jumlah pesanan
+    bermasalah (`sort_by='count'`), dengan nama entitas sebagai pemecah seri.
+    """
+    totals = range_totals(index, start_date, end_date)
+    orders, problems = totals['orders'], totals['problem_orders']
+    eligible = np.flatnonzero((orders >= max(min_orders, 1)) & (problems > 0))
+    rates = problems[eligible] / orders[eligible]
+    primary, secondary = (rates, problems[eligible]) if sort_by == 'rate' else (problems[eligible], rates)
+    # np.lexsort mengurutkan dari kunci terakhir; label sudah terurut, jadi posisi = urutan nama
+    ranked = eligible[np.lexsort((eligible, -secondary, -primary))]
+    if top_n is not None:
+        ranked = ranked[:top_n]
+    column = index['entity'] or 'entity'
+    return pd.DataFrame({
+        column: np.asarray(index['labels'][ranked], dtype=object),
+        'orders': orders[ranked],
+        'problem_orders': problems[ranked],
+        'problem_rate': problems[ranked] / np.maximum(orders[ranked], 1),
+    })
@@ -0,0 +1,156 @@
+# reports.py
+# Laporan batch: menghitung laporan yang dibaca dashboard untuk daftar tahun secara paralel
+# (process pool) lalu menyimpannya ke Parquet/JSON agar dashboard tinggal membaca.
+# Bagian 1 & 2 dashboard dijawab dari sketsa kuantil & indeks jumlah kumulatif (filter bebas),
+# jadi hanya pendapatan kategori (tampilan default bagian 3) yang dihitung di muka.
+
+import datetime
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from . import config
+from .analyses import category_revenue
+from .cache import PIPELINE_VERSION
+from .facts import ORDER_LINE_SOURCE_TABLES, build_revenue_cube, load_order_lines
+from .storage import refresh_snapshot, source_fingerprint
+from .streaming import load_streaming_aggregates
+
+REPORT_KINDS = ('category_revenue',)
+REPORT_SOURCE_TABLES = sorted(ORDER_LINE_SOURCE_TABLES)
+MANIFEST_FILE = 'manifest.json'
+
+# Tabel turunan yang sudah dimuat di proses worker ini: (dataset_dir, nama) -> DataFrame
+_worker_tables = {}
+
+
+def selection_key(years):
+    """Nama folder laporan untuk kombinasi tahun, mis. (2017, 2018) -> '2017-2018'."""
+    return '-'.join(str(year) for year in sorted(set(years)))
+
+
+def report_selections(years):
+    """Kombinasi tahun yang dihitung: setiap tahun sendiri-sendiri ditambah gabungan semuanya."""
+    selections = [(year,) for year in sorted(set(years))]
+    if len(selections) > 1:
+        selections.append(tuple(sorted(set(years))))
+    return selections
+
+
+def _worker_table(table_name, dataset_dir):
+    """Memuat tabel turunan sekali per proses worker."""
+    key = (str(dataset_dir), table_name)
+    if key not in _worker_tables:
+        if table_name == 'order_lines':
+            table = load_order_lines(dataset_dir)
+        elif table_name == 'streaming_aggregates':
+            table = load_streaming_aggregates(dataset_dir)
+        else:
+            table = build_revenue_cube(_worker_table('order_lines', dataset_dir))
+        _worker_tables[key] = table
+    return _worker_tables[key]
+
+
+def compute_report(kind, years, dataset_dir=None, granularity='Kuartalan', top_n=5, backend=None):
+    """
+    Menghitung satu laporan dengan backend 'pandas' atau 'streaming' (default: config.BACKEND).
+    Pendapatan kategori dihitung untuk rentang 1 Januari tahun terkecil sampai 31 Desember tahun terbesar.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    streaming = (backend or config.BACKEND) == 'streaming'
+    if kind == 'category_revenue':
+        return category_revenue(
+            _worker_table('streaming_aggregates', dataset_dir)['revenue_cube'] if streaming
+            else _worker_table('revenue_cube', dataset_dir),
+            datetime.date(min(years), 1, 1),
+            datetime.date(max(years), 12, 31),
+            granularity,
+            top_n
+        )
+    raise ValueError(f"Jenis laporan tidak dikenal: {kind}")
+
+
+def write_report(result, kind, years, reports_dir):
+    """Menyimpan hasil: nilai skalar/list ke JSON, setiap DataFrame ke Parquet terpisah."""
+    target_dir = reports_dir / selection_key(years)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    scalars = None
+    if result is not None:
+        scalars = {key: value for key, value in result.items() if not isinstance(value, pd.DataFrame)}
+        for key, value in result.items():
+            if isinstance(value, pd.DataFrame):
+                value.to_parquet(target_dir / f"{kind}__{key}.parquet", index=False)
+    (target_dir / f"{kind}.json").write_text(json.dumps(scalars, indent=2))
+
+
+def read_report(kind, years, reports_dir=None, dataset_dir=None):
+    """
+    Membaca laporan yang sudah dihitung. Mengembalikan None jika laporan tidak ada,
+    kosong, atau dihitung dari data sumber / versi pipeline yang berbeda dengan saat ini.
+    """
+    reports_dir = reports_dir or config.REPORTS_DIR
+    manifest_path = reports_dir / MANIFEST_FILE
+    report_path = reports_dir / selection_key(years) / f"{kind}.json"
+    if not manifest_path.exists() or not report_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        if (manifest.get('pipeline_version') != PIPELINE_VERSION or
+                manifest.get('source_fingerprint') != source_fingerprint(REPORT_SOURCE_TABLES, dataset_dir)):
+            return None
+        result = json.loads(report_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if result is None:
+        return None
+    for parquet_path in report_path.parent.glob(f"{kind}__*.parquet"):
+        result[parquet_path.stem.split('__', 1)[1]] = pd.read_parquet(parquet_path)
+    return result
+
+
+def _run_job(kind, years, dataset_dir, reports_dir, granularity, top_n, backend):
+    """Satu pekerjaan di process pool: hitung lalu tulis laporan."""
+    started = time.perf_counter()
+    write_report(compute_report(kind, years, dataset_dir, granularity, top_n, backend), kind, years, reports_dir)
+    return kind, selection_key(years), time.perf_counter() - started
+
+
+def generate_reports(years, reports_dir=None, dataset_dir=None, workers=None, granularity='Kuartalan', top_n=5, backend=None):
+    """Menghitung semua jenis laporan untuk setiap kombinasi tahun secara paralel."""
+    reports_dir = reports_dir or config.REPORTS_DIR
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    backend = backend or config.BACKEND
+    if backend == 'streaming':
+        # Hitung & simpan agregat sekali di proses utama; worker tinggal membaca Parquet-nya
+        load_streaming_aggregates(dataset_dir)
+    elif config.USE_SNAPSHOTS:
+        # Bangun snapshot sekali di proses utama agar worker tidak berebut membangunnya
+        for table_name in REPORT_SOURCE_TABLES:
+            refresh_snapshot(table_name, dataset_dir)
+
+    jobs = [(kind, selection) for selection in report_selections(years) for kind in REPORT_KINDS]
+    timings = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_job, kind, selection, dataset_dir, reports_dir, granularity, top_n, backend)
+            for kind, selection in jobs
+        ]
+        for future in as_completed(futures):
+            kind, key, seconds = future.result()
+            timings.append({'kind': kind, 'years': key, 'seconds': round(seconds, 3)})
+
+    manifest = {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'dataset_dir': str(dataset_dir),
+        'backend': backend,
+        'pipeline_version': PIPELINE_VERSION,
+        'source_fingerprint': source_fingerprint(REPORT_SOURCE_TABLES, dataset_dir),
+        'granularity': granularity,
+        'top_n': top_n,
+        'reports': sorted(timings, key=lambda item: (item['years'], item['kind'])),
+    }
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    (reports_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return manifest
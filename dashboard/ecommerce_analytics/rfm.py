@@ -0,0 +1,203 @@
+# rfm.py
+# Segmentasi pelanggan RFM (Recency, Frequency, Monetary) per customer_unique_id untuk tanggal
+# snapshot (as-of) apa pun. Pesanan diringkas sekali menjadi hitungan harian per pelanggan yang
+# terurut per (pelanggan, hari); satu snapshot cukup satu mask tanggal + reduksi per kelompok
+# pelanggan, jadi skor & segmen dihitung ulang tanpa join customers -> orders -> payments lagi.
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_orders_data
+from .facts import PROBLEM_ORDER_STATUSES
+from .rates import purchase_days
+from .sketches import state_labels
+from .storage import load_tables
+from .telemetry import profiled
+
+# Tabel sumber untuk tabel pelanggan harian
+RFM_SOURCE_TABLES = {
+    'orders': ['order_id', 'customer_id', 'order_status', 'order_purchase_timestamp'],
+    'customers': ['customer_id', 'customer_unique_id', 'customer_state'],
+    'order_payments': ['order_id', 'payment_value'],
+}
+CUSTOMER_DAY_KEYS = ['customer_unique_id', 'customer_state', 'day']
+CUSTOMER_DAY_VALUES = ['orders', 'payment_value']
+
+# Jumlah tingkat skor R, F, dan M (kuintil)
+RFM_SCORE_LEVELS = 5
+# Segmen dari skor (R, F): baris = skor R 1..5, kolom = skor F 1..5
+RFM_SEGMENTS = [
+    'Pelanggan Terbaik',       # 0: R 5, F 4-5
+    'Pelanggan Setia',         # 1: R 3-4, F 4-5
+    'Calon Pelanggan Setia',   # 2: R 4-5, F 2-3
+    'Pelanggan Baru',          # 3: R 5, F 1
+    'Menjanjikan',             # 4: R 4, F 1
+    'Perlu Perhatian',         # 5: R 3, F 3
+    'Hampir Tidur',            # 6: R 3, F 1-2
+    'Jangan Sampai Hilang',    # 7: R 1-2, F 5
+    'Berisiko',                # 8: R 1-2, F 3-4
+    'Tidur',                   # 9: R 1-2, F 1-2
+]
+RFM_SEGMENT_GRID = np.array([
+    [9, 9, 8, 8, 7],
+    [9, 9, 8, 8, 7],
+    [6, 6, 5, 1, 1],
+    [4, 2, 2, 1, 1],
+    [3, 2, 2, 0, 0],
+], dtype='int8')
+
+
+@profiled('aggregate.customer_days')
+def build_customer_days(orders_df, customers_df, payments_df, statuses=PROBLEM_ORDER_STATUSES):
+    """
+    Jumlah pesanan & total pembayaran per (customer_unique_id, negara bagian, hari pemesanan).
+    Pesanan canceled/unavailable tidak dihitung; pesanan tanpa pembayaran bernilai 0.
+    Input pembayaran harus memuat semua baris dari pesanan yang sama (seluruh data atau satu partisi).
+    """
+    orders_df = orders_df[orders_df['order_purchase_timestamp'].notna() & ~orders_df['order_status'].isin(statuses)]
+    order_payments = payments_df.groupby('order_id', observed=True)['payment_value'].sum()
+    customer_orders = pd.merge(
+        orders_df[['order_id', 'customer_id', 'order_purchase_timestamp']],
+        customers_df[['customer_id', 'customer_unique_id', 'customer_state']], on='customer_id', how='inner'
+    )
+    payment_value = customer_orders['order_id'].map(order_payments).astype('float64').fillna(0.0)
+    daily = pd.DataFrame({
+        'customer_unique_id': customer_orders['customer_unique_id'].to_numpy(),
+        'customer_state': state_labels(customer_orders['customer_state']),
+        'day': purchase_days(customer_orders['order_purchase_timestamp']),
+        'orders': np.ones(len(customer_orders), dtype='int64'),
+        'payment_value': payment_value.to_numpy(),
+    })
+    return daily.groupby(CUSTOMER_DAY_KEYS, observed=True)[CUSTOMER_DAY_VALUES].sum().reset_index()
+
+
+def load_customer_days(dataset_dir=None):
+    """Memuat tabel sumber (paralel, ID berkamus bersama) lalu membangun tabel pelanggan harian."""
+    tables = load_tables(RFM_SOURCE_TABLES, dataset_dir, encode_ids=True)
+    return build_customer_days(clean_orders_data(tables['orders']), tables['customers'], tables['order_payments'])
+
+
+@profiled('aggregate.rfm_index')
+def build_rfm_index(customer_days):
+    """
+    Indeks pelanggan untuk RFM: baris diurutkan per (pelanggan, hari, negara bagian) sehingga
+    baris satu pelanggan bersebelahan dan yang terakhir adalah pembelian terbarunya.
+    """
+    codes, labels = pd.factorize(customer_days['customer_unique_id'].astype(str), sort=True)
+    state_codes, states = pd.factorize(customer_days['customer_state'].astype(str), sort=True)
+    days = customer_days['day'].to_numpy().astype('int32')
+    order = np.lexsort((state_codes, days, codes))
+    return {
+        'labels': pd.Index(labels),
+        'states': pd.Index(states),
+        'codes': codes[order].astype('int32'),
+        'state_codes': state_codes[order].astype('int16'),
+        'days': days[order],
+        'orders': customer_days['orders'].to_numpy()[order].astype('int64'),
+        'payment_value': customer_days['payment_value'].to_numpy()[order].astype('float64'),
+    }
+
+
+def rfm_date_bounds(index):
+    """Tanggal pemesanan pertama dan terakhir yang tercakup indeks (None jika kosong)."""
+    if not len(index['days']):
+        return None
+    return (
+        pd.Timestamp(np.datetime64(int(index['days'].min()), 'D')).date(),
+        pd.Timestamp(np.datetime64(int(index['days'].max()), 'D')).date()
+    )
+
+
+def quantile_scores(values, levels=RFM_SCORE_LEVELS, higher_is_better=True):
+    """
+    Skor 1..levels dari peringkat persentil (nilai terbaik = skor tertinggi). Nilai yang sama
+    mendapat peringkat terendah kelompoknya, sehingga skornya sama dan konservatif (mis. semua
+    pelanggan dengan satu pesanan mendapat skor F 1).
+    """
+    values = np.asarray(values)
+    if not len(values):
+        return np.zeros(0, dtype='int8')
+    values = values if higher_is_better else -values
+    if np.issubdtype(values.dtype, np.integer) and int(values.max()) - int(values.min()) <= len(values):
+        # Nilai bulat dengan rentang kecil (recency, frequency): hitungan per nilai tanpa pengurutan
+        inverse = values - values.min()
+        counts = np.bincount(inverse)
+    else:
+        _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    min_rank = np.cumsum(counts) - counts + 1
+    return np.clip(np.ceil(min_rank[inverse] / len(values) * levels), 1, levels).astype('int8')
+
+
+@profiled('analysis.rfm')
+def rfm_scores(index, as_of):
+    """
+    Recency (hari sejak pembelian terakhir sampai `as_of`), frequency (jumlah pesanan),
+    monetary (total pembayaran), skor kuintil R/F/M, dan segmen setiap pelanggan yang
+    sudah membeli pada atau sebelum `as_of`. Negara bagian = negara bagian pesanan terakhir.
+    """
+    as_of_day = int(np.datetime64(as_of, 'D').astype('int64'))
+    rows = np.flatnonzero(index['days'] <= as_of_day)
+    codes = index['codes'][rows]
+    # Baris terurut per (pelanggan, hari): awal setiap kelompok pelanggan & baris terakhirnya
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype='int64')
+    last_rows = rows[np.r_[starts[1:] - 1, len(rows) - 1]] if len(codes) else starts
+    frequency = np.add.reduceat(index['orders'][rows], starts)
+    monetary = np.add.reduceat(index['payment_value'][rows], starts)
+    recency = as_of_day - index['days'][last_rows].astype('int64')
+
+    r_score = quantile_scores(recency, higher_is_better=False)
+    f_score = quantile_scores(frequency)
+    m_score = quantile_scores(monetary)
+    segments = RFM_SEGMENT_GRID[r_score.astype('int64') - 1, f_score.astype('int64') - 1]
+    return pd.DataFrame({
+        # Kategori dari kode indeks: ID & negara bagian baru di-decode saat ditampilkan
+        'customer_unique_id': pd.Categorical.from_codes(codes[starts], categories=index['labels']),
+        'customer_state': pd.Categorical.from_codes(index['state_codes'][last_rows], categories=index['states']),
+        'recency_days': recency,
+        'frequency': frequency,
+        'monetary': monetary,
+        'r_score': r_score,
+        'f_score': f_score,
+        'm_score': m_score,
+        'segment': pd.Categorical.from_codes(segments, categories=RFM_SEGMENTS),
+    })
+
+
+@profiled('analysis.rfm_segments')
+def segment_summary(rfm):
+    """Jumlah pelanggan, porsi, rata-rata R/F/M, dan total pembayaran per segmen (segmen kosong dibuang)."""
+    summary = rfm.groupby('segment', observed=True).agg(
+        customers=('customer_unique_id', 'size'),
+        recency_mean=('recency_days', 'mean'),
+        frequency_mean=('frequency', 'mean'),
+        monetary_mean=('monetary', 'mean'),
+        monetary_total=('monetary', 'sum'),
+    ).reset_index()
+    summary['customer_share'] = summary['customers'] / max(len(rfm), 1)
+    summary['segment'] = summary['segment'].astype(str)
+    return summary.sort_values(['customers', 'segment'], ascending=[False, True], ignore_index=True)
+
+
+def segment_states(rfm, segment=None):
+    """Jumlah pelanggan & rata-rata pembayaran per (segmen, negara bagian); `segment` untuk satu segmen saja."""
+    if segment is not None:
+        rfm = rfm[rfm['segment'] == segment]
+    states = rfm.groupby(['segment', 'customer_state'], observed=True).agg(
+        customers=('customer_unique_id', 'size'),
+        monetary_mean=('monetary', 'mean'),
+    ).reset_index()
+    states = states.astype({'segment': str, 'customer_state': str})
+    return states.sort_values(['segment', 'customers', 'customer_state'], ascending=[True, False, True], ignore_index=True)
+
+
+def top_customers(rfm, segment, n=20):
+    """Pelanggan dengan pembayaran terbesar di satu segmen (untuk drill-down), ID sebagai pemecah seri."""
+    rows = np.flatnonzero((rfm['segment'] == segment).to_numpy())
+    monetary = rfm['monetary'].to_numpy()[rows]
+    if len(rows) > n:
+        # Kandidat: semua baris dengan pembayaran >= pembayaran ke-n terbesar (termasuk yang seri)
+        threshold = np.partition(monetary, len(rows) - n)[len(rows) - n]
+        rows, monetary = rows[monetary >= threshold], monetary[monetary >= threshold]
+    ids = rfm['customer_unique_id'].cat.codes.to_numpy()[rows]
+    ranked = rows[np.lexsort((ids, -monetary))][:n]
+    return rfm.iloc[ranked].astype({'customer_unique_id': str, 'customer_state': str}).reset_index(drop=True)
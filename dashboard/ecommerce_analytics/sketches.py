@@ -0,0 +1,248 @@
+# sketches.py
+# Sketsa kuantil yang bisa digabung untuk durasi pengiriman, per kunci (bulan pemesanan,
+# negara bagian pelanggan, negara bagian penjual). Setiap sketsa berupa hitungan pesanan per
+# bucket durasi, ditambah jumlah pesanan terlambat, total durasi, serta durasi terpendek & terpanjang
+# per bucket. Hitungan & total aditif, min/maks digabung dengan min/maks, jadi kombinasi filter apa
+# pun dijawab dengan menggabungkan sketsa tanpa memindai pesanan.
+#
+# Pemetaan bucket (gaya HDR/DDSketch): durasi di bawah L = ceil(1/akurasi) hari mendapat satu
+# bucket per hari (persis); di atasnya bucket logaritmik dengan rasio (1+a)/(1-a), sehingga
+# kuantil yang dilaporkan berselisih relatif paling banyak `a` dari nilai sebenarnya.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .analyses import HISTOGRAM_BINS
+from .cleaning import clean_orders_data
+from .facts import build_delivery_durations, late_deliveries
+from .storage import load_tables
+from .telemetry import profiled
+
+# Tabel sumber untuk sketsa durasi pengiriman
+DELIVERY_SKETCH_SOURCE_TABLES = {
+    'orders': [
+        'order_id', 'customer_id', 'order_status', 'order_purchase_timestamp',
+        'order_delivered_customer_date', 'order_estimated_delivery_date'
+    ],
+    'order_items': ['order_id', 'order_item_id', 'seller_id'],
+    'customers': ['customer_id', 'customer_state'],
+    'sellers': ['seller_id', 'seller_state'],
+}
+SKETCH_KEYS = ['month', 'customer_state', 'seller_state']
+SKETCH_VALUES = ['orders', 'late_orders', 'duration_days_sum', 'duration_days_min', 'duration_days_max']
+# Cara menggabungkan setiap kolom nilai sketsa (durasi persis di bucket logaritmik tidak bisa dijumlahkan)
+SKETCH_AGGREGATIONS = {
+    'orders': 'sum',
+    'late_orders': 'sum',
+    'duration_days_sum': 'sum',
+    'duration_days_min': 'min',
+    'duration_days_max': 'max',
+}
+# Negara bagian pengganti jika pelanggan/penjual tidak ditemukan (mis. pesanan tanpa item)
+UNKNOWN_STATE = '-'
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def bucket_layout(accuracy=None):
+    """(batas bucket linear L, rasio bucket logaritmik gamma) untuk akurasi relatif tertentu."""
+    accuracy = accuracy or config.SKETCH_ACCURACY
+    return math.ceil(1 / accuracy), (1 + accuracy) / (1 - accuracy)
+
+
+def duration_buckets(days, accuracy=None):
+    """Nomor bucket untuk setiap durasi (hari, bilangan bulat >= 0)."""
+    linear_limit, gamma = bucket_layout(accuracy)
+    days = np.asarray(days, dtype='int64')
+    log_bucket = np.floor(np.log(np.maximum(days, linear_limit) / linear_limit) / np.log(gamma))
+    return np.where(days < linear_limit, days, linear_limit + log_bucket).astype('int32')
+
+
+def bucket_values(buckets, accuracy=None):
+    """Nilai wakil setiap bucket: durasinya sendiri di bagian linear, titik tengah relatif di bagian log."""
+    linear_limit, gamma = bucket_layout(accuracy)
+    buckets = np.asarray(buckets, dtype='int64')
+    lower = linear_limit * gamma ** np.maximum(buckets - linear_limit, 0).astype('float64')
+    return np.where(buckets < linear_limit, buckets, lower * 2 * gamma / (gamma + 1)).astype('float64')
+
+
+def quantile_column(quantile):
+    """Nama kolom kuantil, mis. 0.9 -> 'p90'."""
+    return f"p{quantile * 100:g}"
+
+
+def primary_seller_states(items_df, sellers_df):
+    """Negara bagian penjual item pertama (order_item_id terkecil) setiap pesanan."""
+    first_items = items_df.sort_values(['order_id', 'order_item_id']).drop_duplicates('order_id')
+    return pd.merge(first_items[['order_id', 'seller_id']], sellers_df[['seller_id', 'seller_state']], on='seller_id', how='left')
+
+
+def state_labels(states):
+    """Negara bagian sebagai kategori teks, dengan UNKNOWN_STATE untuk nilai kosong."""
+    states = states.astype(object)
+    return states.where(states.notna(), UNKNOWN_STATE).astype('category')
+
+
+@profiled('build.delivery_sketches')
+def build_delivery_sketches(orders_df, items_df, customers_df, sellers_df, accuracy=None):
+    """
+    Sketsa durasi pengiriman pesanan 'delivered': satu baris per (bulan, negara bagian
+    pelanggan, negara bagian penjual, bucket) berisi jumlah pesanan, pesanan terlambat
+    (tanggal terkirim setelah tanggal estimasi), total durasi, serta durasi terpendek &
+    terpanjang (hari, persis walaupun bucket-nya logaritmik).
+
+    Pesanan dengan beberapa penjual dihitung sekali, pada negara bagian penjual item pertamanya.
+    Input harus memuat semua item dari pesanan yang sama (seluruh data, atau satu partisi hash).
+    """
+    durations = build_delivery_durations(orders_df, extra_columns=(
+        'order_id', 'customer_id', 'order_delivered_customer_date', 'order_estimated_delivery_date'
+    ))
+    durations = pd.merge(durations, customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
+    durations = pd.merge(durations, primary_seller_states(items_df, sellers_df)[['order_id', 'seller_state']], on='order_id', how='left')
+
+    days = durations['delivery_duration_days'].to_numpy().astype('int64')
+    sketch_rows = pd.DataFrame({
+        'month': durations['order_purchase_timestamp'].to_numpy().astype('datetime64[M]').astype('int32'),
+        'customer_state': state_labels(durations['customer_state']),
+        'seller_state': state_labels(durations['seller_state']),
+        'bucket': duration_buckets(days, accuracy),
+        'orders': np.ones(len(durations), dtype='int64'),
+        'late_orders': late_deliveries(durations).astype('int64'),
+        'duration_days_sum': days,
+        'duration_days_min': days,
+        'duration_days_max': days,
+    })
+    return sketch_rows.groupby(SKETCH_KEYS + ['bucket'], observed=True)[SKETCH_VALUES].agg(SKETCH_AGGREGATIONS).reset_index()
+
+
+def load_delivery_sketches(dataset_dir=None, accuracy=None):
+    """Memuat tabel sumber (paralel, ID berkamus bersama) lalu membangun sketsa seluruh pesanan."""
+    tables = load_tables(DELIVERY_SKETCH_SOURCE_TABLES, dataset_dir, encode_ids=True)
+    return build_delivery_sketches(
+        clean_orders_data(tables['orders']), tables['order_items'], tables['customers'], tables['sellers'], accuracy
+    )
+
+
+def select_sketches(sketches, years, customer_states=None, seller_states=None):
+    """Sketsa untuk tahun pemesanan & negara bagian tertentu (None/kosong = semua)."""
+    mask = np.isin(sketches['month'].to_numpy() // 12 + 1970, list(years))
+    if customer_states:
+        mask &= sketches['customer_state'].isin(customer_states).to_numpy()
+    if seller_states:
+        mask &= sketches['seller_state'].isin(seller_states).to_numpy()
+    return sketches[mask]
+
+
+def grouped_summary(selected, groups, n_groups, quantiles=DEFAULT_QUANTILES, accuracy=None):
+    """
+    Menggabungkan sketsa per kelompok (kode 0..n_groups-1) dengan np.bincount ke matriks
+    kelompok x bucket, lalu membaca kuantil dari hitungan kumulatifnya. Kuantil memakai
+    peringkat bawah (sama dengan np.quantile(method='lower') pada data persis); min/maks
+    diambil dari durasi persis yang tersimpan (NaN untuk kelompok kosong).
+    """
+    buckets = selected['bucket'].to_numpy().astype('int64')
+    n_buckets = int(buckets.max()) + 1 if len(buckets) else 1
+    cells = groups * n_buckets + buckets
+    size = n_groups * n_buckets
+
+    def total(column):
+        return np.bincount(cells, weights=selected[column].to_numpy(), minlength=size).reshape(n_groups, n_buckets)
+
+    counts = total('orders')
+    orders = counts.sum(axis=1)
+    cumulative = counts.cumsum(axis=1)
+    values = bucket_values(np.arange(n_buckets), accuracy)
+    minimum = np.full(n_groups, np.inf)
+    np.minimum.at(minimum, groups, selected['duration_days_min'].to_numpy().astype('float64'))
+    maximum = np.full(n_groups, -np.inf)
+    np.maximum.at(maximum, groups, selected['duration_days_max'].to_numpy().astype('float64'))
+    summary = {
+        'orders': orders.astype('int64'),
+        'late_orders': total('late_orders').sum(axis=1).astype('int64'),
+        'duration_days_sum': total('duration_days_sum').sum(axis=1),
+        'min': np.where(orders > 0, minimum, np.nan),
+        'max': np.where(orders > 0, maximum, np.nan),
+    }
+    for quantile in quantiles:
+        rank = quantile * (orders - 1)
+        summary[quantile_column(quantile)] = values[(cumulative > rank[:, None]).argmax(axis=1)]
+    return summary, counts, values
+
+
+@profiled('analysis.delivery_sketch_stats')
+def delivery_stats_from_sketches(sketches, years, customer_states=None, seller_states=None,
+                                 quantiles=DEFAULT_QUANTILES, accuracy=None):
+    """
+    Seperti analyses.delivery_stats, tetapi dari gabungan sketsa sehingga bisa difilter per
+    negara bagian pelanggan/penjual, ditambah kuantil dan tingkat keterlambatan. Jumlah,
+    rata-rata, min, dan maks selalu persis; histogram & kuantil identik dengan delivery_stats
+    selama durasi di bawah batas linear sketsa, di atasnya memakai nilai wakil bucket.
+    """
+    selected = select_sketches(sketches, years, customer_states, seller_states)
+    if selected.empty:
+        return None
+    summary, counts, values = grouped_summary(selected, np.zeros(len(selected), dtype='int64'), 1, quantiles, accuracy)
+    count = int(summary['orders'][0])
+    present = counts[0] > 0
+    # Nilai wakil bucket logaritmik bisa melewati min/maks persis; dijepit agar tetap masuk rentang histogram
+    histogram_counts, edges = np.histogram(
+        np.clip(values[present], summary['min'][0], summary['max'][0]), bins=HISTOGRAM_BINS,
+        range=(summary['min'][0], summary['max'][0]), weights=counts[0][present]
+    )
+    return {
+        'years': sorted(int(year) for year in years),
+        'count': count,
+        'mean': float(summary['duration_days_sum'][0] / count),
+        'min': float(summary['min'][0]),
+        'max': float(summary['max'][0]),
+        'histogram_counts': histogram_counts.astype('int64').tolist(),
+        'histogram_edges': edges.tolist(),
+        'late_orders': int(summary['late_orders'][0]),
+        'late_rate': float(summary['late_orders'][0] / count),
+        'quantiles': {quantile_column(quantile): float(summary[quantile_column(quantile)][0]) for quantile in quantiles},
+    }
+
+
+def summary_frame(labels, summary, quantiles):
+    """DataFrame ringkasan per kelompok dari hasil grouped_summary (kelompok kosong bernilai NaN)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frame = pd.DataFrame({
+            **labels,
+            'orders': summary['orders'],
+            'late_orders': summary['late_orders'],
+            'late_rate': summary['late_orders'] / summary['orders'],
+            'mean_days': summary['duration_days_sum'] / summary['orders'],
+        })
+    for quantile in quantiles:
+        frame[quantile_column(quantile)] = summary[quantile_column(quantile)]
+    return frame
+
+
+@profiled('analysis.delivery_percentile_trend')
+def delivery_percentile_trend(sketches, years, customer_states=None, seller_states=None,
+                              quantiles=DEFAULT_QUANTILES, accuracy=None):
+    """Kuantil durasi, rata-rata, dan tingkat keterlambatan per bulan pemesanan."""
+    selected = select_sketches(sketches, years, customer_states, seller_states)
+    months = selected['month'].to_numpy().astype('int64')
+    first_month = months.min() if len(months) else 0
+    n_months = int(months.max() - first_month) + 1 if len(months) else 0
+    summary, _, _ = grouped_summary(selected, months - first_month, n_months, quantiles, accuracy)
+    present = summary['orders'] > 0
+    trend = summary_frame(
+        {'month': pd.Series((first_month + np.arange(n_months)).astype('datetime64[M]').astype('datetime64[ns]'))},
+        summary, quantiles
+    )
+    return trend[present].reset_index(drop=True)
+
+
+@profiled('analysis.late_delivery_by_state')
+def late_delivery_by_state(sketches, years, by='customer_state', customer_states=None, seller_states=None,
+                           quantiles=DEFAULT_QUANTILES, accuracy=None):
+    """Tingkat keterlambatan & kuantil durasi per negara bagian (`by`), diurutkan dari yang paling sering terlambat."""
+    selected = select_sketches(sketches, years, customer_states, seller_states)
+    groups, states = pd.factorize(selected[by].astype(str), sort=True)
+    summary, _, _ = grouped_summary(selected, groups.astype('int64'), len(states), quantiles, accuracy)
+    by_state = summary_frame({by: np.asarray(states, dtype=object)}, summary, quantiles)
+    return by_state.sort_values(['late_rate', by], ascending=[False, True], ignore_index=True)
@@ -0,0 +1,570 @@
+# storage.py
+# Registry tabel dan pemuatan data melalui snapshot kolumnar (Arrow IPC)
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv # Parser CSV multi-thread; melepas GIL sehingga beberapa file bisa diparse bersamaan
+import pyarrow.feather as feather # Snapshot kolumnar (Arrow IPC) yang bisa di-memory-map
+
+from . import config
+from .telemetry import record_cache, stage
+
+# Naikkan versi ini jika skema di bawah berubah agar semua snapshot dibangun ulang
+SNAPSHOT_VERSION = 1
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Registry tabel: file sumber, tipe data eksplisit, kolom tanggal, dan kolom kategori
+TABLE_REGISTRY = {
+    'customers': {
+        'file': 'customers_dataset.csv',
+        'dtypes': {'customer_id': 'object', 'customer_unique_id': 'object', 'customer_zip_code_prefix': 'int32'},
+        'dates': [],
+        'categories': ['customer_city', 'customer_state']
+    },
+    'geolocation': {
+        'file': 'geolocation_dataset.csv',
+        'dtypes': {'geolocation_zip_code_prefix': 'int32', 'geolocation_lat': 'float64', 'geolocation_lng': 'float64'},
+        'dates': [],
+        'categories': ['geolocation_city', 'geolocation_state']
+    },
+    'order_items': {
+        'file': 'order_items_dataset.csv',
+        'dtypes': {
+            'order_id': 'object', 'order_item_id': 'int16', 'product_id': 'object', 'seller_id': 'object',
+            'price': 'float64', 'freight_value': 'float64'
+        },
+        'dates': ['shipping_limit_date'],
+        'categories': []
+    },
+    'order_payments': {
+        'file': 'order_payments_dataset.csv',
+        'dtypes': {
+            'order_id': 'object', 'payment_sequential': 'int16', 'payment_installments': 'int16',
+            'payment_value': 'float64'
+        },
+        'dates': [],
+        'categories': ['payment_type']
+    },
+    'order_reviews': {
+        'file': 'order_reviews_dataset.csv',
+        'dtypes': {'review_id': 'object', 'order_id': 'object', 'review_score': 'int8'},
+        'dates': ['review_creation_date', 'review_answer_timestamp'],
+        'categories': []
+    },
+    'orders': {
+        'file': 'orders_dataset.csv',
+        'dtypes': {'order_id': 'object', 'customer_id': 'object'},
+        'dates': [
+            'order_purchase_timestamp',
+            'order_approved_at',
+            'order_delivered_carrier_date',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date'
+        ],
+        'categories': ['order_status']
+    },
+    'product_category_name_translation': {
+        'file': 'product_category_name_translation.csv',
+        'dtypes': {'product_category_name': 'object', 'product_category_name_english': 'object'},
+        'dates': [],
+        'categories': []
+    },
+    'products': {
+        'file': 'products_dataset.csv',
+        'dtypes': {'product_id': 'object', 'product_category_name': 'object'},
+        'dates': [],
+        'categories': []
+    },
+    'sellers': {
+        'file': 'sellers_dataset.csv',
+        'dtypes': {'seller_id': 'object', 'seller_zip_code_prefix': 'int32'},
+        'dates': [],
+        'categories': ['seller_city', 'seller_state']
+    },
+}
+
+# Kolom ID hex 32 karakter -> tabel yang memuatnya. Setiap kolom punya satu kamus bersama
+# (gabungan nilai dari semua tabel tersebut), sehingga kode integernya konsisten antar tabel
+ID_COLUMNS = {
+    'order_id': ['orders', 'order_items', 'order_payments', 'order_reviews'],
+    'product_id': ['products', 'order_items'],
+    'seller_id': ['sellers', 'order_items'],
+    'customer_id': ['customers', 'orders'],
+    'customer_unique_id': ['customers'],
+}
+
+# Tabel transaksi yang bisa ditambah lewat batch append (lihat appends.py). Batch disimpan di
+# <folder dataset>/appends/<nomor>_<nama>/ dengan nama file yang sama seperti CSV utama; baris
+# sebuah order_id di batch menggantikan SEMUA baris order_id itu di tabel yang sama (batch terbaru menang)
+APPENDS_DIRNAME = 'appends'
+APPEND_TABLES = ('orders', 'order_items', 'order_payments')
+
+# Tipe kolom registry -> tipe Arrow untuk parser CSV pyarrow
+ARROW_TYPES = {
+    'object': pa.string(),
+    'int8': pa.int8(),
+    'int16': pa.int16(),
+    'int32': pa.int32(),
+    'float64': pa.float64(),
+}
+
+# (folder dataset, kolom ID) -> (sidik jari sumber, CategoricalDtype, nilai kamus sebagai array Arrow)
+_id_dictionaries = {}
+_id_lock = threading.Lock()
+# (folder dataset, nama tabel) -> lock, agar snapshot yang sama tidak dibangun dua thread sekaligus
+_snapshot_locks = {}
+_snapshot_locks_lock = threading.Lock()
+
+
+def file_digest(path):
+    """Menghitung hash isi file secara bertahap (tanpa memuat seluruh file ke memori)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_csv_arrow(csv_path, spec, columns=None):
+    """
+    Membaca CSV dengan parser pyarrow (multi-thread) memakai tipe dari registry.
+    Kolom tanggal diparse saat membaca dengan format eksplisit; nilai yang tidak
+    sesuai format menjadi kosong (setara errors='coerce').
+    """
+    column_types = {col: ARROW_TYPES[dtype] for col, dtype in spec['dtypes'].items()}
+    column_types.update({col: pa.dictionary(pa.int32(), pa.string()) for col in spec['categories']})
+    column_types.update({col: pa.string() for col in spec['dates']})
+    convert_options = pacsv.ConvertOptions(
+        column_types=column_types,
+        include_columns=None if columns is None else list(columns),
+        strings_can_be_null=True, # String kosong -> null, sama seperti read_csv pandas
+    )
+    table = pacsv.read_csv(csv_path, convert_options=convert_options)
+    for i, field in enumerate(table.schema):
+        if field.name in spec['dates']:
+            timestamps = pc.strptime(table.column(i), format=DATETIME_FORMAT, unit='us', error_is_null=True)
+            table = table.set_column(i, field.name, timestamps)
+        elif pa.types.is_null(field.type):
+            # Kolom yang seluruhnya kosong: pandas membacanya sebagai float64
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table
+
+
+def parse_csv_typed(csv_path, spec, columns=None):
+    """
+    Membaca CSV dengan tipe data eksplisit lalu menerapkan tipe datetime dan
+    categorical sesuai registry. Jika `columns` diisi, hanya kolom itu yang dibaca.
+    """
+    return frame_from_arrow(read_csv_arrow(csv_path, spec, columns), spec)
+
+
+def frame_from_arrow(table, spec):
+    """Tabel Arrow -> DataFrame; kategori diurutkan seperti hasil read_csv pandas (bukan urutan kemunculan)."""
+    df = table.to_pandas()
+    return df.assign(**{
+        col: df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+        for col in spec['categories'] if col in df.columns
+    })
+
+
+def iter_csv_typed(csv_path, spec, columns, chunk_rows):
+    """
+    Membaca CSV per potongan `chunk_rows` baris dengan tipe data dari registry.
+    Kolom kategori dibiarkan sebagai string agar skema setiap potongan identik.
+    """
+    dtypes = {col: dtype for col, dtype in spec['dtypes'].items() if col in columns}
+    dtypes.update({col: 'object' for col in spec['categories'] if col in columns})
+    for chunk in pd.read_csv(csv_path, usecols=columns, dtype=dtypes, chunksize=chunk_rows):
+        for col in spec['dates']:
+            if col in chunk.columns:
+                chunk[col] = pd.to_datetime(chunk[col], format=DATETIME_FORMAT, errors='coerce')
+        yield chunk
+
+
+def iter_table_chunks(table_name, columns, dataset_dir, chunk_rows):
+    """
+    Seperti iter_csv_typed untuk CSV utama sebuah tabel, ditambah batch append: baris CSV utama
+    yang digantikan batch dibuang, lalu baris batch dikirim sebagai potongan terakhir.
+    """
+    spec = TABLE_REGISTRY[table_name]
+    appended, replaced = read_appends(table_name, columns, dataset_dir)
+    replaced_ids = None if replaced is None else replaced.to_pandas()
+    for chunk in iter_csv_typed(dataset_dir / spec['file'], spec, columns, chunk_rows):
+        yield chunk if replaced_ids is None else chunk[~chunk['order_id'].isin(replaced_ids)]
+    if appended is not None and appended.num_rows:
+        # Kategori dikirim sebagai string, sama seperti potongan dari iter_csv_typed
+        appended = appended.select(list(columns))
+        for i, field in enumerate(appended.schema):
+            if pa.types.is_dictionary(field.type):
+                appended = appended.set_column(i, field.name, appended.column(i).cast(pa.string()))
+        yield appended.to_pandas()
+
+
+def snapshot_dir_for(dataset_dir):
+    """Folder snapshot untuk sebuah folder dataset (dataset lain menyimpan snapshot di dalam foldernya)."""
+    if dataset_dir == config.DATASET_DIR:
+        return config.SNAPSHOT_DIR
+    return dataset_dir / '.snapshots'
+
+
+def append_batches(dataset_dir=None):
+    """Folder batch append sebuah dataset, urut dari yang paling lama (folder berawalan titik diabaikan)."""
+    appends_dir = (dataset_dir or config.DATASET_DIR) / APPENDS_DIRNAME
+    if not appends_dir.is_dir():
+        return []
+    return sorted(path for path in appends_dir.iterdir() if path.is_dir() and not path.name.startswith('.'))
+
+
+def append_files(table_name, dataset_dir=None):
+    """File CSV batch append untuk satu tabel, urut dari yang paling lama."""
+    if table_name not in APPEND_TABLES:
+        return []
+    file_name = TABLE_REGISTRY[table_name]['file']
+    return [batch / file_name for batch in append_batches(dataset_dir) if (batch / file_name).exists()]
+
+
+def file_fingerprint(path):
+    """[ukuran, mtime] sebuah file, atau None jika file tidak ada."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def source_fingerprint(table_names, dataset_dir=None, extra_paths=()):
+    """
+    Sidik jari murah (ukuran + mtime) file CSV sumber, termasuk batch append, untuk sekumpulan tabel
+    dan file tambahan (mis. manifest laporan). Berupa dict yang bisa disimpan sebagai JSON.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    fingerprint = {}
+    for table_name in sorted(table_names):
+        fingerprint[table_name] = file_fingerprint(dataset_dir / TABLE_REGISTRY[table_name]['file'])
+        files = append_files(table_name, dataset_dir)
+        if files:
+            fingerprint[f"{table_name}+appends"] = [[path.parent.name, file_fingerprint(path)] for path in files]
+    for path in extra_paths:
+        fingerprint[str(path)] = file_fingerprint(path)
+    return fingerprint
+
+
+def read_appends(table_name, columns=None, dataset_dir=None):
+    """
+    Baris efektif dari semua batch append sebuah tabel sebagai tabel Arrow (untuk setiap
+    order_id hanya batch terbaru yang dipakai), beserta array order_id yang digantikan batch.
+    Mengembalikan (None, None) jika tabel belum pernah di-append.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    if not append_files(table_name, dataset_dir):
+        return None, None
+    table = compact_appends(table_name, dataset_dir)
+    if columns is not None:
+        table = table.select(list(dict.fromkeys(list(columns) + ['order_id'])))
+    # Setiap order_id yang pernah muncul di batch tetap punya baris dari batch terbarunya
+    return table, pc.unique(table.column('order_id')).drop_null()
+
+
+def compact_appends(table_name, dataset_dir=None):
+    """
+    Baris efektif semua batch append sebuah tabel, dipadatkan menjadi satu snapshot Arrow
+    (<snapshot>/appends/<tabel>.arrow) yang di-memory-map. Jika snapshot itu mencakup semua
+    batch kecuali yang terbaru, hanya batch baru yang diparse dan dilipat ke dalamnya, sehingga
+    biayanya sebanding dengan ukuran batch & baris append, bukan seluruh riwayat pesanan.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    with _snapshot_locks_lock:
+        lock = _snapshot_locks.setdefault((str(dataset_dir), f"{APPENDS_DIRNAME}.{table_name}"), threading.Lock())
+    with lock:
+        files = append_files(table_name, dataset_dir)
+        sources = [[path.parent.name, file_fingerprint(path)] for path in files]
+        compacted_path = snapshot_dir_for(dataset_dir) / APPENDS_DIRNAME / f"{table_name}.arrow"
+        table, covered = None, 0
+        if config.USE_SNAPSHOTS:
+            compacted_sources = _load_compacted_sources(compacted_path)
+            if compacted_sources is not None and compacted_sources == sources[:len(compacted_sources)]:
+                table, covered = feather.read_table(compacted_path, memory_map=True), len(compacted_sources)
+        record_cache(f"appends.{table_name}", hit=covered == len(files))
+        if covered == len(files):
+            return table
+
+        with stage(f"compact_appends.{table_name}") as record:
+            for path in files[covered:]:
+                batch = read_csv_arrow(path, TABLE_REGISTRY[table_name])
+                if table is not None:
+                    batch_ids = pc.unique(batch.column('order_id')).drop_null()
+                    batch = pa.concat_tables([without_orders(table, batch_ids), batch.cast(table.schema)])
+                table = batch
+            # Satu kamus per kolom kategori agar bisa ditulis sebagai file Arrow IPC
+            table = table.unify_dictionaries()
+            record['rows'] = table.num_rows
+        if config.USE_SNAPSHOTS:
+            try:
+                compacted_path.parent.mkdir(parents=True, exist_ok=True)
+                compacted_path.with_suffix('.json').unlink(missing_ok=True)
+                tmp_path = compacted_path.with_suffix(f".arrow.tmp{os.getpid()}.{threading.get_ident()}")
+                feather.write_feather(table, tmp_path, compression='uncompressed')
+                os.replace(tmp_path, compacted_path)
+                compacted_path.with_suffix('.json').write_text(json.dumps({'version': SNAPSHOT_VERSION, 'sources': sources}))
+            except OSError:
+                pass
+        return table
+
+
+def _load_compacted_sources(compacted_path):
+    """Daftar batch (nama, sidik jari) yang sudah tercakup snapshot append, atau None jika tidak bisa dipakai."""
+    try:
+        meta = json.loads(compacted_path.with_suffix('.json').read_text())
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != SNAPSHOT_VERSION or not compacted_path.exists():
+        return None
+    return meta.get('sources')
+
+
+def only_orders(table, order_ids):
+    """Baris tabel Arrow yang order_id-nya ada di `order_ids`."""
+    order_id = table.column('order_id')
+    return table.filter(pc.is_in(order_id, value_set=order_ids.cast(order_id.type)))
+
+
+def without_orders(table, order_ids):
+    """Baris tabel Arrow yang order_id-nya TIDAK ada di `order_ids`."""
+    order_id = table.column('order_id')
+    return table.filter(pc.invert(pc.is_in(order_id, value_set=order_ids.cast(order_id.type))))
+
+
+def refresh_snapshot(table_name, dataset_dir=None):
+    """
+    Memastikan snapshot Arrow sebuah tabel ada dan sesuai dengan CSV sumbernya.
+    Snapshot dibangun ulang hanya jika ukuran, mtime, atau hash file CSV berubah.
+    Mengembalikan DataFrame hasil parse jika snapshot baru dibangun, selain itu None.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    with _snapshot_locks_lock:
+        lock = _snapshot_locks.setdefault((str(dataset_dir), table_name), threading.Lock())
+    with lock:
+        return _refresh_snapshot(table_name, dataset_dir)
+
+
+def _refresh_snapshot(table_name, dataset_dir):
+    spec = TABLE_REGISTRY[table_name]
+    csv_path = dataset_dir / spec['file']
+    snapshot_dir = snapshot_dir_for(dataset_dir)
+    snapshot_path = snapshot_dir / f"{csv_path.stem}.arrow"
+    meta_path = snapshot_dir / f"{csv_path.stem}.json"
+    stat = csv_path.stat()
+
+    meta = None
+    if snapshot_path.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            meta = None
+
+    if meta and meta.get('version') == SNAPSHOT_VERSION and meta.get('size') == stat.st_size:
+        if meta.get('mtime_ns') == stat.st_mtime_ns:
+            record_cache(f"snapshot.{table_name}", hit=True)
+            return None
+        # mtime berubah (mis. file di-copy ulang), cek apakah isinya benar-benar berubah
+        source_hash = file_digest(csv_path)
+        if meta.get('hash') == source_hash:
+            meta['mtime_ns'] = stat.st_mtime_ns
+            try:
+                meta_path.write_text(json.dumps(meta))
+            except OSError:
+                pass
+            record_cache(f"snapshot.{table_name}", hit=True)
+            return None
+    else:
+        source_hash = file_digest(csv_path)
+
+    # Snapshot belum ada / kedaluwarsa: parse seluruh CSV sekali dan simpan versi bertipe
+    record_cache(f"snapshot.{table_name}", hit=False)
+    with stage(f"parse.{table_name}") as record:
+        df = parse_csv_typed(csv_path, spec)
+        record['rows'] = len(df)
+    try:
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_suffix(f".arrow.tmp{os.getpid()}.{threading.get_ident()}")
+        # Tanpa kompresi supaya bisa di-memory-map langsung saat dibaca
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, snapshot_path)
+        meta_path.write_text(json.dumps({
+            'version': SNAPSHOT_VERSION,
+            'source': spec['file'],
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': source_hash,
+        }))
+    except OSError:
+        # Folder snapshot tidak bisa ditulis (mis. filesystem read-only): tetap pakai hasil parse
+        pass
+    return df
+
+
+def _read_columns_arrow(table_name, columns, dataset_dir, order_ids=None):
+    """
+    Membaca kolom tabel sebagai tabel Arrow (memory-map snapshot, atau parse CSV jika snapshot
+    dimatikan), dengan batch append sudah diterapkan. `columns` None = semua kolom.
+    Jika `order_ids` diisi, hanya baris pesanan tersebut (disaring sebelum batch diterapkan).
+    """
+    spec = TABLE_REGISTRY[table_name]
+    appended, replaced = read_appends(table_name, columns, dataset_dir)
+    read_columns = columns
+    if (appended is not None or order_ids is not None) and columns is not None and 'order_id' not in columns:
+        read_columns = list(columns) + ['order_id']
+    if config.USE_SNAPSHOTS:
+        df = refresh_snapshot(table_name, dataset_dir)
+        snapshot_path = snapshot_dir_for(dataset_dir) / f"{(dataset_dir / spec['file']).stem}.arrow"
+        if df is None or snapshot_path.exists():
+            table = feather.read_table(snapshot_path, columns=read_columns, memory_map=True)
+        else:
+            # Snapshot gagal ditulis: pakai hasil parse yang masih di memori
+            table = pa.Table.from_pandas(df if read_columns is None else df[list(read_columns)], preserve_index=False)
+    else:
+        table = read_csv_arrow(dataset_dir / spec['file'], spec, read_columns)
+    if order_ids is not None:
+        table = only_orders(table, order_ids)
+        appended = None if appended is None else only_orders(appended, order_ids)
+    if appended is not None:
+        table = pa.concat_tables([
+            without_orders(table, replaced),
+            appended.select(table.column_names).cast(table.schema),
+        ])
+    return table if columns is None else table.select(list(columns))
+
+
+def _load_id_artifact(path, sources):
+    """Array Arrow tersimpan (kamus/kode ID) jika sidik jari sumbernya masih sama, selain itu None."""
+    try:
+        meta = json.loads(path.with_suffix('.json').read_text())
+        if meta.get('version') != SNAPSHOT_VERSION or meta.get('sources') != sources:
+            return None
+        return feather.read_table(path, memory_map=True).column(0)
+    except (OSError, ValueError, pa.ArrowInvalid):
+        return None
+
+
+def _save_id_artifact(path, sources, values):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".arrow.tmp{os.getpid()}.{threading.get_ident()}")
+        feather.write_feather(pa.table({'value': values}), tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+        path.with_suffix('.json').write_text(json.dumps({'version': SNAPSHOT_VERSION, 'sources': sources}))
+    except OSError:
+        pass
+
+
+def id_dictionary(column, dataset_dir=None):
+    """
+    Kamus bersama sebuah kolom ID: CategoricalDtype dengan kategori = semua nilai hex unik
+    (terurut) dari semua tabel yang memuat kolom itu. Kode kategori (integer padat) sama di
+    semua tabel, sehingga merge/groupby antar tabel cukup membandingkan integer.
+    Mengembalikan (dtype, nilai kamus sebagai array Arrow). Kamus disimpan di folder
+    snapshot dan dibangun ulang hanya jika CSV sumbernya berubah.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    sources = source_fingerprint(ID_COLUMNS[column], dataset_dir)
+    key = (str(dataset_dir), column)
+    with _id_lock:
+        entry = _id_dictionaries.get(key)
+        if entry is not None and entry[0] == sources:
+            return entry[1], entry[2]
+        path = snapshot_dir_for(dataset_dir) / 'ids' / f"{column}.arrow"
+        values = _load_id_artifact(path, sources) if config.USE_SNAPSHOTS else None
+        record_cache(f"ids.{column}", hit=values is not None)
+        with stage(f"ids.{column}") as record:
+            if values is None:
+                chunks = []
+                for table_name in ID_COLUMNS[column]:
+                    table_values = _read_columns_arrow(table_name, [column], dataset_dir).column(column)
+                    chunks.extend(table_values.cast(pa.large_string()).chunks)
+                values = pc.unique(pa.chunked_array(chunks, type=pa.large_string())).drop_null()
+                values = values.take(pc.sort_indices(values))
+                if config.USE_SNAPSHOTS:
+                    _save_id_artifact(path, sources, values)
+            dtype = pd.CategoricalDtype(pd.Index(values.to_pandas()), ordered=False)
+            record['rows'] = len(values)
+        _id_dictionaries[key] = (sources, dtype, values)
+        return dtype, values
+
+
+def id_codes(table_name, column, dataset_dir=None):
+    """
+    Kode kamus (int32, -1 untuk kosong) kolom ID sebuah tabel, untuk seluruh baris tabel.
+    Encode dilakukan di Arrow (index_in) lalu disimpan, jadi pemuatan berikutnya cukup
+    memory-map array integer tanpa membuat string hex per baris.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    sources = source_fingerprint(ID_COLUMNS[column], dataset_dir)
+    _, values = id_dictionary(column, dataset_dir)
+    path = snapshot_dir_for(dataset_dir) / 'ids' / f"{table_name}.{column}.arrow"
+    codes = _load_id_artifact(path, sources) if config.USE_SNAPSHOTS else None
+    if codes is None:
+        hex_values = _read_columns_arrow(table_name, [column], dataset_dir).column(column)
+        codes = pc.fill_null(pc.index_in(hex_values.cast(pa.large_string()), value_set=values), -1)
+        if config.USE_SNAPSHOTS:
+            _save_id_artifact(path, sources, codes)
+    return codes.to_numpy().astype('int32')
+
+
+def read_table(table_name, columns=None, dataset_dir=None, encode_ids=False):
+    """
+    Memuat satu tabel melalui snapshot Arrow (atau langsung dari CSV jika
+    snapshot dimatikan), termasuk batch append. Jika `columns` diisi, hanya kolom
+    tersebut yang dibaca. Jika `encode_ids`, kolom ID hex (lihat ID_COLUMNS) dimuat
+    sebagai kategori berkamus bersama; nilainya tetap hex saat ditampilkan/di-decode.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    spec = TABLE_REGISTRY[table_name]
+    with stage(f"load.{table_name}") as record:
+        table = _read_columns_arrow(table_name, columns, dataset_dir)
+        id_columns = [col for col in table.column_names if encode_ids and col in ID_COLUMNS]
+        df = frame_from_arrow(table.drop_columns(id_columns), spec)
+        if id_columns:
+            df = df.assign(**{
+                col: pd.Categorical.from_codes(
+                    id_codes(table_name, col, dataset_dir), dtype=id_dictionary(col, dataset_dir)[0], validate=False
+                )
+                for col in id_columns
+            })[table.column_names]
+        record['rows'] = len(df)
+    return df
+
+
+def read_order_rows(table_name, columns, order_ids, dataset_dir=None):
+    """
+    Baris efektif (termasuk batch append) sebuah tabel transaksi untuk sekumpulan order_id saja.
+    Hanya kolom order_id yang dipindai; baris lain tidak pernah dikonversi ke pandas.
+    """
+    table = _read_columns_arrow(table_name, list(columns), dataset_dir or config.DATASET_DIR, order_ids)
+    return frame_from_arrow(table, TABLE_REGISTRY[table_name])
+
+
+def load_tables(table_columns, dataset_dir=None, encode_ids=False, max_workers=None):
+    """
+    Memuat beberapa tabel sekaligus dengan thread pool. `table_columns` berisi
+    {nama tabel: daftar kolom atau None}. Waktu per file tercatat sebagai tahap
+    telemetri `load.<tabel>` (dan `parse.<tabel>` jika CSV diparse ulang).
+    """
+    max_workers = min(max_workers or config.INGEST_WORKERS, len(table_columns))
+    if max_workers <= 1:
+        return {
+            table_name: read_table(table_name, columns, dataset_dir, encode_ids)
+            for table_name, columns in table_columns.items()
+        }
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ecommerce-ingest') as pool:
+        futures = {
+            table_name: pool.submit(read_table, table_name, columns, dataset_dir, encode_ids)
+            for table_name, columns in table_columns.items()
+        }
+        return {table_name: future.result() for table_name, future in futures.items()}
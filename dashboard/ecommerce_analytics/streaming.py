@@ -0,0 +1,471 @@
+# streaming.py
+# Backend out-of-core: CSV dibaca per potongan, tabel transaksi dipartisi (hash order_id) ke Parquet
+# sementara di disk, lalu setiap partisi di-join & diagregasi terpisah. Yang tersimpan di memori
+# hanya agregat kecil, yang cukup untuk menghasilkan ketiga analisis dashboard.
+
+import json
+import math
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import config
+from .analyses import HISTOGRAM_BINS
+from .cache import PIPELINE_VERSION
+from .cleaning import prepare_products_data
+from .facts import (
+    DELIVERY_SOURCE_TABLES,
+    ORDER_LINE_SOURCE_TABLES,
+    PROBLEM_ORDER_STATUSES,
+    build_delivery_durations,
+    build_order_lines,
+    add_period_codes,
+    build_revenue_cube,
+    merge_revenue_cubes,
+)
+from .geo import GEO_KEYS, GEO_SOURCE_TABLES, GEO_VALUES, build_delivery_geo, load_zip_centroids
+from .rates import RATE_VALUES, daily_entity_counts, daily_order_counts
+from .rfm import CUSTOMER_DAY_KEYS, CUSTOMER_DAY_VALUES, RFM_SOURCE_TABLES, build_customer_days
+from .sketches import DELIVERY_SKETCH_SOURCE_TABLES, SKETCH_AGGREGATIONS, SKETCH_KEYS, SKETCH_VALUES, build_delivery_sketches
+from .storage import TABLE_REGISTRY, iter_table_chunks, read_order_rows, read_table, snapshot_dir_for, source_fingerprint
+from .telemetry import profiled, stage
+
+# Naikkan versi ini jika bentuk agregat berubah agar agregat tersimpan dihitung ulang
+AGGREGATES_VERSION = 6
+AGGREGATE_NAMES = (
+    'customer_days',
+    'delivery_day_counts',
+    'delivery_geo',
+    'delivery_sketches',
+    'daily_orders',
+    'daily_orders_by_category',
+    'daily_orders_by_seller',
+    'order_status_counts',
+    'problem_lines_by_category',
+    'problem_lines_by_seller',
+    'revenue_cube',
+)
+# Agregat -> (kolom kunci, kolom nilai). Nilai aditif (jumlah) kecuali yang tercantum di
+# AGGREGATE_EXTREMES, jadi agregat dari beberapa partisi/batch bisa digabung, dan kontribusi lama
+# sebuah pesanan bisa dikurangkan lagi. Kolom nilai pertama adalah jumlah baris; baris agregat
+# yang jumlahnya 0 dibuang.
+AGGREGATE_KEYS = {
+    'customer_days': (CUSTOMER_DAY_KEYS, CUSTOMER_DAY_VALUES),
+    'delivery_day_counts': (['day', 'year', 'delivery_duration_days'], ['orders']),
+    'delivery_geo': (GEO_KEYS, GEO_VALUES),
+    'delivery_sketches': (SKETCH_KEYS + ['bucket'], SKETCH_VALUES),
+    'daily_orders': (['day'], RATE_VALUES),
+    'daily_orders_by_category': (['product_category_name_display', 'day'], RATE_VALUES),
+    'daily_orders_by_seller': (['seller_id', 'day'], RATE_VALUES),
+    'order_status_counts': (['year', 'order_status'], ['orders']),
+    'problem_lines_by_category': (['year', 'order_status', 'product_category_name_display'], ['order_lines']),
+    'problem_lines_by_seller': (['year', 'order_status', 'seller_id'], ['order_lines']),
+    'revenue_cube': (['day', 'product_category_name_display', 'seller_state'], ['order_lines', 'payment_value']),
+}
+# Agregat -> {kolom nilai: 'min'/'max'} untuk nilai ekstrem yang digabung dengan min/maks, bukan jumlah
+AGGREGATE_EXTREMES = {
+    'delivery_sketches': {col: how for col, how in SKETCH_AGGREGATIONS.items() if how != 'sum'},
+}
+# Entitas tingkat pesanan bermasalah (rates.py) -> nama agregat hitungan hariannya
+DAILY_ENTITY_AGGREGATES = {
+    'product_category_name_display': 'daily_orders_by_category',
+    'seller_id': 'daily_orders_by_seller',
+}
+# Tabel transaksi besar yang dibaca per potongan & dipartisi; sisanya tabel dimensi kecil
+PARTITIONED_TABLES = ('orders', 'order_items', 'order_payments')
+STREAMING_SOURCE_TABLES = sorted(
+    set(ORDER_LINE_SOURCE_TABLES) | set(DELIVERY_SOURCE_TABLES) | set(DELIVERY_SKETCH_SOURCE_TABLES) | set(GEO_SOURCE_TABLES)
+    | set(RFM_SOURCE_TABLES)
+)
+ORDERS_COLUMNS = list(dict.fromkeys(
+    ORDER_LINE_SOURCE_TABLES['orders'] + DELIVERY_SOURCE_TABLES['orders'] + DELIVERY_SKETCH_SOURCE_TABLES['orders']
+    + GEO_SOURCE_TABLES['orders'] + RFM_SOURCE_TABLES['orders']
+))
+# Kolom tabel dimensi yang dimuat utuh (gabungan kebutuhan semua agregat)
+SELLERS_COLUMNS = list(dict.fromkeys(ORDER_LINE_SOURCE_TABLES['sellers'] + GEO_SOURCE_TABLES['sellers']))
+CUSTOMERS_COLUMNS = list(dict.fromkeys(
+    DELIVERY_SKETCH_SOURCE_TABLES['customers'] + GEO_SOURCE_TABLES['customers'] + RFM_SOURCE_TABLES['customers']
+))
+
+
+def partition_count(dataset_dir):
+    """Jumlah partisi hash: dari config, atau otomatis dari ukuran CSV transaksi."""
+    if config.STREAMING_PARTITIONS > 0:
+        return config.STREAMING_PARTITIONS
+    total_bytes = sum((dataset_dir / TABLE_REGISTRY[name]['file']).stat().st_size for name in PARTITIONED_TABLES)
+    return max(1, math.ceil(total_bytes / config.STREAMING_PARTITION_BYTES))
+
+
+def partition_of(order_ids, n_partitions):
+    """Nomor partisi untuk setiap order_id (hash deterministik, sama untuk semua tabel)."""
+    return pd.util.hash_array(order_ids.to_numpy()) % n_partitions
+
+
+def count_rows_by(df, keys, value_name):
+    """Jumlah baris per kombinasi `keys` (NA dibuang seperti group-by pandas)."""
+    return df.groupby(keys, observed=True).size().reset_index(name=value_name)
+
+
+def sum_partials(partials, keys, values, extremes=None):
+    """
+    Menjumlahkan hitungan parsial (kolom `values`) dari banyak potongan/partisi; kolom di
+    `extremes` ({kolom: 'min'/'max'}) digabung dengan min/maks.
+    """
+    partials = [part for part in partials if not part.empty] or partials[:1]
+    combined = pd.concat(partials, ignore_index=True)
+    aggregations = {col: (extremes or {}).get(col, 'sum') for col in values}
+    return combined.groupby(keys, observed=True)[values].agg(aggregations).reset_index()
+
+
+def delivery_day_counts(orders_chunk):
+    """Jumlah pesanan terkirim per (hari pemesanan, tahun, durasi) pada satu potongan orders."""
+    durations = build_delivery_durations(orders_chunk)
+    return pd.DataFrame({
+        'day': durations['order_purchase_timestamp'].to_numpy().astype('datetime64[D]').astype('int32'),
+        'year': durations['year'],
+        'delivery_duration_days': durations['delivery_duration_days'].astype('int32'),
+    }).groupby(['day', 'year', 'delivery_duration_days']).size().reset_index(name='orders')
+
+
+def orders_chunk_aggregates(orders_chunk):
+    """Agregat yang hanya membutuhkan orders, untuk satu potongan orders."""
+    return {
+        'delivery_day_counts': delivery_day_counts(orders_chunk),
+        'daily_orders': daily_order_counts(orders_chunk),
+        'order_status_counts': count_rows_by(
+            orders_chunk.assign(year=orders_chunk['order_purchase_timestamp'].dt.year.astype('Int16')),
+            ['year', 'order_status'], 'orders'
+        ),
+    }
+
+
+def order_lines_aggregates(orders_df, items_df, payments_df, products_cleaned, sellers_df):
+    """
+    Agregat yang membutuhkan join baris pesanan. Input harus memuat SEMUA baris dari
+    pesanan yang sama (satu partisi hash, atau sekumpulan pesanan), agar alokasi
+    pembayaran identik dengan join pada seluruh data.
+    """
+    order_lines = build_order_lines(orders_df, items_df, payments_df, products_cleaned, sellers_df)
+    if order_lines.empty:
+        return {}
+    return {
+        'revenue_cube': build_revenue_cube(order_lines),
+        'problem_lines_by_category': count_rows_by(
+            order_lines, ['year', 'order_status', 'product_category_name_display'], 'order_lines'
+        ),
+        'problem_lines_by_seller': count_rows_by(order_lines, ['year', 'order_status', 'seller_id'], 'order_lines'),
+        **{name: daily_entity_counts(order_lines, entity) for entity, name in DAILY_ENTITY_AGGREGATES.items()},
+    }
+
+
+def empty_items():
+    """order_items kosong untuk partisi tanpa item (sketsa tetap menghitung pesanannya)."""
+    return pd.DataFrame({
+        'order_id': pd.Series(dtype='object'), 'order_item_id': pd.Series(dtype='int16'), 'seller_id': pd.Series(dtype='object'),
+    })
+
+
+def empty_payments():
+    """order_payments kosong untuk partisi/pesanan tanpa pembayaran."""
+    return pd.DataFrame({'order_id': pd.Series(dtype='object'), 'payment_value': pd.Series(dtype='float64')})
+
+
+def finalize_aggregates(partials):
+    """Menjumlahkan agregat parsial {nama: [DataFrame, ...]} menjadi satu agregat per nama."""
+    aggregates = {}
+    for name, (keys, values) in AGGREGATE_KEYS.items():
+        parts = partials.get(name) or []
+        if name == 'revenue_cube':
+            aggregates[name] = merge_revenue_cubes(parts) if parts else add_period_codes(pd.DataFrame({
+                'day': np.array([], dtype='int32'), 'product_category_name_display': pd.Series(dtype='category'),
+                'seller_state': pd.Series(dtype='category'), 'payment_value': np.array([], dtype='float64'),
+                'order_lines': np.array([], dtype='int64'),
+            }))
+        elif parts:
+            aggregates[name] = sum_partials(parts, keys, values, AGGREGATE_EXTREMES.get(name))
+        else:
+            aggregates[name] = pd.DataFrame({col: pd.Series(dtype='int64') for col in keys + values})
+    return aggregates
+
+
+def spill_partitions(table_name, columns, dataset_dir, spill_dir, n_partitions):
+    """Membaca satu tabel transaksi per potongan dan menulis setiap baris ke file Parquet partisinya."""
+    writers = {}
+    try:
+        for chunk in iter_table_chunks(table_name, columns, dataset_dir, config.STREAMING_CHUNK_ROWS):
+            yield chunk
+            parts = partition_of(chunk['order_id'], n_partitions)
+            for part in np.unique(parts):
+                piece = chunk[parts == part]
+                if part not in writers:
+                    schema = writers[next(iter(writers))].schema if writers else pa.Schema.from_pandas(piece, preserve_index=False)
+                    writers[part] = pq.ParquetWriter(spill_dir / f"{table_name}-{part}.parquet", schema)
+                writers[part].write_table(pa.Table.from_pandas(piece, schema=writers[part].schema, preserve_index=False))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def read_partition(spill_dir, table_name, part):
+    """Membaca satu partisi (None jika tidak ada baris yang jatuh ke partisi ini)."""
+    path = spill_dir / f"{table_name}-{part}.parquet"
+    return pq.read_table(path).to_pandas() if path.exists() else None
+
+
+@profiled('streaming.compute_aggregates')
+def compute_streaming_aggregates(dataset_dir=None):
+    """
+    Menghitung semua agregat tanpa pernah memuat orders, order_items, atau order_payments
+    secara utuh. Memori puncak kira-kira sebesar satu potongan CSV atau satu partisi.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    n_partitions = partition_count(dataset_dir)
+    snapshot_dir = snapshot_dir_for(dataset_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    spill_dir = Path(tempfile.mkdtemp(prefix='spill-', dir=snapshot_dir))
+    partials = {name: [] for name in AGGREGATE_NAMES}
+    try:
+        # Tahap 1: satu kali baca setiap tabel transaksi. Agregat yang hanya butuh orders
+        # langsung dihitung per potongan, sisanya ditulis ke partisi untuk join.
+        with stage('streaming.partition.orders'):
+            for chunk in spill_partitions('orders', ORDERS_COLUMNS, dataset_dir, spill_dir, n_partitions):
+                for name, df in orders_chunk_aggregates(chunk).items():
+                    partials[name].append(df)
+        for table_name in ('order_items', 'order_payments'):
+            with stage(f"streaming.partition.{table_name}"):
+                for _ in spill_partitions(table_name, ORDER_LINE_SOURCE_TABLES[table_name], dataset_dir, spill_dir, n_partitions):
+                    pass
+
+        dimensions = load_dimensions(dataset_dir)
+
+        # Tahap 2: setiap partisi berisi semua baris dari pesanan yang sama, jadi join
+        # & alokasi pembayaran per partisi identik dengan join pada seluruh data
+        for part in range(n_partitions):
+            orders_part = read_partition(spill_dir, 'orders', part)
+            if orders_part is None:
+                continue
+            items_part = read_partition(spill_dir, 'order_items', part)
+            payments_part = read_partition(spill_dir, 'order_payments', part)
+            if payments_part is None:
+                payments_part = empty_payments()
+            with stage('streaming.partition_customers'):
+                partials['customer_days'].append(build_customer_days(orders_part, dimensions['customers'], payments_part))
+            with stage('streaming.partition_delivery'):
+                for name, df in delivery_aggregates(
+                    orders_part, items_part if items_part is not None else empty_items(), dimensions
+                ).items():
+                    partials[name].append(df)
+            if items_part is None:
+                continue
+            with stage('streaming.partition_join'):
+                for name, df in order_lines_aggregates(
+                    orders_part, items_part, payments_part, dimensions['products'], dimensions['sellers']
+                ).items():
+                    partials[name].append(df)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    return finalize_aggregates(partials)
+
+
+def load_dimensions(dataset_dir):
+    """
+    Tabel dimensi yang dimuat utuh: katalog produk, penjual, pelanggan (hanya customer_unique_id,
+    kode pos & negara bagian), dan indeks centroid kode pos (array NumPy ringkas, bukan geolocation utuh).
+    """
+    products_cleaned = prepare_products_data(
+        read_table('products', ORDER_LINE_SOURCE_TABLES['products'], dataset_dir),
+        read_table('product_category_name_translation', ORDER_LINE_SOURCE_TABLES['product_category_name_translation'], dataset_dir)
+    )
+    return {
+        'products': products_cleaned,
+        'sellers': read_table('sellers', SELLERS_COLUMNS, dataset_dir),
+        'customers': read_table('customers', CUSTOMERS_COLUMNS, dataset_dir),
+        'zip_centroids': load_zip_centroids(dataset_dir),
+    }
+
+
+def delivery_aggregates(orders_df, items_df, dimensions):
+    """Agregat pengiriman per negara bagian: sketsa durasi dan agregat jarak & rute."""
+    customers_df, sellers_df = dimensions['customers'], dimensions['sellers']
+    return {
+        'delivery_sketches': build_delivery_sketches(orders_df, items_df, customers_df, sellers_df),
+        'delivery_geo': build_delivery_geo(orders_df, items_df, customers_df, sellers_df, dimensions['zip_centroids']),
+    }
+
+
+@profiled('streaming.aggregates_for_orders')
+def aggregates_for_orders(order_ids, dataset_dir=None, dimensions=None):
+    """
+    Kontribusi sekumpulan pesanan (array Arrow order_id) ke semua agregat, dari baris
+    efektifnya saat ini. Biayanya sebanding dengan jumlah pesanan, bukan seluruh histori.
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    dimensions = dimensions or load_dimensions(dataset_dir)
+    orders_df = read_order_rows('orders', ORDERS_COLUMNS, order_ids, dataset_dir)
+    items_df = read_order_rows('order_items', ORDER_LINE_SOURCE_TABLES['order_items'], order_ids, dataset_dir)
+    payments_df = read_order_rows('order_payments', ORDER_LINE_SOURCE_TABLES['order_payments'], order_ids, dataset_dir)
+    partials = {name: [df] for name, df in orders_chunk_aggregates(orders_df).items()}
+    partials['customer_days'] = [build_customer_days(orders_df, dimensions['customers'], payments_df)]
+    for name, df in delivery_aggregates(orders_df, items_df, dimensions).items():
+        partials[name] = [df]
+    for name, df in order_lines_aggregates(orders_df, items_df, payments_df, dimensions['products'], dimensions['sellers']).items():
+        partials[name] = [df]
+    return finalize_aggregates(partials)
+
+
+def extremes_known(base, removed, keys, values, extremes):
+    """
+    Apakah min/maks setiap baris `base` masih diketahui setelah kontribusi `removed` dikurangkan.
+    Tidak diketahui jika baris masih berisi pesanan lain, nilainya tidak seragam (min != maks), dan
+    pesanan yang dikurangkan memegang nilai ekstremnya: nilai berikutnya hanya ada di data mentah.
+    """
+    if removed.empty:
+        return True
+    def as_keys(df):
+        return df[keys + values].astype({col: object for col in keys if df[col].dtype == 'category'})
+
+    merged = pd.merge(as_keys(base), as_keys(removed), on=keys, suffixes=('', '_removed'))
+    remaining = merged[values[0]] - merged[f"{values[0]}_removed"] > 0
+    uniform = merged[list(extremes)].nunique(axis=1) == 1
+    held = np.logical_or.reduce([merged[col] == merged[f"{col}_removed"] for col in extremes])
+    return not (remaining & ~uniform & held).any()
+
+
+@profiled('streaming.combine_aggregates')
+def combine_aggregates(base, added, removed):
+    """
+    Agregat `base` ditambah `added` dan dikurangi `removed` (mis. kontribusi lama pesanan yang berubah).
+    Mengembalikan None jika min/maks sebuah agregat tidak bisa diturunkan tanpa hitung ulang
+    (lihat extremes_known); pemanggil lalu menghitung ulang penuh.
+    """
+    combined = {}
+    for name, (keys, values) in AGGREGATE_KEYS.items():
+        extremes = AGGREGATE_EXTREMES.get(name, {})
+        if extremes and not extremes_known(base[name], removed[name], keys, values, extremes):
+            return None
+        # Nilai ekstrem `removed` tidak dinegasikan: tidak pernah melewati ekstrem `base` yang memuatnya
+        negated = removed[name].assign(**{col: -removed[name][col] for col in values if col not in extremes})
+        parts = [base[name], added[name], negated]
+        if name == 'revenue_cube':
+            merged = merge_revenue_cubes(parts)
+        else:
+            parts = [part[keys + values].astype({col: object for col in keys if part[col].dtype == 'category'}) for part in parts]
+            merged = sum_partials(parts, keys, values, extremes)
+        combined[name] = merged[merged[values[0]] != 0].reset_index(drop=True)
+    return combined
+
+
+def aggregates_meta(dataset_dir):
+    """Metadata yang harus cocok agar agregat tersimpan boleh dipakai."""
+    return {
+        'version': AGGREGATES_VERSION,
+        'pipeline_version': PIPELINE_VERSION,
+        'sketch_accuracy': config.SKETCH_ACCURACY,
+        'source_fingerprint': source_fingerprint(STREAMING_SOURCE_TABLES, dataset_dir),
+    }
+
+
+def read_saved_aggregates(dataset_dir=None):
+    """Agregat tersimpan jika masih sesuai dengan data sumber (termasuk batch append), selain itu None."""
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    aggregates_dir = snapshot_dir_for(dataset_dir) / 'streaming'
+    try:
+        if json.loads((aggregates_dir / 'meta.json').read_text()) == aggregates_meta(dataset_dir):
+            return {name: pd.read_parquet(aggregates_dir / f"{name}.parquet") for name in AGGREGATE_NAMES}
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def save_aggregates(aggregates, dataset_dir=None):
+    """Menyimpan agregat dengan sidik jari sumber saat ini (meta ditulis terakhir)."""
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    aggregates_dir = snapshot_dir_for(dataset_dir) / 'streaming'
+    try:
+        aggregates_dir.mkdir(parents=True, exist_ok=True)
+        (aggregates_dir / 'meta.json').unlink(missing_ok=True)
+        for name, df in aggregates.items():
+            df.to_parquet(aggregates_dir / f"{name}.parquet", index=False)
+        (aggregates_dir / 'meta.json').write_text(json.dumps(aggregates_meta(dataset_dir)))
+    except OSError:
+        pass
+
+
+def load_streaming_aggregates(dataset_dir=None):
+    """
+    Agregat backend streaming, disimpan sebagai Parquet di folder snapshot dan dihitung
+    ulang hanya jika CSV sumber (ukuran/mtime) atau versi pipeline berubah. Batch append
+    memperbarui agregat tersimpan secara inkremental (lihat appends.py).
+    """
+    dataset_dir = dataset_dir or config.DATASET_DIR
+    aggregates = read_saved_aggregates(dataset_dir)
+    if aggregates is None:
+        aggregates = compute_streaming_aggregates(dataset_dir)
+        save_aggregates(aggregates, dataset_dir)
+    return aggregates
+
+
+@profiled('analysis.delivery_stats')
+def delivery_stats_from_counts(day_counts, years):
+    """
+    Sama dengan analyses.delivery_stats, tetapi dari hitungan (hari, tahun, durasi).
+    Durasi berupa bilangan bulat hari, jadi histogram berbobot menghasilkan bin yang identik.
+    """
+    selected = day_counts[day_counts['year'].isin(years)]
+    if selected.empty:
+        return None
+    days = selected['delivery_duration_days'].to_numpy().astype('int64')
+    weights = selected['orders'].to_numpy().astype('int64')
+    count = int(weights.sum())
+    counts, edges = np.histogram(days, bins=HISTOGRAM_BINS, range=(days.min(), days.max()), weights=weights)
+    return {
+        'years': sorted(int(year) for year in years),
+        'count': count,
+        'mean': float((days * weights).sum() / count),
+        'min': int(days.min()),
+        'max': int(days.max()),
+        'histogram_counts': counts.astype('int64').tolist(),
+        'histogram_edges': edges.tolist(),
+    }
+
+
+def _ranked_counts(counts, key, value_name):
+    """Jumlahkan per `key` lalu urutkan menurun (nama sebagai pemecah seri agar deterministik)."""
+    totals = counts.groupby(key, observed=True)[value_name].sum()
+    totals = totals[totals > 0].rename('problem_order_lines').reset_index()
+    return totals.sort_values(['problem_order_lines', key], ascending=[False, True], ignore_index=True)
+
+
+@profiled('analysis.problem_orders')
+def problem_orders_from_aggregates(aggregates, years, statuses=PROBLEM_ORDER_STATUSES):
+    """Sama dengan analyses.problem_orders, dihitung dari agregat backend streaming."""
+    status_counts = aggregates['order_status_counts']
+    total_orders = int(status_counts.loc[
+        status_counts['year'].isin(years) & status_counts['order_status'].isin(statuses), 'orders'
+    ].sum())
+
+    def selected(counts):
+        return counts[counts['year'].isin(years) & counts['order_status'].isin(statuses)]
+
+    return {
+        'years': sorted(int(year) for year in years),
+        'statuses': list(statuses),
+        'total_orders': total_orders,
+        'by_category': _ranked_counts(
+            selected(aggregates['problem_lines_by_category']), 'product_category_name_display', 'order_lines'
+        ),
+        'by_seller': _ranked_counts(selected(aggregates['problem_lines_by_seller']), 'seller_id', 'order_lines'),
+    }
+
+
+def delivery_density_inputs(day_counts, years):
+    """(tanggal pemesanan ns, durasi, bobot) untuk charts.delivery_density_figure."""
+    selected = day_counts[day_counts['year'].isin(years)]
+    purchase_ns = selected['day'].to_numpy().astype('datetime64[D]').astype('datetime64[ns]').astype('int64')
+    return purchase_ns, selected['delivery_duration_days'].to_numpy(), selected['orders'].to_numpy()
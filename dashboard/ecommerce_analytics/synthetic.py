@@ -0,0 +1,322 @@
+# synthetic.py
+# Generator data sintetis berbentuk dataset Olist (sembilan tabel, skema & relasi kunci yang sama)
+# untuk mengukur perilaku pipeline pada skala 1x, 10x, 100x, dst.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .storage import DATETIME_FORMAT, TABLE_REGISTRY
+
+# Ukuran dataset asli (skala 1x)
+BASE_ROWS = {
+    'orders': 99441,
+    'products': 32951,
+    'sellers': 3095,
+    'geolocation': 1000163,
+}
+# File keterangan (skala, seed, jumlah baris) yang ditulis bersama CSV sintetis
+INFO_FILE = 'synthetic.json'
+# Jumlah pesanan per potongan saat menulis tabel transaksi (membatasi memori puncak)
+CHUNK_ORDERS = 500_000
+
+# Campuran status pesanan pada dataset asli
+ORDER_STATUS_MIX = {
+    'delivered': 0.97020,
+    'shipped': 0.01113,
+    'canceled': 0.00629,
+    'unavailable': 0.00612,
+    'invoiced': 0.00316,
+    'processing': 0.00303,
+    'created': 0.00005,
+    'approved': 0.00002,
+}
+# Jumlah item per pesanan (1..6)
+ITEMS_PER_ORDER_MIX = [0.9049, 0.0765, 0.0132, 0.0041, 0.0008, 0.0005]
+PAYMENT_TYPE_MIX = {'credit_card': 0.7392, 'boleto': 0.1904, 'voucher': 0.0556, 'debit_card': 0.0148}
+# Cicilan kartu kredit 1..10
+INSTALLMENTS_MIX = [0.4983, 0.1602, 0.1371, 0.0958, 0.0701, 0.0524, 0.0210, 0.0571, 0.0084, 0.0996]
+REVIEW_SCORE_MIX = {5: 0.5778, 4: 0.1929, 3: 0.0824, 2: 0.0318, 1: 0.1151}
+# Proporsi pelanggan yang melakukan pembelian ulang (customer_unique_id dipakai lebih dari sekali)
+REPEAT_CUSTOMER_RATE = 0.034
+FIRST_PURCHASE = np.datetime64('2016-09-04')
+LAST_PURCHASE = np.datetime64('2018-10-17')
+
+# Rentang prefix kode pos per negara bagian, bobot pelanggan/penjual, dan titik pusat (lat, lng)
+STATE_ZIP_RANGES = {
+    'SP': ((1000, 19999), 0.420, 0.597, (-23.0, -47.0)),
+    'RJ': ((20000, 28999), 0.129, 0.055, (-22.5, -43.0)),
+    'ES': ((29000, 29999), 0.020, 0.008, (-20.0, -40.5)),
+    'MG': ((30000, 39999), 0.117, 0.079, (-19.5, -44.5)),
+    'BA': ((40000, 48999), 0.034, 0.006, (-12.5, -40.0)),
+    'SE': ((49000, 49999), 0.003, 0.001, (-10.8, -37.2)),
+    'PE': ((50000, 56999), 0.017, 0.003, (-8.2, -35.5)),
+    'AL': ((57000, 57999), 0.004, 0.001, (-9.6, -36.2)),
+    'PB': ((58000, 58999), 0.005, 0.002, (-7.2, -36.5)),
+    'RN': ((59000, 59999), 0.005, 0.002, (-5.8, -36.0)),
+    'CE': ((60000, 63999), 0.013, 0.004, (-4.0, -39.0)),
+    'PI': ((64000, 64999), 0.005, 0.001, (-6.5, -42.5)),
+    'MA': ((65000, 65999), 0.008, 0.001, (-3.5, -44.5)),
+    'PA': ((66000, 68899), 0.010, 0.001, (-2.0, -49.5)),
+    'AM': ((69000, 69299), 0.002, 0.001, (-3.1, -60.0)),
+    'DF': ((70000, 72799), 0.022, 0.010, (-15.8, -47.9)),
+    'GO': ((72800, 76799), 0.020, 0.013, (-16.5, -49.5)),
+    'MT': ((78000, 78899), 0.009, 0.002, (-15.0, -56.0)),
+    'MS': ((79000, 79999), 0.007, 0.002, (-20.5, -54.6)),
+    'PR': ((80000, 87999), 0.051, 0.113, (-25.0, -51.0)),
+    'SC': ((88000, 89999), 0.037, 0.061, (-27.3, -49.5)),
+    'RS': ((90000, 99999), 0.056, 0.037, (-29.8, -52.0)),
+}
+
+
+def hex_ids(rng, n):
+    """ID heksadesimal 32 karakter (seperti MD5 di dataset asli) secara tervektorisasi."""
+    hex_pairs = np.array([f'{value:02x}' for value in range(256)], dtype='S2')
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    return hex_pairs[raw].view('S32').ravel().astype(str)
+
+
+def pick(rng, mix, n):
+    """Sampel n nilai dari dict/list proporsi (dinormalisasi)."""
+    if isinstance(mix, dict):
+        values, weights = list(mix), np.array(list(mix.values()))
+    else:
+        values, weights = np.arange(1, len(mix) + 1), np.array(mix)
+    return np.asarray(values)[rng.choice(len(weights), size=n, p=weights / weights.sum())]
+
+
+def format_timestamps(values):
+    """datetime64 -> string dengan format CSV asli ('' untuk NaT)."""
+    return pd.Series(values).dt.strftime(DATETIME_FORMAT).fillna('').to_numpy()
+
+
+def generate_zip_prefixes(rng, n, weight_index):
+    """Prefix kode pos beserta negara bagiannya, dengan bobot per negara bagian."""
+    states = list(STATE_ZIP_RANGES)
+    weights = np.array([STATE_ZIP_RANGES[state][weight_index] for state in states])
+    state_idx = rng.choice(len(states), size=n, p=weights / weights.sum())
+    lows = np.array([STATE_ZIP_RANGES[state][0][0] for state in states])
+    highs = np.array([STATE_ZIP_RANGES[state][0][1] for state in states])
+    # Pusatkan ke beberapa kota (kelipatan 100) agar prefix berulang seperti data asli
+    zips = rng.integers(lows[state_idx] // 100, highs[state_idx] // 100 + 1) * 100 + rng.integers(0, 20, n)
+    return np.minimum(zips, highs[state_idx]).astype('int32'), np.array(states)[state_idx]
+
+
+def generate_geolocation(rng, n):
+    states = list(STATE_ZIP_RANGES)
+    zips, state = generate_zip_prefixes(rng, n, 1)
+    centers = np.array([STATE_ZIP_RANGES[s][3] for s in states])
+    idx = pd.Index(states).get_indexer(state)
+    # Titik per prefix: pusat negara bagian + offset deterministik per prefix + jitter kecil
+    offset = np.stack([(zips % 97) / 97 - 0.5, (zips % 89) / 89 - 0.5], axis=1) * 3
+    coords = centers[idx] + offset + rng.normal(0, 0.02, size=(n, 2))
+    return pd.DataFrame({
+        'geolocation_zip_code_prefix': zips,
+        'geolocation_lat': coords[:, 0].round(8),
+        'geolocation_lng': coords[:, 1].round(8),
+        'geolocation_city': pd.Series(zips // 100).map(lambda code: f'cidade {code}'),
+        'geolocation_state': state,
+    })
+
+
+def generate_translation():
+    """Tabel terjemahan kategori: pakai file asli jika tersedia, selain itu nama sintetis."""
+    shipped = config.DATASET_DIR / TABLE_REGISTRY['product_category_name_translation']['file']
+    if shipped.exists():
+        return pd.read_csv(shipped)
+    return pd.DataFrame({
+        'product_category_name': [f'categoria_{i:02d}' for i in range(71)],
+        'product_category_name_english': [f'category_{i:02d}' for i in range(71)],
+    })
+
+
+def generate_products(rng, n, translation):
+    # Popularitas kategori mengikuti distribusi Zipf
+    categories = translation['product_category_name'].to_numpy()
+    weights = 1 / np.arange(1, len(categories) + 1)
+    category = categories[rng.choice(len(categories), size=n, p=weights / weights.sum())].astype(object)
+    category[rng.random(n) < 0.0185] = None # ~1.85% produk tanpa kategori
+    products = pd.DataFrame({
+        'product_id': hex_ids(rng, n),
+        'product_category_name': category,
+        'product_name_lenght': rng.integers(5, 77, n).astype(float),
+        'product_description_lenght': rng.gamma(2.0, 400, n).round().clip(4, 3992),
+        'product_photos_qty': rng.geometric(0.45, n).clip(1, 20).astype(float),
+        'product_weight_g': rng.lognormal(6.7, 1.2, n).round().clip(0, 40425),
+        'product_length_cm': rng.integers(7, 106, n).astype(float),
+        'product_height_cm': rng.integers(2, 106, n).astype(float),
+        'product_width_cm': rng.integers(6, 119, n).astype(float),
+    })
+    # Produk tanpa kategori juga tidak punya panjang nama/deskripsi/foto
+    products.loc[products['product_category_name'].isna(), ['product_name_lenght', 'product_description_lenght', 'product_photos_qty']] = np.nan
+    return products
+
+
+def generate_sellers(rng, n):
+    zips, state = generate_zip_prefixes(rng, n, 2)
+    return pd.DataFrame({
+        'seller_id': hex_ids(rng, n),
+        'seller_zip_code_prefix': zips,
+        'seller_city': pd.Series(zips // 100).map(lambda code: f'cidade {code}'),
+        'seller_state': state,
+    })
+
+
+def purchase_timestamps(rng, n):
+    """Waktu pemesanan dengan volume yang tumbuh linear sepanjang periode data."""
+    span_seconds = (LAST_PURCHASE - FIRST_PURCHASE).astype('timedelta64[s]').astype('int64')
+    # Inverse CDF dari densitas linear naik (0.2 -> 1.0)
+    u = rng.random(n)
+    a = 0.2
+    fraction = (-a + np.sqrt(a * a + u * (1 - a * a))) / (1 - a)
+    return FIRST_PURCHASE.astype('datetime64[s]') + (fraction * span_seconds).astype('timedelta64[s]')
+
+
+def generate_order_chunk(rng, n_orders, customer_unique_pool, products, sellers):
+    """Satu potongan tabel transaksi: customers, orders, order_items, order_payments, order_reviews."""
+    order_ids = hex_ids(rng, n_orders)
+    customer_ids = hex_ids(rng, n_orders)
+
+    # customer_unique_id: sebagian besar baru, sebagian kecil pelanggan lama (pembelian ulang)
+    repeat = rng.random(n_orders) < REPEAT_CUSTOMER_RATE
+    unique_ids = hex_ids(rng, n_orders)
+    if len(customer_unique_pool):
+        unique_ids[repeat] = customer_unique_pool[rng.integers(0, len(customer_unique_pool), repeat.sum())]
+    customer_zip, customer_state = generate_zip_prefixes(rng, n_orders, 1)
+    customers = pd.DataFrame({
+        'customer_id': customer_ids,
+        'customer_unique_id': unique_ids,
+        'customer_zip_code_prefix': customer_zip,
+        'customer_city': pd.Series(customer_zip // 100).map(lambda code: f'cidade {code}'),
+        'customer_state': customer_state,
+    })
+
+    status = pick(rng, ORDER_STATUS_MIX, n_orders)
+    purchase = purchase_timestamps(rng, n_orders)
+    hours = lambda values: (values * 3600).astype('int64').astype('timedelta64[s]')
+    approved = purchase + hours(rng.exponential(10, n_orders))
+    carrier = approved + hours(rng.gamma(2.0, 36, n_orders))
+    delivered = np.maximum(purchase + hours(rng.gamma(2.2, 5.5, n_orders) * 24), carrier + hours(rng.exponential(20, n_orders)))
+    estimated = (purchase + hours(rng.normal(23.5, 8.0, n_orders).clip(2, 150) * 24)).astype('datetime64[D]').astype('datetime64[s]')
+    not_approved = np.isin(status, ['created', 'canceled']) & (rng.random(n_orders) < 0.2)
+    not_shipped = ~np.isin(status, ['delivered', 'shipped'])
+    approved = np.where(not_approved, np.datetime64('NaT'), approved)
+    carrier = np.where(not_shipped, np.datetime64('NaT'), carrier)
+    delivered = np.where(status == 'delivered', delivered, np.datetime64('NaT'))
+    orders = pd.DataFrame({
+        'order_id': order_ids,
+        'customer_id': customer_ids,
+        'order_status': status,
+        'order_purchase_timestamp': format_timestamps(purchase),
+        'order_approved_at': format_timestamps(approved),
+        'order_delivered_carrier_date': format_timestamps(carrier),
+        'order_delivered_customer_date': format_timestamps(delivered),
+        'order_estimated_delivery_date': format_timestamps(estimated),
+    })
+
+    # order_items: pesanan 'unavailable' dan sebagian 'canceled' tidak punya item
+    items_per_order = pick(rng, ITEMS_PER_ORDER_MIX, n_orders)
+    items_per_order[status == 'unavailable'] = 0
+    items_per_order[(status == 'canceled') & (rng.random(n_orders) < 0.3)] = 0
+    item_order = np.repeat(np.arange(n_orders), items_per_order)
+    item_number = np.arange(len(item_order)) - np.repeat(np.cumsum(items_per_order) - items_per_order, items_per_order) + 1
+    # Item dalam satu pesanan biasanya produk & penjual yang sama
+    order_product = rng.integers(0, len(products), n_orders)
+    order_seller = rng.integers(0, len(sellers), n_orders)
+    same = rng.random(len(item_order)) < 0.8
+    product_idx = np.where(same, order_product[item_order], rng.integers(0, len(products), len(item_order)))
+    seller_idx = np.where(same, order_seller[item_order], rng.integers(0, len(sellers), len(item_order)))
+    price = np.round(rng.lognormal(4.3, 0.95, len(item_order)).clip(0.85, 6735), 2)
+    freight = np.round(rng.gamma(3.0, 6.7, len(item_order)).clip(0, 409), 2)
+    order_items = pd.DataFrame({
+        'order_id': order_ids[item_order],
+        'order_item_id': item_number,
+        'product_id': products['product_id'].to_numpy()[product_idx],
+        'seller_id': sellers['seller_id'].to_numpy()[seller_idx],
+        'shipping_limit_date': format_timestamps(purchase[item_order] + hours(np.full(len(item_order), 24 * 6.0))),
+        'price': price,
+        'freight_value': freight,
+    })
+
+    # order_payments: total item (atau nilai acak untuk pesanan tanpa item), kadang dipecah voucher
+    order_total = np.bincount(item_order, weights=price + freight, minlength=n_orders)
+    order_total = np.where(order_total > 0, order_total, np.round(rng.lognormal(4.6, 0.8, n_orders), 2))
+    payments_per_order = np.where(rng.random(n_orders) < 0.03, rng.integers(2, 5, n_orders), 1)
+    payment_order = np.repeat(np.arange(n_orders), payments_per_order)
+    payment_sequential = np.arange(len(payment_order)) - np.repeat(np.cumsum(payments_per_order) - payments_per_order, payments_per_order) + 1
+    payment_type = pick(rng, PAYMENT_TYPE_MIX, len(payment_order))
+    payment_type[payment_sequential > 1] = 'voucher'
+    installments = np.where(payment_type == 'credit_card', pick(rng, INSTALLMENTS_MIX, len(payment_order)), 1)
+    order_payments = pd.DataFrame({
+        'order_id': order_ids[payment_order],
+        'payment_sequential': payment_sequential,
+        'payment_type': payment_type,
+        'payment_installments': installments,
+        'payment_value': np.round(order_total[payment_order] / payments_per_order[payment_order], 2),
+    })
+
+    # order_reviews: hampir setiap pesanan punya satu ulasan
+    reviewed = rng.random(n_orders) < 0.998
+    review_created = (np.where(status == 'delivered', delivered, estimated)[reviewed]).astype('datetime64[D]') + np.timedelta64(1, 'D')
+    order_reviews = pd.DataFrame({
+        'review_id': hex_ids(rng, reviewed.sum()),
+        'order_id': order_ids[reviewed],
+        'review_score': pick(rng, REVIEW_SCORE_MIX, reviewed.sum()),
+        'review_comment_title': '',
+        'review_comment_message': '',
+        'review_creation_date': format_timestamps(review_created.astype('datetime64[s]')),
+        'review_answer_timestamp': format_timestamps(review_created.astype('datetime64[s]') + hours(rng.exponential(60, reviewed.sum()))),
+    })
+    return {
+        'customers': customers,
+        'orders': orders,
+        'order_items': order_items,
+        'order_payments': order_payments,
+        'order_reviews': order_reviews,
+    }
+
+
+def generate_dataset(out_dir, scale=1.0, seed=42):
+    """
+    Menulis sembilan CSV berbentuk Olist ke `out_dir`. Tabel transaksi, produk, dan penjual
+    diskalakan linear terhadap `scale`; geolocation dan terjemahan kategori tetap
+    (jumlah prefix kode pos tidak bertambah dengan jumlah pesanan).
+    Mengembalikan jumlah baris per tabel.
+    """
+    rng = np.random.default_rng(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {name: out_dir / spec['file'] for name, spec in TABLE_REGISTRY.items()}
+    row_counts = {}
+
+    translation = generate_translation()
+    products = generate_products(rng, max(1, round(BASE_ROWS['products'] * scale)), translation)
+    sellers = generate_sellers(rng, max(1, round(BASE_ROWS['sellers'] * scale)))
+    geolocation = generate_geolocation(rng, BASE_ROWS['geolocation'])
+    for name, df in [('product_category_name_translation', translation), ('products', products),
+                     ('sellers', sellers), ('geolocation', geolocation)]:
+        df.to_csv(paths[name], index=False)
+        row_counts[name] = len(df)
+
+    n_orders = max(1, round(BASE_ROWS['orders'] * scale))
+    customer_unique_pool = np.array([], dtype=str)
+    written = 0
+    while written < n_orders:
+        chunk_size = min(CHUNK_ORDERS, n_orders - written)
+        chunk = generate_order_chunk(rng, chunk_size, customer_unique_pool, products, sellers)
+        for name, df in chunk.items():
+            df.to_csv(paths[name], mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            row_counts[name] = row_counts.get(name, 0) + len(df)
+        customer_unique_pool = np.concatenate([customer_unique_pool, chunk['customers']['customer_unique_id'].unique()])
+        written += chunk_size
+    (out_dir / INFO_FILE).write_text(json.dumps({'scale': scale, 'seed': seed, 'rows': row_counts}, indent=2))
+    return row_counts
+
+
+def dataset_info(out_dir):
+    """Keterangan dataset sintetis di `out_dir`, atau None jika belum pernah dibuat."""
+    try:
+        return json.loads((out_dir / INFO_FILE).read_text())
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,267 @@
+# telemetry.py
+# Profiling per tahap (waktu, memori puncak, jumlah baris) dan statistik hit/miss cache.
+# Bisa dibaca lewat panel diagnostik di sidebar, log JSON, atau endpoint teks gaya Prometheus (/metrics).
+
+import collections
+import contextlib
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from . import config
+
+try:
+    import resource
+except ImportError:
+    # Modul resource hanya ada di Unix; di Windows RSS puncak dilaporkan tidak tersedia
+    resource = None
+
+logger = logging.getLogger('ecommerce_analytics.telemetry')
+
+# Jumlah event terakhir yang disimpan untuk panel diagnostik
+RECENT_EVENTS = 200
+
+_lock = threading.Lock()
+# nama tahap -> agregat {calls, seconds_total, seconds_max, last_seconds, last_rows, last_peak_bytes}
+_stages = {}
+# nama cache -> {'hit': n, 'miss': n}
+_caches = collections.defaultdict(lambda: {'hit': 0, 'miss': 0})
+_recent = collections.deque(maxlen=RECENT_EVENTS)
+# Tumpukan tahap yang sedang berjalan (per thread) untuk menghitung memori puncak tahap bersarang
+_local = threading.local()
+# tracemalloc bersifat global per proses: hanya satu thread yang mengukur memori puncak pada satu waktu
+_trace_lock = threading.Lock()
+_metrics_server = None
+
+if config.TELEMETRY_LOG_JSON and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+def count_rows(output):
+    """Jumlah baris hasil sebuah tahap (DataFrame, atau DataFrame pertama dalam tuple)."""
+    if isinstance(output, (pd.DataFrame, pd.Series)):
+        return len(output)
+    if isinstance(output, tuple) and output and isinstance(output[0], pd.DataFrame):
+        return len(output[0])
+    return None
+
+
+def _emit(event):
+    with _lock:
+        _recent.append(event)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(event))
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Mengukur satu tahap bernama. Isi `record['rows']` di dalam blok untuk mencatat jumlah baris.
+    Memori puncak hanya diukur jika ECOMMERCE_TRACE_MEMORY=1 (tracemalloc menambah overhead);
+    tahap bersarang ikut dihitung ke memori puncak tahap induknya.
+
+    Puncak tracemalloc berlaku untuk seluruh proses, jadi hanya satu thread yang mengukurnya pada
+    satu waktu: tahap terluar yang pertama mendapat giliran (beserta tahap bersarangnya). Tahap di
+    thread lain yang berjalan bersamaan (sesi Streamlit lain, pool muat tabel paralel) mencatat
+    memori puncak None, sedangkan alokasinya ikut terhitung ke puncak thread yang sedang mengukur.
+    """
+    record = {'rows': None}
+    frames = _local.__dict__.setdefault('frames', [])
+    if frames:
+        trace, owner = frames[-1]['trace'], False
+    else:
+        trace = owner = config.TELEMETRY_TRACE_MEMORY and _trace_lock.acquire(blocking=False)
+    if trace:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if frames:
+            frames[-1]['peak'] = max(frames[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        frame = {'start': current, 'peak': current, 'trace': True}
+    else:
+        frame = {'start': 0, 'peak': 0, 'trace': False}
+    frames.append(frame)
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        seconds = time.perf_counter() - started
+        frames.pop()
+        peak_bytes = None
+        if trace:
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            peak_bytes = frame['peak'] - frame['start']
+            if frames:
+                frames[-1]['peak'] = max(frames[-1]['peak'], frame['peak'])
+        if owner:
+            _trace_lock.release()
+        with _lock:
+            aggregate = _stages.setdefault(name, {
+                'calls': 0, 'seconds_total': 0.0, 'seconds_max': 0.0,
+                'last_seconds': 0.0, 'last_rows': None, 'last_peak_bytes': None,
+            })
+            aggregate['calls'] += 1
+            aggregate['seconds_total'] += seconds
+            aggregate['seconds_max'] = max(aggregate['seconds_max'], seconds)
+            aggregate['last_seconds'] = seconds
+            aggregate['last_rows'] = record['rows']
+            aggregate['last_peak_bytes'] = peak_bytes
+        _emit({
+            'event': 'stage',
+            'stage': name,
+            'seconds': round(seconds, 6),
+            'rows': record['rows'],
+            'peak_bytes': peak_bytes,
+            'ts': time.time(),
+        })
+
+
+def profiled(name):
+    """Dekorator: jalankan fungsi sebagai satu tahap dan catat jumlah baris hasilnya."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                output = func(*args, **kwargs)
+                record['rows'] = count_rows(output)
+                return output
+        return wrapper
+    return decorator
+
+
+def record_cache(name, hit):
+    """Mencatat satu hit/miss untuk cache bernama."""
+    with _lock:
+        _caches[name]['hit' if hit else 'miss'] += 1
+    _emit({'event': 'cache', 'cache': name, 'result': 'hit' if hit else 'miss', 'ts': time.time()})
+
+
+def stage_summary():
+    """Ringkasan semua tahap sebagai DataFrame (untuk panel diagnostik)."""
+    with _lock:
+        rows = [
+            {
+                'Tahap': name,
+                'Panggilan': item['calls'],
+                'Terakhir (dtk)': item['last_seconds'],
+                'Rata-rata (dtk)': item['seconds_total'] / item['calls'],
+                'Maks (dtk)': item['seconds_max'],
+                'Baris': item['last_rows'],
+                'Memori Puncak (MB)': None if item['last_peak_bytes'] is None else item['last_peak_bytes'] / 2**20,
+            }
+            for name, item in sorted(_stages.items())
+        ]
+    return pd.DataFrame(rows)
+
+
+def cache_summary():
+    """Ringkasan hit/miss per cache sebagai DataFrame."""
+    with _lock:
+        rows = [
+            {
+                'Cache': name,
+                'Hit': counts['hit'],
+                'Miss': counts['miss'],
+                'Rasio Hit': counts['hit'] / (counts['hit'] + counts['miss']),
+            }
+            for name, counts in sorted(_caches.items())
+        ]
+    return pd.DataFrame(rows)
+
+
+def recent_events():
+    with _lock:
+        return list(_recent)
+
+
+def max_rss_bytes():
+    """RSS puncak proses (byte), atau None jika tidak tersedia di platform ini."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KB di Linux, tetapi sudah dalam byte di macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """Semua metrik dalam format teks eksposisi Prometheus."""
+    lines = []
+
+    def metric(metric_name, metric_type, help_text, samples):
+        lines.append(f"# HELP {metric_name} {help_text}")
+        lines.append(f"# TYPE {metric_name} {metric_type}")
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels.items())
+            lines.append(f"{metric_name}{{{label_text}}} {value}" if label_text else f"{metric_name} {value}")
+
+    with _lock:
+        stages = {name: dict(item) for name, item in _stages.items()}
+        caches = {name: dict(counts) for name, counts in _caches.items()}
+    metric('ecommerce_stage_calls_total', 'counter', 'Jumlah eksekusi per tahap.',
+           [({'stage': name}, item['calls']) for name, item in sorted(stages.items())])
+    metric('ecommerce_stage_seconds_total', 'counter', 'Total waktu (detik) per tahap.',
+           [({'stage': name}, item['seconds_total']) for name, item in sorted(stages.items())])
+    metric('ecommerce_stage_last_seconds', 'gauge', 'Waktu (detik) eksekusi terakhir per tahap.',
+           [({'stage': name}, item['last_seconds']) for name, item in sorted(stages.items())])
+    metric('ecommerce_stage_last_rows', 'gauge', 'Jumlah baris hasil eksekusi terakhir per tahap.',
+           [({'stage': name}, item['last_rows']) for name, item in sorted(stages.items()) if item['last_rows'] is not None])
+    metric('ecommerce_stage_last_peak_bytes', 'gauge', 'Memori puncak (byte, tracemalloc) eksekusi terakhir.',
+           [({'stage': name}, item['last_peak_bytes']) for name, item in sorted(stages.items()) if item['last_peak_bytes'] is not None])
+    metric('ecommerce_cache_requests_total', 'counter', 'Jumlah pemanggilan cache per hasil (hit/miss).',
+           [({'cache': name, 'result': result}, counts[result]) for name, counts in sorted(caches.items()) for result in ('hit', 'miss')])
+    max_rss = max_rss_bytes()
+    metric('ecommerce_process_max_rss_bytes', 'gauge', 'RSS puncak proses (byte).',
+           [({}, max_rss)] if max_rss is not None else [])
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Jangan tulis access log scraper ke stderr
+        pass
+
+
+def start_metrics_server(port=None, host=None):
+    """
+    Menjalankan endpoint /metrics di thread latar (sekali per proses).
+    Mengembalikan server yang berjalan, atau None jika port tidak diset / sudah dipakai.
+    """
+    global _metrics_server
+    port = config.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host or config.METRICS_HOST, port), _MetricsHandler)
+            except OSError:
+                logger.warning("Endpoint metrik tidak bisa dijalankan di port %s", port)
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, name='ecommerce-metrics', daemon=True).start()
+    return _metrics_server
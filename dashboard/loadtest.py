@@ -0,0 +1,322 @@
+# loadtest.py
+# Uji beban dashboard: menjalankan server `streamlit run main.py` sungguhan lalu membuka N sesi
+# websocket bersamaan (seperti N tab browser) yang berpindah-pindah bagian analisis secara acak.
+# Melaporkan persentil latensi per rerun (dari pesan rerun dikirim sampai script selesai) dan RSS
+# proses server, untuk memastikan data yang dimuat dibagikan antar sesi (memori tidak tumbuh
+# linear dengan jumlah sesi).
+#
+# Setiap sesi adalah klien protokol Streamlit minimal: mengirim BackMsg rerun_script berisi state
+# widget radio di sidebar dan membaca ForwardMsg sampai script_finished. Semua sesi dilayani satu
+# proses server, jadi rerun benar-benar tumpang tindih (thread ScriptRunner per sesi).
+#
+#   cd dashboard
+#   python loadtest.py --sessions 30 --reruns 20
+#   ECOMMERCE_BACKEND=streaming python loadtest.py --sessions 30 --out loadtest.json
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+MAIN_SCRIPT = Path(__file__).resolve().parent / 'main.py'
+# Persentil latensi yang dilaporkan
+LATENCY_PERCENTILES = (50, 90, 99)
+# Batas waktu server siap menerima koneksi (detik)
+SERVER_START_TIMEOUT = 60
+# Label bagian untuk rerun pertama setiap sesi (tampilan awal, sebelum pindah bagian)
+INITIAL_VIEW = 'Tampilan awal'
+RECORD_COLUMNS = ['session', 'step', 'section', 'seconds', 'errors']
+
+
+def free_port():
+    """Port TCP lokal yang sedang tidak dipakai."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_rss_mb(pid):
+    """RSS proses `pid` saat ini (MB) dari /proc atau `ps`; None jika keduanya tidak tersedia."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        output = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)], capture_output=True, text=True, check=True).stdout
+        return int(output.strip()) / 1024
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+class RssSampler:
+    """Mencatat RSS proses server secara berkala di thread latar selama uji beban berjalan."""
+
+    def __init__(self, pid, interval):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        rss = process_rss_mb(self.pid)
+        if rss is not None:
+            self.samples.append(rss)
+
+    def _run(self):
+        while not self.done.is_set():
+            self._sample()
+            self.done.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.thread.join()
+        self._sample()
+
+    def peak(self):
+        return max(self.samples) if self.samples else None
+
+
+class StreamlitServer:
+    """Server `streamlit run main.py` (headless) di port bebas; environment diwariskan (ECOMMERCE_*)."""
+
+    def __init__(self, port=None):
+        self.port = port or free_port()
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen([
+            sys.executable, '-m', 'streamlit', 'run', str(MAIN_SCRIPT),
+            '--server.headless', 'true',
+            '--server.port', str(self.port),
+            '--server.fileWatcherType', 'none',
+            '--browser.gatherUsageStats', 'false',
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server Streamlit berhenti saat start (kode {self.process.returncode})")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as response:
+                    if response.read() == b'ok':
+                        return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"Server Streamlit tidak siap dalam {SERVER_START_TIMEOUT} detik")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def stream_url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+
+class Session:
+    """Satu sesi browser: koneksi websocket sendiri (session state sendiri di server)."""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.websocket = None
+        self.radio_id = None
+        self.sections = []
+
+    async def __aenter__(self):
+        self.websocket = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.websocket.close()
+
+    async def rerun(self, section=None):
+        """
+        Satu rerun (tampilan awal jika `section` None, selain itu pindah ke bagian tersebut);
+        mengembalikan (detik sampai script selesai, jumlah error di halaman).
+        """
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        if section is not None:
+            widget = message.rerun_script.widget_states.widgets.add()
+            widget.id = self.radio_id
+            widget.string_value = section
+        started = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        errors = await asyncio.wait_for(self._read_until_finished(), self.timeout)
+        return time.perf_counter() - started, errors
+
+    async def _read_until_finished(self):
+        """Membaca ForwardMsg sampai script_finished; menghitung elemen exception di halaman."""
+        errors = 0
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.websocket.recv())
+            kind = forward.WhichOneof('type')
+            if kind == 'script_finished':
+                # Selain selesai normal (0) berarti gagal kompilasi atau dihentikan
+                return errors + int(forward.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY)
+            if kind != 'delta' or forward.delta.WhichOneof('type') != 'new_element':
+                continue
+            element = forward.delta.new_element
+            element_type = element.WhichOneof('type')
+            if element_type == 'exception':
+                errors += 1
+            elif element_type == 'radio' and self.radio_id is None:
+                # Radio pertama = pilihan area analisis di sidebar
+                self.radio_id = element.radio.id
+                self.sections = list(element.radio.options)
+
+
+async def warm_up(url, timeout):
+    """Satu sesi mengunjungi semua bagian agar cache di server terisi sebelum pengukuran."""
+    async with Session(url, timeout) as session:
+        errors = (await session.rerun())[1]
+        for section in session.sections:
+            errors += (await session.rerun(section))[1]
+        return session.sections, errors
+
+
+async def run_session(url, session_id, sections, reruns, seed, timeout):
+    """
+    Satu sesi: tampilan awal (langkah 0, dicatat sebagai INITIAL_VIEW) lalu `reruns` kali pindah
+    ke bagian acak (urutan deterministik per seed & sesi).
+    """
+    rng = random.Random(seed * 100_003 + session_id)
+    async with Session(url, timeout) as session:
+        seconds, errors = await session.rerun()
+        records = [{'session': session_id, 'step': 0, 'section': INITIAL_VIEW, 'seconds': seconds, 'errors': errors}]
+        for step in range(1, reruns + 1):
+            section = rng.choice(sections)
+            seconds, errors = await session.rerun(section)
+            records.append({'session': session_id, 'step': step, 'section': section, 'seconds': seconds, 'errors': errors})
+        return records
+
+
+async def run_sessions(url, sessions, sections, reruns, seed, timeout):
+    """Semua sesi bersamaan; mengembalikan gabungan catatan rerun."""
+    results = await asyncio.gather(*[
+        run_session(url, session_id, sections, reruns, seed, timeout) for session_id in range(sessions)
+    ])
+    return [record for records in results for record in records]
+
+
+def latency_summary(seconds):
+    """Jumlah rerun, persentil, dan maksimum latensi (milidetik)."""
+    seconds = np.asarray(seconds, dtype='float64') * 1000
+    summary = {'reruns': int(len(seconds))}
+    for percentile in LATENCY_PERCENTILES:
+        summary[f"p{percentile}_ms"] = float(np.percentile(seconds, percentile)) if len(seconds) else None
+    summary['max_ms'] = float(seconds.max()) if len(seconds) else None
+    return summary
+
+
+def run_loadtest(sessions, reruns, seed=0, timeout=300, sample_interval=0.2, port=None):
+    """
+    Menjalankan server, uji beban, lalu mematikan server. Ringkasan: latensi keseluruhan & per bagian
+    (termasuk tampilan awal setiap sesi), jumlah error, dan RSS server (sebelum muat data, setelah pemanasan, puncak selama uji, per sesi;
+    None jika RSS tidak bisa dibaca di platform ini).
+    """
+    with StreamlitServer(port) as server:
+        rss_start = process_rss_mb(server.pid)
+        with RssSampler(server.pid, sample_interval) as warm_sampler:
+            sections, warm_errors = asyncio.run(warm_up(server.stream_url, timeout))
+        rss_warm = warm_sampler.peak()
+
+        started = time.perf_counter()
+        with RssSampler(server.pid, sample_interval) as sampler:
+            records = asyncio.run(run_sessions(server.stream_url, sessions, sections, reruns, seed, timeout))
+        elapsed = time.perf_counter() - started
+
+    frame = pd.DataFrame(records, columns=RECORD_COLUMNS)
+    rss_peak = sampler.peak()
+    return {
+        'sessions': sessions,
+        'reruns_per_session': reruns,
+        'seed': seed,
+        'seconds': elapsed,
+        'errors': int(frame['errors'].sum()) + warm_errors,
+        'latency': latency_summary(frame['seconds']),
+        'latency_by_section': {
+            section: latency_summary(group['seconds']) for section, group in frame.groupby('section', sort=False)
+        },
+        'rss_mb': {
+            'start': rss_start,
+            'after_warm_up': rss_warm,
+            'peak': rss_peak,
+            'end': sampler.samples[-1] if sampler.samples else None,
+            # Pertambahan memori per sesi di atas data bersama (idealnya hanya state widget & grafik)
+            'per_session': (rss_peak - rss_warm) / max(sessions, 1) if rss_peak is not None and rss_warm is not None else None,
+        },
+    }
+
+
+def print_report(report):
+    """Mencetak ringkasan uji beban dalam bentuk tabel teks."""
+    rows = [{'Bagian': 'Semua', **report['latency']}]
+    rows += [{'Bagian': section, **summary} for section, summary in report['latency_by_section'].items()]
+    table = pd.DataFrame(rows).rename(columns={'reruns': 'Rerun', 'max_ms': 'Maks (ms)'})
+    table = table.rename(columns={f"p{p}_ms": f"P{p} (ms)" for p in LATENCY_PERCENTILES})
+    print(f"{report['sessions']} sesi x (tampilan awal + {report['reruns_per_session']} rerun) dalam {report['seconds']:.1f} dtk, "
+          f"{report['errors']} error")
+    print(table.to_string(index=False, float_format=lambda value: f"{value:,.0f}"))
+    rss = report['rss_mb']
+    if rss['peak'] is None:
+        print("RSS server tidak tersedia di platform ini")
+        return
+    print(f"RSS server (MB): awal {rss['start']:.0f}, setelah pemanasan {rss['after_warm_up']:.0f}, "
+          f"puncak {rss['peak']:.0f}, akhir {rss['end']:.0f}, per sesi {rss['per_session']:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python loadtest.py',
+        description='Uji beban dashboard: server Streamlit sungguhan dengan banyak sesi websocket bersamaan.'
+    )
+    parser.add_argument('--sessions', type=int, default=30, help='Jumlah sesi bersamaan.')
+    parser.add_argument('--reruns', type=int, default=20, help='Jumlah perpindahan bagian per sesi.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300, help='Batas waktu satu rerun (detik).')
+    parser.add_argument('--port', type=int, default=None, help='Port server Streamlit (default: port bebas).')
+    parser.add_argument('--out', type=Path, default=None, help='Simpan ringkasan sebagai JSON.')
+    args = parser.parse_args(argv)
+
+    report = run_loadtest(args.sessions, args.reruns, args.seed, args.timeout, port=args.port)
+    print_report(report)
+    if args.out is not None:
+        args.out.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"Hasil disimpan di {args.out}")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,91 +6,345 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np # Untuk operasi numerik, misal nanmean
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor # Memuat tabel-tabel sebuah bagian secara bersamaan
+
+# Logika analisis ada di paket ecommerce_analytics (folder yang sama dengan main.py)
+from ecommerce_analytics import category_revenue, config, read_report, telemetry
+from ecommerce_analytics.cache import fingerprint_cache
+from ecommerce_analytics.charts import (
+    delivery_density_figure,
+    delivery_histogram_figure,
+    delivery_percentile_trend_figure,
+    delivery_scatter_figure,
+    distance_band_figure,
+    late_delivery_by_state_figure,
+    rfm_treemap_figure,
+    state_pair_heatmap_figure,
+)
+from ecommerce_analytics.cleaning import clean_orders_data
+from ecommerce_analytics.facts import (
+    DELIVERY_SOURCE_TABLES,
+    ORDER_LINE_SOURCE_TABLES,
+    PROBLEM_ORDER_SOURCE_TABLES,
+    REVENUE_GRANULARITIES,
+    build_revenue_cube,
+    cube_date_bounds,
+    load_delivery_durations,
+    load_order_lines,
+)
+from ecommerce_analytics.geo import (
+    GEO_SOURCE_TABLES,
+    delivery_geo_totals,
+    distance_band_summary,
+    load_delivery_geo,
+    state_pair_summary,
+)
+from ecommerce_analytics.rates import (
+    RATE_ENTITIES,
+    build_rate_index,
+    daily_entity_counts,
+    daily_order_counts,
+    index_date_bounds,
+    problem_rates,
+    range_totals,
+)
+from ecommerce_analytics.reports import MANIFEST_FILE, REPORT_SOURCE_TABLES
+from ecommerce_analytics.rfm import (
+    RFM_SOURCE_TABLES,
+    build_rfm_index,
+    load_customer_days,
+    rfm_date_bounds,
+    rfm_scores,
+    segment_states,
+    segment_summary,
+    top_customers,
+)
+from ecommerce_analytics.sketches import (
+    DEFAULT_QUANTILES,
+    DELIVERY_SKETCH_SOURCE_TABLES,
+    delivery_percentile_trend,
+    delivery_stats_from_sketches,
+    late_delivery_by_state,
+    load_delivery_sketches,
+    quantile_column,
+)
+from ecommerce_analytics.storage import TABLE_REGISTRY, append_batches, read_table
+from ecommerce_analytics.streaming import (
+    AGGREGATE_NAMES,
+    DAILY_ENTITY_AGGREGATES,
+    STREAMING_SOURCE_TABLES,
+    delivery_density_inputs,
+    load_streaming_aggregates,
+)
 
 # --- 1. Konfigurasi Halaman Streamlit ---
 st.set_page_config(layout="wide", page_title="Dashboard Analisis Penjualan E-commerce", initial_sidebar_state="expanded")
+# Endpoint /metrics untuk scraper lokal (hanya jika ECOMMERCE_METRICS_PORT diset; sekali per proses)
+telemetry.start_metrics_server()
 
 # --- 2. Fungsi untuk Memuat Data (dengan cache agar lebih cepat) ---
-# Folder tempat file main.py berada (dashboard)
-BASE_DIR = Path(__file__).resolve().parent
-
-# Folder datasets ada di satu level atas dashboard
-DATASET_DIR = BASE_DIR.parent / "datasets"
-
-@st.cache_data
-def load_data():
-    customers_df = pd.read_csv(DATASET_DIR / 'customers_dataset.csv')
-    geolocation_df = pd.read_csv(DATASET_DIR / 'geolocation_dataset.csv')
-    order_items_df = pd.read_csv(DATASET_DIR / 'order_items_dataset.csv')
-    order_payments_df = pd.read_csv(DATASET_DIR / 'order_payments_dataset.csv')
-    order_reviews_df = pd.read_csv(DATASET_DIR / 'order_reviews_dataset.csv')
-    orders_df = pd.read_csv(DATASET_DIR / 'orders_dataset.csv')
-    product_category_name_translation_df = pd.read_csv(DATASET_DIR / 'product_category_name_translation.csv')
-    products_df = pd.read_csv(DATASET_DIR / 'products_dataset.csv')
-    sellers_df = pd.read_csv(DATASET_DIR / 'sellers_dataset.csv')
-
-    return customers_df, geolocation_df, order_items_df, order_payments_df, \
-           order_reviews_df, orders_df, product_category_name_translation_df, \
-           products_df, sellers_df
-
-# Contoh pemanggilan
-customers_df, geolocation_df, order_items_df, order_payments_df, \
-order_reviews_df, orders_df, product_category_name_translation_df, \
-products_df, sellers_df = load_data()
-
-# --- 3. Fungsi untuk Pembersihan dan Pra-pemrosesan Data ---
-@st.cache_data
-def clean_and_prepare_data(orders_df, products_df, product_category_name_translation_df):
+# Semua cache di bawah berlaku per proses (dibagikan ke semua sesi) dan dikunci dengan sidik jari
+# file sumber (path + ukuran + mtime + versi pipeline), bukan hash isi DataFrame. Setiap pemanggil
+# mendapat salinan dangkal copy-on-write (atau salinan penuh tanpa copy-on-write, lihat cache.share),
+# jadi mengubah hasilnya tidak merusak cache.
+# Bagian analisis dilayani dari agregat tersimpan (lihat get_streaming_aggregates) pada backend
+# streaming, dan juga pada backend pandas setelah dataset menerima batch append: agregat itu
+# diperbarui inkremental oleh `append`, jadi refresh setelah batch baru tidak membangun ulang
+# tabel turunan dari seluruh riwayat pesanan.
+SERVE_AGGREGATES = config.BACKEND == 'streaming' or bool(append_batches())
+# Tabel yang dimuat oleh setiap bagian analisis: nama tabel -> kolom yang dibaca dari CSV, atau
+# None untuk tabel turunan yang dibangun sekali per proses (lihat load_section_tables). Durasi
+# pengiriman dilayani dari hitungan per durasi jika agregat tersimpan dipakai (SERVE_AGGREGATES).
+SECTION_TABLES = {
+    "1. Durasi Pengiriman": {
+        'delivery_day_counts' if SERVE_AGGREGATES else 'delivery_durations': None,
+        'delivery_sketches': None,
+    },
+    "2. Pesanan Bermasalah (Dibatalkan/Tidak Tersedia)": {
+        'daily_orders': None,
+        **{name: None for name in DAILY_ENTITY_AGGREGATES.values()},
+    },
+    "3. Pendapatan Kategori Produk": {
+        'revenue_cube': None,
+    },
+    "4. Jarak & Rute Pengiriman": {
+        'delivery_geo': None,
+    },
+    "5. Segmentasi Pelanggan (RFM)": {
+        'customer_days': None,
+    },
+}
+
+
+@fingerprint_cache(TABLE_REGISTRY)
+def load_table(table_name, columns):
+    """Memuat satu tabel (hanya kolom yang diminta) saat pertama kali dibutuhkan."""
+    return read_table(table_name, list(columns))
+
+
+@fingerprint_cache(DELIVERY_SOURCE_TABLES)
+def get_delivery_durations():
+    """Durasi pengiriman seluruh pesanan, dihitung sekali per proses."""
+    return load_delivery_durations()
+
+
+@fingerprint_cache(DELIVERY_SKETCH_SOURCE_TABLES)
+def get_delivery_sketches():
     """
-    Melakukan pembersihan data dan penggabungan kategori produk
-    untuk analisis.
+    Sketsa kuantil durasi pengiriman per (bulan, negara bagian pelanggan, negara bagian penjual),
+    dibangun sekali per proses; setiap filter di bagian 1 dijawab dengan menggabungkan sketsa.
     """
-    # orders_df: Mengubah kolom tanggal menjadi tipe datetime
-    date_columns_orders = [
-        'order_purchase_timestamp',
-        'order_approved_at',
-        'order_delivered_carrier_date',
-        'order_delivered_customer_date',
-        'order_estimated_delivery_date'
-    ]
-    for col in date_columns_orders:
-        orders_df[col] = pd.to_datetime(orders_df[col], errors='coerce')
-
-    # products_df: Mengisi nilai hilang pada kolom numerik & kategori
-    products_df['product_category_name'].fillna('unknown_category', inplace=True)
-    numerical_product_cols_to_fill = [
-        'product_name_lenght', 'product_description_lenght', 'product_photos_qty',
-        'product_weight_g', 'product_length_cm', 'product_height_cm', 'product_width_cm'
-    ]
-    for col in numerical_product_cols_to_fill:
-        if col in products_df.columns and products_df[col].isnull().any():
-            median_val = products_df[col].median()
-            products_df[col].fillna(median_val, inplace=True)
-
-    # Gabungkan produk dengan terjemahan kategori
-    products_df_translated = pd.merge(
-        products_df,
-        product_category_name_translation_df,
-        on='product_category_name',
-        how='left'
-    )
-    # Gunakan nama kategori bahasa Inggris untuk tampilan, jika tidak ada, pakai yang asli
-    products_df_translated['product_category_name_display'] = products_df_translated['product_category_name_english'].fillna(
-        products_df_translated['product_category_name']
-    )
+    if SERVE_AGGREGATES:
+        return get_streaming_aggregates()['delivery_sketches']
+    return load_delivery_sketches()
+
+
+@fingerprint_cache(ORDER_LINE_SOURCE_TABLES)
+def get_order_lines():
+    """Tabel fakta baris pesanan, dibangun sekali per proses dan dipakai bersama oleh semua sesi."""
+    return load_order_lines()
+
+
+@fingerprint_cache(STREAMING_SOURCE_TABLES)
+def get_streaming_aggregates():
+    """
+    Agregat backend streaming, dihitung tanpa memuat tabel transaksi secara utuh dan disimpan
+    di folder snapshot sampai CSV sumber berubah; batch append memperbaruinya secara inkremental.
+    """
+    return load_streaming_aggregates()
+
+
+@fingerprint_cache(PROBLEM_ORDER_SOURCE_TABLES)
+def get_daily_orders():
+    """Jumlah pesanan & pesanan bermasalah per hari pemesanan (seluruh pesanan)."""
+    if SERVE_AGGREGATES:
+        return get_streaming_aggregates()['daily_orders']
+    return daily_order_counts(clean_orders_data(load_table('orders', tuple(PROBLEM_ORDER_SOURCE_TABLES['orders']))))
+
+
+@fingerprint_cache(ORDER_LINE_SOURCE_TABLES)
+def get_daily_entity_orders(entity):
+    """Jumlah pesanan & pesanan bermasalah per (kategori produk/penjual, hari pemesanan)."""
+    if SERVE_AGGREGATES:
+        return get_streaming_aggregates()[DAILY_ENTITY_AGGREGATES[entity]]
+    return daily_entity_counts(get_order_lines(), entity)
+
+
+@fingerprint_cache(sorted(set(PROBLEM_ORDER_SOURCE_TABLES) | set(ORDER_LINE_SOURCE_TABLES)))
+def get_rate_index(entity=None):
+    """
+    Indeks jumlah kumulatif untuk tingkat pesanan bermasalah (entity=None: seluruh pesanan).
+    Dibangun sekali per proses; setiap perubahan rentang tanggal hanya berupa lookup.
+    """
+    return build_rate_index(get_daily_orders() if entity is None else get_daily_entity_orders(entity), entity)
+
+
+@fingerprint_cache(ORDER_LINE_SOURCE_TABLES)
+def get_revenue_cube():
+    """Kubus pendapatan yang dibangun sekali per proses dari tabel fakta baris pesanan."""
+    if SERVE_AGGREGATES:
+        return get_streaming_aggregates()['revenue_cube']
+    return build_revenue_cube(get_order_lines())
+
+
+@fingerprint_cache(GEO_SOURCE_TABLES)
+def get_delivery_geo():
+    """
+    Agregat pengiriman per (tahun, rute negara bagian, pita jarak). Indeks centroid kode pos
+    dan jarak haversine dihitung sekali per proses; filter di bagian 4 hanya meringkas agregat ini.
+    """
+    if SERVE_AGGREGATES:
+        return get_streaming_aggregates()['delivery_geo']
+    return load_delivery_geo()
 
-    return orders_df, products_df_translated
 
-# --- 4. Memuat dan Membersihkan Data ---
-customers_df, geolocation_df, order_items_df, order_payments_df, \
-order_reviews_df, orders_df, product_category_name_translation_df, \
-products_df, sellers_df = load_data()
+@fingerprint_cache(RFM_SOURCE_TABLES)
+def get_customer_days():
+    """Jumlah pesanan & pembayaran per (pelanggan unik, negara bagian, hari pemesanan)."""
+    if SERVE_AGGREGATES:
+        return get_streaming_aggregates()['customer_days']
+    return load_customer_days()
 
-orders_df_cleaned, products_df_cleaned = clean_and_prepare_data(orders_df, products_df, product_category_name_translation_df)
 
+@fingerprint_cache(RFM_SOURCE_TABLES)
+def get_rfm_index():
+    """Indeks pelanggan RFM, dibangun sekali per proses; setiap tanggal snapshot hanya berupa reduksi per pelanggan."""
+    return build_rfm_index(get_customer_days())
 
-# --- 5. Judul Dashboard Utama ---
+
+@fingerprint_cache(REPORT_SOURCE_TABLES, extra_paths=[config.REPORTS_DIR / MANIFEST_FILE])
+def get_precomputed_report(kind, years):
+    """Laporan hasil `python -m ecommerce_analytics reports` (None jika belum ada / data berubah)."""
+    return read_report(kind, years)
+
+
+def load_section_tables(section):
+    """Memuat semua tabel yang dideklarasikan oleh satu bagian analisis (paralel, satu thread per tabel)."""
+    derived_tables = {
+        'delivery_durations': get_delivery_durations,
+        'delivery_sketches': get_delivery_sketches,
+        'daily_orders': get_daily_orders,
+        'order_lines': get_order_lines,
+        'revenue_cube': get_revenue_cube,
+        'delivery_geo': get_delivery_geo,
+        'customer_days': get_customer_days,
+    }
+    for entity, name in DAILY_ENTITY_AGGREGATES.items():
+        derived_tables[name] = lambda entity=entity: get_daily_entity_orders(entity)
+    for name in AGGREGATE_NAMES:
+        derived_tables.setdefault(name, lambda name=name: get_streaming_aggregates()[name])
+    loaders = {
+        table_name: (derived_tables[table_name], ()) if table_name in derived_tables else (load_table, (table_name, tuple(columns)))
+        for table_name, columns in SECTION_TABLES[section].items()
+    }
+    with ThreadPoolExecutor(max_workers=min(config.INGEST_WORKERS, len(loaders))) as pool:
+        futures = {table_name: pool.submit(loader, *args) for table_name, (loader, args) in loaders.items()}
+        return {table_name: future.result() for table_name, future in futures.items()}
+
+
+def section_load_report(tables):
+    """Ringkasan jumlah baris, kolom, dan memori dari tabel yang dimuat sebuah bagian."""
+    report = pd.DataFrame([
+        {
+            'Tabel': table_name,
+            'Baris': len(df),
+            'Kolom': df.shape[1],
+            'Memori (MB)': df.memory_usage(deep=True).sum() / 1e6
+        }
+        for table_name, df in tables.items()
+    ])
+    return report
+
+
+@fingerprint_cache(sorted(set(DELIVERY_SOURCE_TABLES) | set(DELIVERY_SKETCH_SOURCE_TABLES)))
+def build_delivery_figures(selected_years, customer_states=(), seller_states=()):
+    """
+    Statistik dan grafik durasi pengiriman, di-cache per kombinasi tahun & negara bagian yang dipilih.
+    Statistik, persentil, dan keterlambatan dijawab dari gabungan sketsa (tanpa memindai pesanan).
+    """
+    sketches = get_delivery_sketches()
+    filters = {'customer_states': list(customer_states), 'seller_states': list(seller_states)}
+    stats = delivery_stats_from_sketches(sketches, selected_years, **filters)
+    if stats is None:
+        return None
+    quantile_columns = [quantile_column(quantile) for quantile in DEFAULT_QUANTILES]
+    figures = {
+        'stats': stats,
+        'fig_hist': delivery_histogram_figure(stats),
+        'fig_trend': delivery_percentile_trend_figure(
+            delivery_percentile_trend(sketches, selected_years, **filters), quantile_columns
+        ),
+        'fig_late_customer': late_delivery_by_state_figure(
+            late_delivery_by_state(sketches, selected_years, 'customer_state', **filters),
+            'customer_state', 'Negara Bagian Pelanggan'
+        ),
+        'fig_late_seller': late_delivery_by_state_figure(
+            late_delivery_by_state(sketches, selected_years, 'seller_state', **filters),
+            'seller_state', 'Negara Bagian Penjual'
+        ),
+    }
+
+    # Grafik durasi per pesanan tidak menyimpan negara bagian, jadi hanya difilter per tahun
+    if SERVE_AGGREGATES:
+        # Agregat hanya menyimpan hitungan per hari, jadi grafik selalu berupa heatmap densitas
+        day_counts = get_streaming_aggregates()['delivery_day_counts']
+        figures['fig_scatter'] = delivery_density_figure(*delivery_density_inputs(day_counts, selected_years))
+        figures['scatter_mode'] = 'density'
+    else:
+        durations = get_delivery_durations()
+        durations = durations[durations['year'].isin(selected_years)]
+        figures['fig_scatter'], figures['scatter_mode'] = delivery_scatter_figure(durations)
+        figures['scatter_orders'] = len(durations)
+    return figures
+
+
+@fingerprint_cache(GEO_SOURCE_TABLES)
+def build_geo_figures(selected_years, min_shipments, heatmap_value):
+    """Ringkasan & grafik jarak dan rute pengiriman, di-cache per pilihan tahun, ambang volume, dan metrik heatmap."""
+    delivery_geo = get_delivery_geo()
+    totals = delivery_geo_totals(delivery_geo, selected_years)
+    if totals is None:
+        return None
+    state_pairs = state_pair_summary(delivery_geo, selected_years, min_shipments)
+    value_column, value_label = heatmap_value
+    return {
+        'totals': totals,
+        'fig_bands': distance_band_figure(distance_band_summary(delivery_geo, selected_years)),
+        'fig_pairs': state_pair_heatmap_figure(state_pairs, value_column, value_label),
+        'state_pairs': state_pairs,
+    }
+
+
+@fingerprint_cache(RFM_SOURCE_TABLES)
+def build_rfm_view(as_of):
+    """Skor RFM semua pelanggan, ringkasan segmen, dan treemap untuk satu tanggal snapshot."""
+    rfm = rfm_scores(get_rfm_index(), as_of)
+    if rfm.empty:
+        return None
+    segments = segment_summary(rfm)
+    return {
+        'rfm': rfm,
+        'segments': segments,
+        'fig_treemap': rfm_treemap_figure(segments, segment_states(rfm)),
+    }
+
+
+def describe_ranked_entities(ranked, entity, sort_by):
+    """Daftar entitas teratas untuk teks kesimpulan, dengan angka sesuai urutan yang dipilih."""
+    if sort_by == 'rate':
+        return ', '.join(
+            f"{row[entity]} ({row['problem_rate']:.1%} dari {row['orders']:,} pesanan)" for _, row in ranked.iterrows()
+        )
+    return ', '.join(f"{row[entity]} ({row['problem_orders']:,} pesanan bermasalah)" for _, row in ranked.iterrows())
+
+
+def plotly_chart(fig, name):
+    """st.plotly_chart yang diukur sebagai tahap telemetri (termasuk serialisasi figure)."""
+    with telemetry.stage(f"render.{name}"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# --- 4. Judul Dashboard Utama ---
 st.title("📊 Dashboard Analisis Data E-commerce (2017-2018)")
 st.markdown("""
     Dashboard ini menyediakan wawasan mendalam mengenai kinerja pengiriman,
@@ -98,15 +352,11 @@ st.markdown("""
     di platform E-commerce selama tahun 2017 dan 2018.
 """)
 
-# --- 6. Sidebar untuk Navigasi atau Filter Global ---
+# --- 5. Sidebar untuk Navigasi atau Filter Global ---
 st.sidebar.title("Navigasi & Filter")
 analysis_selection = st.sidebar.radio(
     "Pilih Area Analisis:",
-    [
-        "1. Durasi Pengiriman",
-        "2. Pesanan Bermasalah (Dibatalkan/Tidak Tersedia)",
-        "3. Pendapatan Kategori Produk"
-    ]
+    list(SECTION_TABLES)
 )
 st.sidebar.markdown("---")
 st.sidebar.header("Tentang Dashboard")
@@ -117,6 +367,14 @@ st.sidebar.info(
 st.sidebar.header("Kontak")
 st.sidebar.write("Jika ada pertanyaan, silakan hubungi tim analis data.")
 
+# --- 6. Memuat Data yang Dibutuhkan Bagian Terpilih ---
+section_tables = load_section_tables(analysis_selection)
+
+with st.sidebar.expander("Data yang Dimuat"):
+    load_report = section_load_report(section_tables)
+    st.dataframe(load_report.style.format({'Memori (MB)': '{:.2f}'}), hide_index=True)
+    st.caption(f"Total: {load_report['Memori (MB)'].sum():.2f} MB dari {len(section_tables)} tabel")
+
 # --- Bagian Konten Dashboard Berdasarkan Pilihan ---
 
 if analysis_selection == "1. Durasi Pengiriman":
@@ -133,71 +391,73 @@ if analysis_selection == "1. Durasi Pengiriman":
         default=[2017, 2018],
         help="Pilih tahun untuk melihat rata-rata durasi pengiriman."
     )
+    # Filter negara bagian dijawab dengan menggabungkan sketsa kuantil, tanpa memindai ulang pesanan
+    delivery_sketches = section_tables['delivery_sketches']
+    col1, col2 = st.columns(2)
+    with col1:
+        customer_states_q1 = st.multiselect(
+            "Filter Negara Bagian Pelanggan (kosongkan untuk semua):",
+            options=sorted(delivery_sketches['customer_state'].astype(str).unique()),
+            key='q1_customer_states'
+        )
+    with col2:
+        seller_states_q1 = st.multiselect(
+            "Filter Negara Bagian Penjual (kosongkan untuk semua):",
+            options=sorted(delivery_sketches['seller_state'].astype(str).unique()),
+            key='q1_seller_states'
+        )
 
     if not selected_years_q1:
         st.warning("Mohon pilih setidaknya satu tahun untuk analisis durasi pengiriman.")
     else:
-        # Filter pesanan dengan status 'delivered' dan tahun yang dipilih
-        delivered_orders_filtered = orders_df_cleaned[
-            (orders_df_cleaned['order_status'] == 'delivered') &
-            (orders_df_cleaned['order_purchase_timestamp'].dt.year.isin(selected_years_q1)) &
-            (orders_df_cleaned['order_delivered_customer_date'].notna()) &
-            (orders_df_cleaned['order_purchase_timestamp'].notna())
-        ].copy()
-
-        # Hitung durasi pengiriman dalam hari
-        delivered_orders_filtered['delivery_duration_days'] = (
-            delivered_orders_filtered['order_delivered_customer_date'] -
-            delivered_orders_filtered['order_purchase_timestamp']
-        ).dt.days
-
-        # Hapus nilai negatif (jika ada, menunjukkan data salah)
-        delivered_orders_filtered = delivered_orders_filtered[delivered_orders_filtered['delivery_duration_days'] >= 0]
-
-        if delivered_orders_filtered.empty:
-            st.info("Tidak ada data pengiriman 'delivered' untuk tahun yang dipilih.")
-        else:
-            # Hitung rata-rata durasi pengiriman
-            average_delivery_time = delivered_orders_filtered['delivery_duration_days'].mean()
-            max_delivery_time = delivered_orders_filtered['delivery_duration_days'].max()
-            min_delivery_time = delivered_orders_filtered['delivery_duration_days'].min()
+        # Statistik & grafik di-cache per pilihan tahun & negara bagian (urutan pilihan tidak berpengaruh)
+        delivery_figures = build_delivery_figures(
+            tuple(sorted(selected_years_q1)), tuple(sorted(customer_states_q1)), tuple(sorted(seller_states_q1))
+        )
 
-            col1, col2, col3 = st.columns(3)
+        if delivery_figures is None:
+            st.info("Tidak ada data pengiriman 'delivered' untuk filter yang dipilih.")
+        else:
+            delivery_summary = delivery_figures['stats']
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric(label="Rata-rata Durasi Pengiriman", value=f"{average_delivery_time:.2f} hari")
+                st.metric(label="Rata-rata Durasi Pengiriman", value=f"{delivery_summary['mean']:.2f} hari")
             with col2:
-                st.metric(label="Durasi Tercepat", value=f"{min_delivery_time:.0f} hari")
+                st.metric(label="Durasi Tercepat", value=f"{delivery_summary['min']:.0f} hari")
             with col3:
-                st.metric(label="Durasi Terlama", value=f"{max_delivery_time:.0f} hari")
+                st.metric(label="Durasi Terlama", value=f"{delivery_summary['max']:.0f} hari")
+            with col4:
+                st.metric(label="Pesanan Terlambat", value=f"{delivery_summary['late_rate']:.1%}")
+            quantile_columns = st.columns(len(delivery_summary['quantiles']))
+            for column, (name, value) in zip(quantile_columns, delivery_summary['quantiles'].items()):
+                with column:
+                    st.metric(label=f"Persentil {name[1:]} Durasi", value=f"{value:.0f} hari")
 
             st.subheader("Distribusi Durasi Pengiriman")
-            # Mengadaptasi tampilan histogram dari seaborn ke plotly
-            fig_hist = px.histogram(
-                delivered_orders_filtered,
-                x='delivery_duration_days',
-                nbins=50, # Jumlah bins disesuaikan
-                title='Distribusi Durasi Pengiriman Pesanan',
-                labels={'delivery_duration_days': 'Durasi Pengiriman (hari)', 'count': 'Jumlah Pesanan'},
-                color_discrete_sequence=['skyblue'] # Warna biru muda
-            )
-            fig_hist.update_traces(marker_line_color='black', marker_line_width=1) # Menambahkan garis tepi hitam
-            fig_hist.add_vline(x=average_delivery_time, line_dash="dash", line_color="red", annotation_text=f"Rata-rata: {average_delivery_time:.2f} hari")
-            fig_hist.update_layout(bargap=0.1)
-            st.plotly_chart(fig_hist, use_container_width=True)
+            plotly_chart(delivery_figures['fig_hist'], 'delivery_histogram')
+
+            st.subheader("Tren Persentil Durasi Pengiriman")
+            plotly_chart(delivery_figures['fig_trend'], 'delivery_percentile_trend')
+
+            st.subheader("Keterlambatan Pengiriman per Negara Bagian")
+            st.caption("Terlambat = pesanan tiba setelah tanggal estimasi pengiriman.")
+            late_tab_customer, late_tab_seller = st.tabs(["Negara Bagian Pelanggan", "Negara Bagian Penjual"])
+            with late_tab_customer:
+                plotly_chart(delivery_figures['fig_late_customer'], 'late_delivery_customer_state')
+            with late_tab_seller:
+                plotly_chart(delivery_figures['fig_late_seller'], 'late_delivery_seller_state')
 
             st.subheader("Durasi Pengiriman terhadap Waktu Pemesanan")
-            # Menambahkan scatter plot yang diminta user
-            fig_scatter = px.scatter(
-                delivered_orders_filtered,
-                x='order_purchase_timestamp',
-                y='delivery_duration_days',
-                title='Durasi Pengiriman terhadap Waktu Pemesanan',
-                labels={'order_purchase_timestamp': 'Tanggal Pemesanan', 'delivery_duration_days': 'Durasi Pengiriman (hari)'},
-                opacity=0.3, # Sesuaikan alpha
-                color_discrete_sequence=['teal'] # Warna teal
-            )
-            fig_scatter.update_traces(marker=dict(size=5, line=dict(width=1, color='White'))) # Ukuran dan garis tepi
-            st.plotly_chart(fig_scatter, use_container_width=True)
+            plotly_chart(delivery_figures['fig_scatter'], 'delivery_scatter')
+            if customer_states_q1 or seller_states_q1:
+                st.caption("Grafik ini hanya difilter per tahun; filter negara bagian berlaku untuk statistik & grafik di atas.")
+            if 'scatter_orders' not in delivery_figures:
+                st.caption("Agregat tersimpan berisi jumlah pesanan per hari, sehingga ditampilkan sebagai heatmap densitas.")
+            elif delivery_figures['scatter_mode'] == 'density':
+                st.caption(
+                    f"{delivery_figures['scatter_orders']:,} pesanan melebihi batas {config.SCATTER_POINT_BUDGET:,} titik, "
+                    "sehingga ditampilkan sebagai heatmap densitas (warna = jumlah pesanan per sel)."
+                )
 
             st.markdown(f"""
     <div style='font-size: 1.1em; text-align: justify;'>
@@ -219,87 +479,97 @@ if analysis_selection == "1. Durasi Pengiriman":
 elif analysis_selection == "2. Pesanan Bermasalah (Dibatalkan/Tidak Tersedia)":
     st.header("2. Analisis Pesanan Dibatalkan atau Tidak Tersedia")
     st.markdown("""
-        Menganalisis berapa banyak pesanan yang dibatalkan atau tidak tersedia pada tahun 2018,
-        dan apakah ada jenis produk atau penjual tertentu yang sering mengalami masalah ini.
+        Menganalisis berapa banyak dan seberapa sering pesanan dibatalkan atau tidak tersedia
+        pada rentang tanggal tertentu, dan apakah ada jenis produk atau penjual tertentu
+        yang sering mengalami masalah ini.
     """)
 
-    st.info("Analisis ini secara default fokus pada data tahun 2018, sesuai dengan pertanyaan bisnis.")
-
-    # Filter pesanan tahun 2018 dengan status 'canceled' atau 'unavailable'
-    problematic_orders_2018 = orders_df_cleaned[
-        (orders_df_cleaned['order_purchase_timestamp'].dt.year == 2018) &
-        (orders_df_cleaned['order_status'].isin(['canceled', 'unavailable']))
-    ].copy()
-
-    total_problematic_orders = problematic_orders_2018.shape[0]
-    st.metric(label="Jumlah Pesanan Dibatalkan/Tidak Tersedia (2018)", value=f"{total_problematic_orders} pesanan")
-
-    # Gabungkan data untuk mendapatkan informasi produk dan penjual
-    problematic_orders_merged = pd.merge(
-        problematic_orders_2018,
-        order_items_df,
-        on='order_id',
-        how='inner'
+    # Total per rentang tanggal dibaca dari indeks jumlah kumulatif (tanpa memindai ulang orders)
+    total_index = get_rate_index()
+    data_start, data_end = index_date_bounds(total_index)
+    default_start = max(data_start, pd.Timestamp('2018-01-01').date())
+    start_date, end_date = st.slider(
+        "Rentang Tanggal Pemesanan:", min_value=data_start, max_value=data_end,
+        value=(default_start, data_end), format="DD MMM YYYY", key='q2_date_range'
     )
-
-    # Gabungkan dengan products_df_cleaned untuk mendapatkan kategori produk (yang sudah diterjemahkan)
-    problematic_orders_merged = pd.merge(
-        problematic_orders_merged,
-        products_df_cleaned[['product_id', 'product_category_name_display']],
-        on='product_id',
-        how='left'
-    )
-
-    if problematic_orders_merged.empty:
-        st.info("Tidak ada pesanan dibatalkan/tidak tersedia yang ditemukan pada tahun 2018.")
+    is_default_view = (start_date, end_date) == (default_start, data_end)
+    period_range_label = f"{start_date:%d %b %Y} - {end_date:%d %b %Y}"
+    if is_default_view:
+        st.info("Secara default analisis fokus pada data tahun 2018, sesuai dengan pertanyaan bisnis.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_label = st.radio(
+            "Urutkan Berdasarkan:", ["Tingkat Masalah (%)", "Jumlah Pesanan Bermasalah"], horizontal=True, key='q2_sort_by'
+        )
+    with col2:
+        min_orders = st.number_input(
+            "Minimal Jumlah Pesanan per Kategori/Penjual:", min_value=1, value=20, step=5, key='q2_min_orders',
+            help="Entitas dengan pesanan lebih sedikit diabaikan agar tingkat masalah tidak didominasi volume kecil."
+        )
+    sort_by = 'rate' if sort_label.startswith('Tingkat') else 'count'
+
+    totals = range_totals(total_index, start_date, end_date)
+    total_problematic_orders = int(totals['problem_orders'][0])
+    total_orders_in_range = int(totals['orders'][0])
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(label="Jumlah Pesanan Dibatalkan/Tidak Tersedia", value=f"{total_problematic_orders} pesanan")
+    with col2:
+        st.metric(label="Total Pesanan", value=f"{total_orders_in_range:,} pesanan")
+    with col3:
+        st.metric(label="Tingkat Masalah", value=f"{total_problematic_orders / max(total_orders_in_range, 1):.2%}")
+
+    if total_problematic_orders == 0:
+        st.info(f"Tidak ada pesanan dibatalkan/tidak tersedia yang ditemukan pada {period_range_label}.")
     else:
-        st.subheader("Kategori Produk Teratas dengan Pesanan Bermasalah")
-        top_n_categories = st.slider("Tampilkan Top N Kategori:", min_value=5, max_value=20, value=10, step=1, key='q2_cat_slider')
-        top_problem_categories = problematic_orders_merged['product_category_name_display'].value_counts().head(top_n_categories)
-
-        if not top_problem_categories.empty:
-            fig_cat = px.bar(
-                x=top_problem_categories.values,
-                y=top_problem_categories.index,
-                orientation='h',
-                title=f'{top_n_categories} Kategori Produk Teratas dengan Pesanan Dibatalkan/Tidak Tersedia (2018)',
-                labels={'x': 'Jumlah Pesanan', 'y': 'Kategori Produk'},
-                color=top_problem_categories.values, # Memberi warna berdasarkan jumlah
-                color_continuous_scale=px.colors.sequential.Viridis
+        # Satu grafik per entitas: kategori produk lalu penjual
+        top_entities = {}
+        entity_charts = {
+            'product_category_name_display': ('q2_cat_slider', px.colors.sequential.Viridis),
+            'seller_id': ('q2_seller_slider', px.colors.sequential.Magma),
+        }
+        for entity, (slider_key, color_scale) in entity_charts.items():
+            entity_label = RATE_ENTITIES[entity]
+            st.subheader(f"{entity_label} Teratas dengan Pesanan Bermasalah")
+            top_n_entities = st.slider(
+                f"Tampilkan Top N {entity_label}:", min_value=5, max_value=20, value=10, step=1, key=slider_key
             )
-            fig_cat.update_yaxes(categoryorder='total ascending')
-            st.plotly_chart(fig_cat, use_container_width=True)
-        else:
-            st.info("Tidak ada data kategori produk untuk pesanan bermasalah.")
-
-
-        st.subheader("Penjual Teratas dengan Pesanan Bermasalah")
-        top_n_sellers = st.slider("Tampilkan Top N Penjual:", min_value=5, max_value=20, value=10, step=1, key='q2_seller_slider')
-        top_problem_sellers = problematic_orders_merged['seller_id'].value_counts().head(top_n_sellers)
-
-        if not top_problem_sellers.empty:
-            fig_seller = px.bar(
-                x=top_problem_sellers.values,
-                y=top_problem_sellers.index,
+            ranked = problem_rates(get_rate_index(entity), start_date, end_date, min_orders, sort_by, top_n_entities)
+            if ranked.empty:
+                st.info(f"Tidak ada {entity_label.lower()} dengan pesanan bermasalah dan minimal {min_orders} pesanan.")
+                continue
+            top_entities[entity] = ranked.head(3)
+            value = ranked['problem_rate'] * 100 if sort_by == 'rate' else ranked['problem_orders']
+            fig_entity = px.bar(
+                ranked.assign(value=value),
+                x='value',
+                y=entity,
                 orientation='h',
-                title=f'{top_n_sellers} Penjual Teratas dengan Pesanan Dibatalkan/Tidak Tersedia (2018)',
-                labels={'x': 'Jumlah Pesanan', 'y': 'ID Penjual'},
-                color=top_problem_sellers.values, # Memberi warna berdasarkan jumlah
-                color_continuous_scale=px.colors.sequential.Magma
+                title=f'{top_n_entities} {entity_label} Teratas dengan Pesanan Dibatalkan/Tidak Tersedia ({period_range_label})',
+                labels={'value': sort_label, entity: entity_label, 'orders': 'Jumlah Pesanan', 'problem_orders': 'Pesanan Bermasalah'},
+                hover_data={'orders': ':,', 'problem_orders': ':,', 'value': ':.2f' if sort_by == 'rate' else ':,'},
+                color='value', # Memberi warna berdasarkan nilai yang diurutkan
+                color_continuous_scale=color_scale
             )
-            fig_seller.update_yaxes(categoryorder='total ascending')
-            st.plotly_chart(fig_seller, use_container_width=True)
-        else:
-            st.info("Tidak ada data penjual untuk pesanan bermasalah.")
-
+            fig_entity.update_yaxes(categoryorder='total ascending')
+            plotly_chart(fig_entity, f"problem_{entity}")
+
+        # Kesimpulan dari angka yang sedang ditampilkan (rentang tanggal, urutan & ambang volume aktif)
+        ranking_label = "tingkat masalah tertinggi" if sort_by == 'rate' else "pesanan bermasalah terbanyak"
+        findings = [
+            f"Pada {period_range_label}, total {total_problematic_orders:,} dari {total_orders_in_range:,} pesanan "
+            f"({total_problematic_orders / max(total_orders_in_range, 1):.2%}) memiliki status canceled atau unavailable."
+        ]
+        findings += [
+            f"{RATE_ENTITIES[entity]} dengan {ranking_label} (minimal {min_orders} pesanan): {describe_ranked_entities(top_entities[entity], entity, sort_by)}."
+            for entity in top_entities
+        ]
         st.markdown(f"""
     <div style='font-size: 1.1em; text-align: justify;'>
         <p><strong>Kesimpulan:</strong></p>
         <ol>
-            Pada tahun 2018, total 479 pesanan memiliki status canceled atau unavailable. Kategori produk yang paling sering muncul dalam pesanan bermasalah ini adalah 
-            beleza_saude (kesehatan & kecantikan) dengan 27 pesanan, utilidades_domesticas (perkakas rumah tangga) dengan 26 pesanan, dan informatica_acessorios 
-            (komputer & aksesori) dengan 25 pesanan. Sementara itu, beberapa penjual tertentu, seperti cc419e0650a3c5ba77189a1882b7556a (9 pesanan bermasalah) dan 
-            81783131d2a97c8d44d406a4be81b5d9 (6 pesanan bermasalah), menunjukkan tingkat masalah yang lebih tinggi. Masalah ini bisa disebabkan oleh ketidaktersediaan stok, 
+            {' '.join(findings)} Masalah ini bisa disebabkan oleh ketidaktersediaan stok,
             masalah kualitas, atau kendala operasional penjual.</li>
         </ol>
         <p><strong>Saran/Rekomendasi:</strong></p>
@@ -312,77 +582,84 @@ elif analysis_selection == "2. Pesanan Bermasalah (Dibatalkan/Tidak Tersedia)":
 
 
 elif analysis_selection == "3. Pendapatan Kategori Produk":
-    st.header("3. Pendapatan Kategori Produk Teratas per Kuartal")
+    st.header("3. Pendapatan Kategori Produk Teratas per Periode")
     st.markdown("""
-        Menganalisis lima kategori produk teratas yang menjadi penyumbang pendapatan terbesar
-        perusahaan secara konsisten setiap tiga bulan (kuartal) di tahun 2017 dan 2018.
+        Menganalisis kategori produk teratas yang menjadi penyumbang pendapatan terbesar
+        perusahaan secara konsisten setiap periode. Secara default: lima kategori teratas
+        setiap tiga bulan (kuartal) di tahun 2017 dan 2018.
     """)
 
-    # Gabungkan dataset yang relevan untuk analisis pendapatan
-    orders_payments_df = pd.merge(orders_df_cleaned, order_payments_df, on='order_id', how='inner')
-    orders_payments_items_df = pd.merge(orders_payments_df, order_items_df, on='order_id', how='inner')
-    full_data_df_q3 = pd.merge(orders_payments_items_df,
-                                products_df_cleaned[['product_id', 'product_category_name_display']], # Menggunakan kolom display
-                                on='product_id',
-                                how='left')
-
-    # Filter data untuk tahun 2017 dan 2018
-    filtered_data_q3 = full_data_df_q3[full_data_df_q3['order_purchase_timestamp'].dt.year.isin([2017, 2018])].copy()
-
-    # Ekstrak tahun dan kuartal
-    filtered_data_q3['year'] = filtered_data_q3['order_purchase_timestamp'].dt.year
-    filtered_data_q3['quarter'] = filtered_data_q3['order_purchase_timestamp'].dt.quarter
-    filtered_data_q3['quarter_label'] = filtered_data_q3['year'].astype(str) + '-Q' + filtered_data_q3['quarter'].astype(str)
-
-    # Hitung total pendapatan per kategori produk per kuartal
-    revenue_by_category_quarter = filtered_data_q3.groupby(['year', 'quarter', 'quarter_label', 'product_category_name_display'])['payment_value'].sum().reset_index()
-
-    # Cari 5 kategori teratas untuk setiap kuartal
-    top_categories_per_quarter = revenue_by_category_quarter.groupby(['year', 'quarter']).apply(
-        lambda x: x.nlargest(5, 'payment_value')
-    ).reset_index(drop=True)
-
-    # Temukan kategori yang konsisten di top 5
-    consistent_categories = set()
-    first_quarter_processed = False
-
-    for (year, quarter), group in top_categories_per_quarter.groupby(['year', 'quarter']):
-        current_top_5 = set(group['product_category_name_display'].unique())
-        if not first_quarter_processed:
-            consistent_categories = current_top_5
-            first_quarter_processed = True
-        else:
-            consistent_categories.intersection_update(current_top_5)
+    revenue_cube = section_tables['revenue_cube']
+    data_start, data_end = cube_date_bounds(revenue_cube)
+    default_start = max(data_start, pd.Timestamp('2017-01-01').date())
+    default_end = min(data_end, pd.Timestamp('2018-12-31').date())
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        top_n = st.slider("Jumlah Kategori Teratas (N):", min_value=1, max_value=20, value=5, step=1, key='q3_top_n')
+    with col2:
+        granularity = st.selectbox(
+            "Granularitas Periode:", list(REVENUE_GRANULARITIES),
+            index=list(REVENUE_GRANULARITIES).index('Kuartalan'), key='q3_granularity'
+        )
+    with col3:
+        date_range = st.date_input(
+            "Rentang Tanggal Pemesanan:", value=(default_start, default_end),
+            min_value=data_start, max_value=data_end, key='q3_date_range'
+        )
+    seller_states = st.multiselect(
+        "Filter Negara Bagian Penjual (kosongkan untuk semua):",
+        options=sorted(revenue_cube['seller_state'].dropna().unique()),
+        key='q3_seller_states'
+    )
+
+    if not isinstance(date_range, (tuple, list)) or len(date_range) != 2:
+        st.warning("Mohon pilih tanggal awal dan akhir.")
+        st.stop()
+    start_date, end_date = date_range
+    period_range_label = f"{start_date:%d %b %Y} - {end_date:%d %b %Y}"
+    is_default_view = (
+        top_n == 5 and granularity == 'Kuartalan' and not seller_states and
+        (start_date, end_date) == (default_start, default_end)
+    )
 
-    consistent_categories_list = list(consistent_categories)
+    # Tampilan default memakai laporan batch (jika tersedia), selain itu roll-up kubus langsung
+    revenue_report = get_precomputed_report('category_revenue', (2017, 2018)) if is_default_view else None
+    if revenue_report is None or (revenue_report['granularity'], revenue_report['top_n']) != (granularity, top_n):
+        revenue_report = category_revenue(revenue_cube, start_date, end_date, granularity, top_n, seller_states)
+    revenue_by_category_period = revenue_report['revenue']
+    consistent_categories_list = revenue_report['consistent_categories']
 
-    if consistent_categories_list:
-        st.subheader(f"Kategori Produk yang Konsisten Masuk Top 5 Pendapatan (2017-2018)")
-        st.write("Kategori berikut secara konsisten menjadi penyumbang pendapatan terbesar setiap kuartal:")
+    if revenue_by_category_period.empty:
+        st.info("Tidak ada data pendapatan untuk filter yang dipilih.")
+
+    elif consistent_categories_list:
+        st.subheader(f"Kategori Produk yang Konsisten Masuk Top {top_n} Pendapatan ({period_range_label})")
+        st.write(f"Kategori berikut secara konsisten menjadi penyumbang pendapatan terbesar setiap periode ({granularity.lower()}):")
         for cat in consistent_categories_list:
             st.write(f"- **{cat.title()}**") # Gunakan title() untuk tampilan lebih rapi
 
-        plot_data = revenue_by_category_quarter[
-            revenue_by_category_quarter['product_category_name_display'].isin(consistent_categories_list)
-        ].copy()
-        plot_data = plot_data.sort_values(by=['year', 'quarter'])
+        plot_data = revenue_by_category_period[
+            revenue_by_category_period['product_category_name_display'].isin(consistent_categories_list)
+        ]
 
         fig_consistent = px.line(
             plot_data,
-            x='quarter_label',
+            x='period_label',
             y='payment_value',
             color='product_category_name_display', # Gunakan kolom display untuk legenda
             markers=True,
-            title='Pendapatan Kategori Produk Konsisten Top 5 per Kuartal (2017-2018)',
-            labels={'payment_value': 'Total Pendapatan (R$)', 'quarter_label': 'Kuartal', 'product_category_name_display': 'Kategori Produk'},
+            title=f'Pendapatan Kategori Produk Konsisten Top {top_n} per Periode ({granularity})',
+            labels={'payment_value': 'Total Pendapatan (R$)', 'period_label': 'Periode', 'product_category_name_display': 'Kategori Produk'},
             hover_name='product_category_name_display',
             height=600
         )
-        fig_consistent.update_layout(xaxis_title="Kuartal", yaxis_title="Total Pendapatan (R$)", legend_title="Kategori Produk")
+        fig_consistent.update_layout(xaxis_title="Periode", yaxis_title="Total Pendapatan (R$)", legend_title="Kategori Produk")
         fig_consistent.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_consistent, use_container_width=True)
+        plotly_chart(fig_consistent, 'category_revenue')
 
-        st.markdown(f"""
+        if is_default_view:
+            st.markdown(f"""
     <div style='font-size: 1.1em; text-align: justify;'>
         <p><strong>Kesimpulan:</strong></p>
         <ol>
@@ -402,33 +679,34 @@ elif analysis_selection == "3. Pendapatan Kategori Produk":
 """, unsafe_allow_html=True)
 
     else:
-        st.subheader("Tidak Ada Kategori Produk yang Konsisten Masuk Top 5 Pendapatan di Setiap Kuartal.")
-        top_5_overall = filtered_data_q3.groupby('product_category_name_display')['payment_value'].sum().nlargest(5)
-        st.write("Ini menunjukkan dinamika pasar atau variasi preferensi pelanggan yang cukup tinggi antar kuartal.")
-        st.write("Namun, secara keseluruhan untuk periode 2017-2018, 5 kategori dengan pendapatan tertinggi adalah:")
-        for category, value in top_5_overall.items():
+        st.subheader(f"Tidak Ada Kategori Produk yang Konsisten Masuk Top {top_n} Pendapatan di Setiap Periode.")
+        top_n_overall = revenue_report['top_overall'].set_index('product_category_name_display')['payment_value']
+        st.write("Ini menunjukkan dinamika pasar atau variasi preferensi pelanggan yang cukup tinggi antar periode.")
+        st.write(f"Namun, secara keseluruhan untuk periode {period_range_label}, {top_n} kategori dengan pendapatan tertinggi adalah:")
+        for category, value in top_n_overall.items():
             st.write(f"- **{category.title()}**: R$ {value:,.2f}")
 
-        plot_data = filtered_data_q3[filtered_data_q3['product_category_name_display'].isin(top_5_overall.index.tE-commerce())].copy()
-        plot_data_agg = plot_data.groupby(['quarter_label', 'product_category_name_display'])['payment_value'].sum().reset_index()
-        plot_data_agg = plot_data_agg.sort_values(by='quarter_label')
+        plot_data_agg = revenue_by_category_period[
+            revenue_by_category_period['product_category_name_display'].isin(top_n_overall.index.tolist())
+        ]
 
-        fig_global_top5 = px.line(
+        fig_global_top_n = px.line(
             plot_data_agg,
-            x='quarter_label',
+            x='period_label',
             y='payment_value',
             color='product_category_name_display',
             markers=True,
-            title='Pendapatan 5 Kategori Produk Teratas Global per Kuartal (2017-2018)',
-            labels={'payment_value': 'Total Pendapatan (R$)', 'quarter_label': 'Kuartal', 'product_category_name_display': 'Kategori Produk'},
+            title=f'Pendapatan {top_n} Kategori Produk Teratas Global per Periode ({granularity})',
+            labels={'payment_value': 'Total Pendapatan (R$)', 'period_label': 'Periode', 'product_category_name_display': 'Kategori Produk'},
             hover_name='product_category_name_display',
             height=600
         )
-        fig_global_top5.update_layout(xaxis_title="Kuartal", yaxis_title="Total Pendapatan (R$)", legend_title="Kategori Produk")
-        fig_global_top5.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_global_top5, use_container_width=True)
+        fig_global_top_n.update_layout(xaxis_title="Periode", yaxis_title="Total Pendapatan (R$)", legend_title="Kategori Produk")
+        fig_global_top_n.update_xaxes(tickangle=45)
+        plotly_chart(fig_global_top_n, 'category_revenue')
 
-        st.markdown("""
+        if is_default_view:
+            st.markdown("""
             <p style='font-size: 1.1em;'>
             Kesimpulan:
             Tidak ada kategori produk yang secara konsisten masuk dalam 5 besar di setiap kuartal sepanjang tahun 2017 dan 2018. Hal ini mengindikasikan dinamika pasar atau variasi preferensi pelanggan yang cukup tinggi antar kuartal. Namun, secara keseluruhan untuk periode 2017-2018, kami telah mengidentifikasi 5 kategori dengan pendapatan tertinggi secara agregat, yang trennya ditunjukkan pada grafik di atas.
@@ -444,6 +722,183 @@ elif analysis_selection == "3. Pendapatan Kategori Produk":
         """, unsafe_allow_html=True)
 
 
+elif analysis_selection == "4. Jarak & Rute Pengiriman":
+    st.header("4. Pengaruh Jarak & Rute terhadap Pengiriman")
+    st.markdown("""
+        Menganalisis hubungan jarak penjual ke pelanggan (dihitung dari centroid prefiks kode pos)
+        dan rute antar negara bagian dengan durasi pengiriman serta tingkat keterlambatan.
+        Satu pengiriman = satu pasangan pesanan & penjual yang sudah 'delivered'.
+    """)
+
+    delivery_geo = section_tables['delivery_geo']
+    available_years = sorted(int(year) for year in delivery_geo['year'].unique())
+    heatmap_values = {
+        'Tingkat Keterlambatan (%)': 'late_rate',
+        'Rata-rata Durasi (hari)': 'mean_days',
+        'Rata-rata Jarak (km)': 'mean_distance_km',
+    }
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_years_q4 = st.multiselect(
+            "Pilih Tahun Analisis:",
+            options=available_years,
+            default=[year for year in (2017, 2018) if year in available_years],
+            key='q4_years'
+        )
+    with col2:
+        min_shipments_q4 = st.number_input(
+            "Minimal Pengiriman per Rute:", min_value=1, value=30, step=10, key='q4_min_shipments',
+            help="Rute dengan pengiriman lebih sedikit tidak ditampilkan agar tingkat keterlambatan tidak bias."
+        )
+    with col3:
+        heatmap_label_q4 = st.selectbox("Metrik Heatmap Rute:", list(heatmap_values), key='q4_heatmap_value')
+
+    if not selected_years_q4:
+        st.warning("Mohon pilih setidaknya satu tahun untuk analisis jarak & rute pengiriman.")
+    else:
+        geo_figures = build_geo_figures(
+            tuple(sorted(selected_years_q4)), int(min_shipments_q4), (heatmap_values[heatmap_label_q4], heatmap_label_q4)
+        )
+
+        if geo_figures is None:
+            st.info("Tidak ada data pengiriman 'delivered' untuk filter yang dipilih.")
+        else:
+            geo_totals = geo_figures['totals']
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric(label="Jumlah Pengiriman", value=f"{geo_totals['shipments']:,}")
+            with col2:
+                st.metric(label="Rata-rata Jarak", value=f"{geo_totals['mean_distance_km']:,.0f} km")
+            with col3:
+                st.metric(label="Pengiriman Terlambat", value=f"{geo_totals['late_rate']:.1%}")
+            with col4:
+                st.metric(
+                    label="Lokasi Diketahui", value=f"{geo_totals['located_rate']:.1%}",
+                    help="Porsi pengiriman yang prefiks kode pos penjual & pelanggannya ada di data geolokasi."
+                )
+
+            plotly_chart(geo_figures['fig_bands'], 'distance_bands')
+
+            state_pairs = geo_figures['state_pairs']
+            if state_pairs.empty:
+                st.info(f"Tidak ada rute dengan minimal {int(min_shipments_q4)} pengiriman.")
+            else:
+                plotly_chart(geo_figures['fig_pairs'], 'state_pairs')
+                st.subheader("Rute dengan Tingkat Keterlambatan Tertinggi")
+                st.dataframe(
+                    state_pairs.head(15).rename(columns={
+                        'seller_state': 'Penjual', 'customer_state': 'Pelanggan', 'shipments': 'Pengiriman',
+                        'late_shipments': 'Terlambat', 'mean_days': 'Rata-rata Durasi (hari)',
+                        'late_rate': 'Terlambat (%)', 'mean_distance_km': 'Rata-rata Jarak (km)',
+                    }).drop(columns=['located_shipments']).style.format({
+                        'Rata-rata Durasi (hari)': '{:.1f}', 'Terlambat (%)': '{:.1%}', 'Rata-rata Jarak (km)': '{:,.0f}',
+                    }, na_rep='-'),
+                    hide_index=True
+                )
+
+
+elif analysis_selection == "5. Segmentasi Pelanggan (RFM)":
+    st.header("5. Segmentasi Pelanggan (RFM)")
+    st.markdown("""
+        Mengelompokkan pelanggan (customer_unique_id) berdasarkan Recency (hari sejak pembelian terakhir),
+        Frequency (jumlah pesanan), dan Monetary (total pembayaran) sampai tanggal snapshot yang dipilih.
+        Setiap metrik diberi skor kuintil 1-5; segmen ditentukan dari skor Recency & Frequency.
+        Pesanan yang dibatalkan/tidak tersedia tidak dihitung.
+    """)
+
+    rfm_bounds = rfm_date_bounds(get_rfm_index())
+    if rfm_bounds is None:
+        st.info("Tidak ada data pesanan pelanggan.")
+        st.stop()
+    data_start, data_end = rfm_bounds
+    as_of_q5 = st.date_input(
+        "Tanggal Snapshot (as-of):", value=data_end, min_value=data_start, max_value=data_end, key='q5_as_of',
+        help="Hanya pesanan pada atau sebelum tanggal ini yang dihitung; recency diukur sampai tanggal ini."
+    )
+
+    rfm_view = build_rfm_view(as_of_q5)
+    if rfm_view is None:
+        st.info("Belum ada pelanggan yang membeli sampai tanggal snapshot yang dipilih.")
+    else:
+        rfm = rfm_view['rfm']
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric(label="Jumlah Pelanggan", value=f"{len(rfm):,}")
+        with col2:
+            st.metric(label="Rata-rata Recency", value=f"{rfm['recency_days'].mean():.0f} hari")
+        with col3:
+            st.metric(label="Rata-rata Frekuensi", value=f"{rfm['frequency'].mean():.2f} pesanan")
+        with col4:
+            st.metric(label="Rata-rata Pembayaran", value=f"R$ {rfm['monetary'].mean():,.2f}")
+
+        st.caption("Klik sebuah segmen pada treemap untuk melihat sebaran negara bagian pelanggannya.")
+        plotly_chart(rfm_view['fig_treemap'], 'rfm_treemap')
+
+        segments = rfm_view['segments']
+        st.dataframe(
+            segments.rename(columns={
+                'segment': 'Segmen', 'customers': 'Pelanggan', 'customer_share': 'Porsi',
+                'recency_mean': 'Rata-rata Recency (hari)', 'frequency_mean': 'Rata-rata Frekuensi',
+                'monetary_mean': 'Rata-rata Pembayaran (R$)', 'monetary_total': 'Total Pembayaran (R$)',
+            })[[
+                'Segmen', 'Pelanggan', 'Porsi', 'Rata-rata Recency (hari)', 'Rata-rata Frekuensi',
+                'Rata-rata Pembayaran (R$)', 'Total Pembayaran (R$)',
+            ]].style.format({
+                'Porsi': '{:.1%}', 'Rata-rata Recency (hari)': '{:.0f}', 'Rata-rata Frekuensi': '{:.2f}',
+                'Rata-rata Pembayaran (R$)': '{:,.2f}', 'Total Pembayaran (R$)': '{:,.2f}',
+            }),
+            hide_index=True
+        )
+
+        # Drill-down satu segmen: sebaran negara bagian & pelanggan dengan pembayaran terbesar
+        st.subheader("Detail Segmen")
+        selected_segment = st.selectbox("Pilih Segmen:", list(segments['segment']), key='q5_segment')
+        segment_rows = segments.set_index('segment').loc[selected_segment]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric(label="Pelanggan di Segmen", value=f"{int(segment_rows['customers']):,}")
+        with col2:
+            st.metric(label="Porsi Pelanggan", value=f"{segment_rows['customer_share']:.1%}")
+        with col3:
+            st.metric(label="Total Pembayaran", value=f"R$ {segment_rows['monetary_total']:,.2f}")
+
+        fig_segment_states = px.bar(
+            segment_states(rfm, selected_segment),
+            x='customer_state',
+            y='customers',
+            color='monetary_mean',
+            color_continuous_scale='Blues',
+            title=f'Sebaran Negara Bagian Pelanggan: {selected_segment}',
+            labels={'customer_state': 'Negara Bagian Pelanggan', 'customers': 'Jumlah Pelanggan', 'monetary_mean': 'Rata-rata Pembayaran (R$)'}
+        )
+        plotly_chart(fig_segment_states, 'rfm_segment_states')
+
+        st.write(f"Pelanggan dengan pembayaran terbesar di segmen **{selected_segment}**:")
+        st.dataframe(
+            top_customers(rfm, selected_segment).rename(columns={
+                'customer_unique_id': 'ID Pelanggan', 'customer_state': 'Negara Bagian', 'recency_days': 'Recency (hari)',
+                'frequency': 'Frekuensi', 'monetary': 'Pembayaran (R$)', 'r_score': 'R', 'f_score': 'F', 'm_score': 'M',
+            }).drop(columns=['segment']).style.format({'Pembayaran (R$)': '{:,.2f}'}),
+            hide_index=True
+        )
+
+
+# --- Panel Diagnostik (opsional, ECOMMERCE_DIAGNOSTICS=1) ---
+if config.SHOW_DIAGNOSTICS:
+    with st.sidebar.expander("Diagnostik Performa"):
+        stage_report = telemetry.stage_summary()
+        cache_report = telemetry.cache_summary()
+        st.caption("Waktu, jumlah baris, dan memori puncak per tahap sejak proses dimulai")
+        if not stage_report.empty:
+            st.dataframe(stage_report.style.format({
+                'Terakhir (dtk)': '{:.3f}', 'Rata-rata (dtk)': '{:.3f}', 'Maks (dtk)': '{:.3f}',
+                'Memori Puncak (MB)': '{:.1f}', 'Baris': '{:,.0f}'
+            }, na_rep='-'), hide_index=True)
+        st.caption("Hit/miss cache")
+        if not cache_report.empty:
+            st.dataframe(cache_report.style.format({'Rasio Hit': '{:.0%}'}), hide_index=True)
+
+
 # --- Footer Dashboard (Opsional) ---
 st.markdown(
     """
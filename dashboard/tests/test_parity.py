@@ -0,0 +1,98 @@
+# test_parity.py
+# Kesetaraan backend pandas & streaming pada dataset sintetis kecil, termasuk batch append
+# (pengurangan & penambahan kontribusi pesanan) dan durasi di atas batas linear sketsa.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecommerce_analytics import config, synthetic
+from ecommerce_analytics.appends import append_batch, verify_aggregates
+from ecommerce_analytics.parity import check_parity
+from ecommerce_analytics.storage import DATETIME_FORMAT, TABLE_REGISTRY
+from ecommerce_analytics.streaming import load_streaming_aggregates
+
+# ~2.000 pesanan; geolocation diperkecil karena tidak ikut diskalakan generator
+SYNTHETIC_SCALE = 0.02
+SYNTHETIC_GEOLOCATION_ROWS = 20_000
+# Durasi pengiriman di atas batas linear sketsa default (100 hari)
+LONG_DELIVERY_DAYS = 209
+
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(synthetic.BASE_ROWS, 'geolocation', SYNTHETIC_GEOLOCATION_ROWS)
+    synthetic.generate_dataset(tmp_path / 'dataset', scale=SYNTHETIC_SCALE, seed=7)
+    return tmp_path / 'dataset'
+
+
+def read_source(dataset_dir, table_name):
+    return pd.read_csv(dataset_dir / TABLE_REGISTRY[table_name]['file'], dtype=str, keep_default_na=False)
+
+
+def write_batch(batch_dir, tables):
+    batch_dir.mkdir(parents=True)
+    for table_name, df in tables.items():
+        df.to_csv(batch_dir / TABLE_REGISTRY[table_name]['file'], index=False)
+    return batch_dir
+
+
+def make_batch(batch_dir, dataset_dir, seed):
+    """
+    Batch berisi pesanan terkirim yang dibatalkan, satu pesanan yang pengirimannya menjadi
+    LONG_DELIVERY_DAYS hari, pesanan baru (salinan dengan ID baru), dan item pesanan yang ditulis ulang.
+    """
+    rng = np.random.default_rng(seed)
+    orders = read_source(dataset_dir, 'orders')
+    items = read_source(dataset_dir, 'order_items')
+    payments = read_source(dataset_dir, 'order_payments')
+
+    delivered = orders[orders['order_status'] == 'delivered'].sample(21, random_state=seed)
+    canceled = delivered.iloc[1:].assign(order_status='canceled')
+    long_delivery = delivered.iloc[:1].copy()
+    purchase = pd.to_datetime(long_delivery['order_purchase_timestamp'])
+    long_delivery['order_delivered_customer_date'] = (purchase + pd.Timedelta(days=LONG_DELIVERY_DAYS)).dt.strftime(DATETIME_FORMAT)
+
+    cloned = orders.sample(30, random_state=seed + 1)
+    new_ids = dict(zip(cloned['order_id'], synthetic.hex_ids(rng, len(cloned))))
+    multi_item = items['order_id'].value_counts()
+    rewritten = items[items['order_id'].isin(multi_item[multi_item > 1].index[:10])].groupby('order_id').head(1)
+    rewritten = rewritten.assign(price=(rewritten['price'].astype(float) * 2).round(2).astype(str))
+    return write_batch(batch_dir, {
+        'orders': pd.concat([canceled, long_delivery, cloned.assign(order_id=cloned['order_id'].map(new_ids))]),
+        'order_items': pd.concat([
+            items[items['order_id'].isin(new_ids)].assign(order_id=lambda df: df['order_id'].map(new_ids)), rewritten
+        ]),
+        'order_payments': payments[payments['order_id'].isin(new_ids)].assign(order_id=lambda df: df['order_id'].map(new_ids)),
+    })
+
+
+def test_backends_agree(dataset_dir):
+    n_cases, differences = check_parity(dataset_dir)
+    assert n_cases > 0
+    assert differences == []
+
+
+# Akurasi 0.1 (batas linear 10 hari) memindahkan sebagian besar durasi ke bucket logaritmik;
+# batch kedua lalu membatalkan pesanan pemegang min/maks sebuah bucket sehingga dihitung ulang penuh
+@pytest.mark.parametrize('accuracy, modes', [
+    (config.SKETCH_ACCURACY, ['inkremental', 'inkremental']),
+    (0.1, ['inkremental', 'penuh']),
+])
+def test_append_round_trip(dataset_dir, tmp_path, monkeypatch, accuracy, modes):
+    monkeypatch.setattr(config, 'SKETCH_ACCURACY', accuracy)
+    load_streaming_aggregates(dataset_dir)
+
+    for seed, mode in enumerate(modes, start=1):
+        result = append_batch(make_batch(tmp_path / f"batch-{seed}", dataset_dir, seed=seed), dataset_dir)
+        assert result['mode'] == mode
+        assert verify_aggregates(dataset_dir) == []
+
+    _, differences = check_parity(dataset_dir)
+    assert differences == []
+
+
+def test_sketch_max_beyond_linear_limit(dataset_dir, tmp_path):
+    append_batch(make_batch(tmp_path / 'batch', dataset_dir, seed=3), dataset_dir)
+    sketches = load_streaming_aggregates(dataset_dir)['delivery_sketches']
+    assert sketches['duration_days_max'].max() == LONG_DELIVERY_DAYS